@@ -0,0 +1,147 @@
+"""
+Daily archival of cold rows
+
+Moves completed / cancelled queue entries from before today, and events
+older than ARCHIVE_EVENT_KEEP_DAYS, into monthly archive tables
+(queue_entries_archive_YYYYMM, system_events_archive_YYYYMM) so the live
+tables only hold the working set. Each batch is copied and deleted in one
+transaction, so an interrupted run loses nothing and can simply be rerun.
+
+Historical reads (queue status by id, event lookups and exports) fall back
+to the archive through models.archive. Yesterday's no-shows are settled in
+the rollups first (algorithms.rollups.close_day).
+
+Usage (e.g. from cron, once a night):
+    python -m algorithms.archival
+    python -m algorithms.archival --status
+"""
+from models.database import execute_query, init_db, transaction
+from models.archive import ARCHIVED_TABLES, ensure_partition, record_partition, get_partitions
+from algorithms.rollups import close_day
+from config import Config
+from datetime import datetime, timedelta
+import argparse
+import time
+
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def archive_table(source_table, cutoff, batch_size=1000):
+    """
+    Move a table's archivable rows older than cutoff into monthly partitions
+
+    Args:
+        source_table (str): 'queue_entries' or 'system_events'
+        cutoff (datetime): Rows strictly older than this are archived
+        batch_size (int): Rows moved per transaction
+
+    Returns:
+        int: Rows archived
+    """
+    spec = ARCHIVED_TABLES[source_table]
+    id_column, time_column = spec['id'], spec['time']
+    condition = f"AND {spec['condition']}" if spec['condition'] else ""
+    columns = ", ".join(spec['columns'])
+
+    oldest = execute_query(f"""
+        SELECT {time_column}
+        FROM {source_table}
+        WHERE {time_column} < %s {condition}
+        ORDER BY {time_column}
+        LIMIT 1
+    """, (cutoff,), fetch=True)
+    if not oldest:
+        return 0
+
+    archived = 0
+    month = _month_start(oldest[0][time_column])
+    while month < cutoff:
+        upper = min(_next_month(month), cutoff)
+        table = ensure_partition(source_table, month)
+
+        while True:
+            with transaction():
+                rows = execute_query(f"""
+                    SELECT {id_column}, {time_column}
+                    FROM {source_table}
+                    WHERE {time_column} >= %s AND {time_column} < %s {condition}
+                    ORDER BY {time_column}
+                    LIMIT %s
+                """, (month, upper, batch_size), fetch=True)
+                if not rows:
+                    break
+
+                ids = [row[id_column] for row in rows]
+                placeholders = ", ".join(["%s"] * len(ids))
+                execute_query(f"""
+                    INSERT INTO {table} ({columns})
+                    SELECT {columns} FROM {source_table} WHERE {id_column} IN ({placeholders})
+                """, tuple(ids))
+                execute_query(
+                    f"DELETE FROM {source_table} WHERE {id_column} IN ({placeholders})", tuple(ids)
+                )
+                record_partition(table, source_table, month, rows)
+            archived += len(rows)
+
+        month = _next_month(month)
+
+    return archived
+
+
+def run_archival(today=None, batch_size=None):
+    """
+    The nightly job: archive everything that left the working set
+
+    Args:
+        today (date): Treat this as the current day (default: today)
+        batch_size (int): Rows per transaction (default: Config.ARCHIVE_BATCH_SIZE)
+
+    Returns:
+        dict: source table -> rows archived
+    """
+    today = today or datetime.now().date()
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    midnight = datetime(today.year, today.month, today.day)
+    cutoffs = {
+        'queue_entries': midnight,
+        'system_events': midnight - timedelta(days=Config.ARCHIVE_EVENT_KEEP_DAYS)
+    }
+
+    print(f"✅ {close_day(midnight - timedelta(days=1))} no-shows recorded for "
+          f"{midnight - timedelta(days=1):%Y-%m-%d}")
+
+    results = {}
+    for source_table, cutoff in cutoffs.items():
+        start = time.perf_counter()
+        results[source_table] = archive_table(source_table, cutoff, batch_size)
+        print(f"✅ Archived {results[source_table]} {source_table} rows older than "
+              f"{cutoff:%Y-%m-%d} in {time.perf_counter() - start:.2f}s")
+    return results
+
+
+def print_status():
+    for source_table in ARCHIVED_TABLES:
+        live = execute_query(f"SELECT COUNT(*) as total FROM {source_table}", fetch=True)[0]['total']
+        print(f"{source_table}: {live} live rows")
+        for partition in get_partitions(source_table):
+            print(f"   {partition['table_name']}: {partition['row_count']} rows, "
+                  f"ids {partition['min_id']}-{partition['max_id']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move cold queue entries and events to the archive')
+    parser.add_argument('--status', action='store_true', help='Show live and archived row counts')
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+
+    init_db()
+    if args.status:
+        print_status()
+    else:
+        run_archival(batch_size=args.batch_size)
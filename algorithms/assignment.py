@@ -0,0 +1,259 @@
+"""
+Least-projected-wait doctor assignment
+
+When a check-in names only a department, the patient goes to the doctor
+who is projected to be free first: the end of their in-progress
+consultation (start + average time) plus one average consultation per
+patient already waiting. Each department keeps a min-heap of these
+projections, updated from every queue delta (models.queue.queue_changes)
+rather than recomputed per check-in, so an assignment costs O(log d).
+
+Heap entries are never removed in place: an update pushes a new entry
+and older ones for the same doctor are skipped when they surface (lazy
+deletion). Projections only grow as time passes (an overrunning
+consultation, an idle doctor), so a stale top is re-keyed and the pick
+retried; the top is the answer once its key is current.
+
+The heaps live in each worker's memory like the resident queues and are
+rebuilt every ASSIGNMENT_REFRESH_SECONDS, which also picks up check-ins
+handled by other workers and availability changes.
+"""
+from models.database import current_unit_of_work
+from models.doctor import get_doctor, get_department_doctor_ids
+from models.queue import queue_changes
+from models.queue_entries import get_in_progress_timing
+from algorithms.queue_manager import get_doctor_queue
+from config import Config
+import heapq
+import threading
+import time
+
+UNAVAILABLE_STATUSES = ('On_Break', 'Offline')
+
+
+class DoctorAssignmentHeap:
+    """
+    Min-heap of doctors by projected free time, with lazy deletion
+
+    Times are plain numbers (epoch seconds in the app, minutes in the
+    simulator).
+    """
+
+    def __init__(self):
+        self._heap = []          # (free_at, sequence, doctor_id)
+        self._latest = {}        # doctor_id -> sequence of its live entry
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._latest)
+
+    def __contains__(self, doctor_id):
+        return doctor_id in self._latest
+
+    def doctor_ids(self):
+        """Doctors currently in the heap"""
+        return list(self._latest)
+
+    def update(self, doctor_id, free_at):
+        """Set a doctor's projected free time in O(log d)"""
+        self._sequence += 1
+        self._latest[doctor_id] = self._sequence
+        heapq.heappush(self._heap, (free_at, self._sequence, doctor_id))
+        if len(self._heap) > 4 * len(self._latest) + 64:
+            self._compact()
+
+    def discard(self, doctor_id):
+        """Stop assigning to a doctor (its entries are skipped from now on)"""
+        self._latest.pop(doctor_id, None)
+
+    def peek(self):
+        """(doctor_id, free_at) of the earliest free doctor, or None"""
+        while self._heap:
+            free_at, sequence, doctor_id = self._heap[0]
+            if self._latest.get(doctor_id) == sequence:
+                return doctor_id, free_at
+            heapq.heappop(self._heap)
+        return None
+
+    def pick(self, projection, now, accept=None):
+        """
+        Earliest free doctor, re-keying stale projections on the way
+
+        Args:
+            projection (callable): projection(doctor_id, now) -> current free time
+            now: Current time, in the heap's unit
+            accept (callable): accept(doctor_id) -> False to drop a doctor
+
+        Returns:
+            tuple or None: (doctor_id, free_at)
+        """
+        while True:
+            top = self.peek()
+            if top is None:
+                return None
+            doctor_id, free_at = top
+            if accept is not None and not accept(doctor_id):
+                self.discard(doctor_id)
+                continue
+            fresh = projection(doctor_id, now)
+            if fresh <= free_at:
+                return doctor_id, free_at     # keeps any reservation on top of the projection
+            self.update(doctor_id, fresh)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._latest.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+
+class DepartmentScheduler:
+    """Per-department assignment heaps for this worker"""
+
+    def __init__(self):
+        self._heaps = {}             # department_id -> DoctorAssignmentHeap
+        self._built_at = {}          # department_id -> time.monotonic() of the last build
+        self._current_end = {}       # doctor_id -> projected end of the in-progress consultation
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _average_seconds(doctor_id):
+        doctor = get_doctor(doctor_id)
+        return (doctor['average_consultation_time'] or 10) * 60 if doctor else 600
+
+    @staticmethod
+    def _is_available(doctor_id):
+        doctor = get_doctor(doctor_id)
+        return bool(doctor and doctor['is_available']
+                    and doctor['current_status'] not in UNAVAILABLE_STATUSES)
+
+    def projection(self, doctor_id, now):
+        """Projected free time of a doctor (epoch seconds)"""
+        average = self._average_seconds(doctor_id)
+        start = max(now, self._current_end.get(doctor_id) or now)
+        return start + len(get_doctor_queue(doctor_id)) * average
+
+    def _build(self, department_id):
+        """Fresh heap for a department (reads the database: call without self._lock)"""
+        heap = DoctorAssignmentHeap()
+        now = time.time()
+        for doctor_id in get_department_doctor_ids(department_id):
+            current = get_in_progress_timing(doctor_id)
+            if current is not None and current['consultation_start_time'] is not None:
+                started = current['consultation_start_time'].timestamp()
+                self._current_end[doctor_id] = started + self._average_seconds(doctor_id)
+            else:
+                self._current_end.pop(doctor_id, None)
+            if self._is_available(doctor_id):
+                heap.update(doctor_id, self.projection(doctor_id, now))
+        return heap
+
+    def _heap_for(self, department_id):
+        with self._lock:
+            heap = self._heaps.get(department_id)
+            built_at = self._built_at.get(department_id, 0)
+        if heap is not None and time.monotonic() - built_at <= Config.ASSIGNMENT_REFRESH_SECONDS:
+            return heap
+        heap = self._build(department_id)
+        with self._lock:
+            self._heaps[department_id] = heap
+            self._built_at[department_id] = time.monotonic()
+        return heap
+
+    def assign(self, department_id):
+        """
+        Pick the doctor projected to be free first and reserve a slot
+
+        The reservation (one average consultation) keeps concurrent
+        check-ins from piling onto the same doctor before the first one
+        commits; the entry_added delta then replaces it with the real
+        projection, and a rollback recomputes it.
+
+        The top doctor's availability and projection are read without the
+        lock (they may hit the database); the pick is only taken if the top
+        has not moved meanwhile, otherwise it is retried.
+
+        Returns:
+            dict: {'doctor_id', 'projected_wait' (minutes)}
+
+        Raises:
+            ValueError: If no doctor in the department is available
+        """
+        heap = self._heap_for(department_id)
+        while True:
+            with self._lock:
+                top = heap.peek()
+            if top is None:
+                raise ValueError(f"No doctor available in department {department_id}")
+            doctor_id, free_at = top
+            now = time.time()
+            available = self._is_available(doctor_id)
+            if available:
+                fresh = self.projection(doctor_id, now)
+                average = self._average_seconds(doctor_id)
+            with self._lock:
+                if heap.peek() != top:
+                    continue
+                if not available:
+                    heap.discard(doctor_id)
+                elif fresh > free_at:
+                    heap.update(doctor_id, fresh)
+                else:
+                    # Keeps any reservation on top of the projection
+                    heap.update(doctor_id, free_at + average)
+                    break
+
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.on_rollback(lambda: self.refresh_doctor(doctor_id, department_id))
+        return {'doctor_id': doctor_id, 'projected_wait': int(max(0, free_at - now) // 60)}
+
+    def refresh_doctor(self, doctor_id, department_id):
+        """Recompute one doctor's projection, if their department heap is built"""
+        if department_id not in self._heaps:
+            return
+        available = self._is_available(doctor_id)
+        free_at = self.projection(doctor_id, time.time()) if available else None
+        with self._lock:
+            heap = self._heaps.get(department_id)
+            if heap is None:
+                return
+            if available:
+                heap.update(doctor_id, free_at)
+            else:
+                heap.discard(doctor_id)
+
+    def on_queue_delta(self, doctor_id, delta):
+        """Queue change log listener: track consultations and re-project the doctor"""
+        if delta['type'] == 'entry_called':
+            self._current_end[doctor_id] = time.time() + self._average_seconds(doctor_id)
+        elif delta['type'] == 'entry_completed':
+            self._current_end.pop(doctor_id, None)
+        department_id = delta.get('department_id')
+        if department_id is not None:
+            self.refresh_doctor(doctor_id, department_id)
+
+    def snapshot(self, department_id):
+        """Current projections of a department, earliest first (for inspection)"""
+        heap = self._heap_for(department_id)
+        with self._lock:
+            doctor_ids = heap.doctor_ids()
+        now = time.time()
+        projections = [(doctor_id, self.projection(doctor_id, now)) for doctor_id in doctor_ids]
+        return [
+            {'doctor_id': doctor_id, 'projected_wait': int(max(0, free_at - now) // 60)}
+            for doctor_id, free_at in sorted(projections, key=lambda item: item[1])
+        ]
+
+
+# Process-wide scheduler, kept current by the queue deltas
+scheduler = DepartmentScheduler()
+queue_changes.add_listener(scheduler.on_queue_delta)
+
+
+def assign_doctor(department_id):
+    """Least-projected-wait doctor for a department (see DepartmentScheduler.assign)"""
+    return scheduler.assign(department_id)
+
+
+def release_assignment(doctor_id, department_id):
+    """Drop the reservation of an assignment whose check-in failed"""
+    scheduler.refresh_doctor(doctor_id, department_id)
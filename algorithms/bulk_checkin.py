@@ -0,0 +1,302 @@
+from models.database import transaction, init_db
+from models.patient import get_patients, patient_age, has_chronic_condition
+from models.doctor import get_doctor
+from models.queue_entries import insert_entries
+from models.event_sink import log_event
+from algorithms.priority import calculate_priority_scores
+from algorithms.queue_manager import allocate_token_numbers, get_department_code, format_token
+from algorithms.queue_executor import submit_queue_command, wait_for_command
+from algorithms.assignment import assign_doctor
+from realtime import publish_queue_event
+from datetime import datetime
+import csv
+import io
+import json
+import sys
+import time
+
+REQUIRED_FIELDS = ['patient_id', 'department_id', 'visit_type']
+VISIT_TYPES = ('Walk-in', 'Appointment', 'Follow-up', 'Emergency')
+SEVERITIES = ('Low', 'Moderate', 'High', 'Critical')
+
+
+def parse_check_ins(body, content_type):
+    """
+    Parse a bulk upload into a list of check-in dicts
+
+    Args:
+        body (str): Request body or file contents
+        content_type (str): 'application/json' (array), 'application/x-ndjson'
+            or 'text/csv'
+
+    Returns:
+        list: Raw check-in dicts, one per row
+    """
+    content_type = (content_type or '').split(';')[0].strip().lower()
+
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    if content_type in ('text/csv', 'application/csv'):
+        return list(csv.DictReader(io.StringIO(body)))
+
+    rows = json.loads(body)
+    if isinstance(rows, dict):
+        rows = rows.get('check_ins', [])
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of check-ins")
+    return rows
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+def validate_check_in(row):
+    """
+    Validate and normalize one check-in row (CSV values arrive as strings)
+
+    Returns:
+        dict: Normalized row
+
+    Raises:
+        ValueError: With a message suitable for the per-row result
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+
+    for field in REQUIRED_FIELDS:
+        if row.get(field) in (None, ''):
+            raise ValueError(f"Missing field: {field}")
+
+    try:
+        check_in = {
+            'patient_id': int(row['patient_id']),
+            'doctor_id': int(row['doctor_id']) if row.get('doctor_id') not in (None, '') else None,
+            'department_id': int(row['department_id'])
+        }
+    except (TypeError, ValueError):
+        raise ValueError("patient_id, doctor_id and department_id must be integers")
+
+    if row['visit_type'] not in VISIT_TYPES:
+        raise ValueError(f"Invalid visit_type: {row['visit_type']}")
+
+    severity = row.get('symptom_severity') or 'Moderate'
+    if severity not in SEVERITIES:
+        raise ValueError(f"Invalid symptom_severity: {severity}")
+
+    check_in.update({
+        'visit_type': row['visit_type'],
+        'symptom_severity': severity,
+        'is_emergency': _to_bool(row.get('is_emergency', False)),
+        'notes': row.get('notes') or ''
+    })
+    return check_in
+
+
+def _check_in_group(doctor_id, doctor_rows):
+    """
+    Executor command inserting one doctor's share of an import
+
+    One multi-row INSERT, then the rows join the doctor's queue with the
+    batch's single reorder + ETA pass. The result is {row index: result}.
+    """
+    def check_in_all(batch):
+        # Insert with one executemany (a multi-row INSERT); sets queue_id
+        insert_entries([check_in for _, check_in in doctor_rows])
+        for _, check_in in doctor_rows:
+            batch.add(check_in, department_id=check_in['department_id'])
+
+        def finish(batch):
+            results = {}
+            for index, check_in in doctor_rows:
+                queue_id = check_in['queue_id']
+                queue_position = batch.positions[queue_id]
+                wait_time, wait_p90 = batch.wait_ranges[queue_id]
+                results[index] = {
+                    'row': index,
+                    'success': True,
+                    'queue_id': queue_id,
+                    'token_number': check_in['token_number'],
+                    'priority_score': float(check_in['priority_score']),
+                    'queue_position': queue_position,
+                    'estimated_wait_time': wait_time,
+                    'wait_range': {'p50': wait_time, 'p90': wait_p90}
+                }
+                log_event('Check-in', queue_id, doctor_id, {
+                    'department_id': check_in['department_id'],
+                    'priority_score': float(check_in['priority_score']),
+                    'estimated_wait_time': wait_time,
+                    'bulk': True
+                })
+                # entries_moved follows once per batch
+                publish_queue_event('entry_added', doctor_id, {
+                    'entry': {
+                        'queue_id': queue_id,
+                        'token_number': check_in['token_number'],
+                        'queue_position': queue_position,
+                        'priority_score': float(check_in['priority_score']),
+                        'estimated_wait_time': wait_time,
+                        'symptom_severity': check_in['symptom_severity'],
+                        'is_emergency': check_in['is_emergency'],
+                        'notes': check_in['notes'],
+                        'first_name': check_in['patient']['first_name'],
+                        'last_name': check_in['patient']['last_name'],
+                        'age': check_in['age'],
+                        'chronic_conditions': check_in['patient']['chronic_conditions']
+                    }
+                }, department_id=check_in['department_id'])
+            return results
+
+        return finish
+
+    return check_in_all
+
+
+def bulk_check_in(rows):
+    """
+    Check in many patients with one token block per department, and one
+    multi-row INSERT and one reorder + ETA pass per affected doctor
+
+    Each doctor's rows go through that doctor's command executor, the
+    only writer of their resident queue, so imports never race with
+    check-ins and consultations. Doctors are processed in parallel; if
+    one doctor's rows fail, only those rows are rejected.
+
+    Args:
+        rows (list): Raw check-in dicts (see POST /api/patient/checkin)
+
+    Returns:
+        dict: {
+            'results': [per-row result, in input order],
+            'accepted': int, 'rejected': int,
+            'elapsed_ms': float, 'rows_per_second': float
+        }
+    """
+    start = time.perf_counter()
+    results = [None] * len(rows)
+    valid = []
+
+    # 1. Validate
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, validate_check_in(row)))
+        except ValueError as err:
+            results[index] = {'row': index, 'success': False, 'error': str(err)}
+
+    # 2. Load patients (cache misses in one query) and score in batch
+    patients = get_patients([check_in['patient_id'] for _, check_in in valid])
+
+    # Rows without a doctor go to the least projected wait, one reservation each
+    assignable = []
+    for index, check_in in valid:
+        if check_in['doctor_id'] is None and check_in['patient_id'] in patients:
+            try:
+                check_in['doctor_id'] = assign_doctor(check_in['department_id'])['doctor_id']
+            except ValueError as err:
+                results[index] = {'row': index, 'success': False, 'error': str(err)}
+                continue
+        assignable.append((index, check_in))
+    valid = assignable
+
+    doctor_ids = {check_in['doctor_id'] for _, check_in in valid if check_in['doctor_id'] is not None}
+    doctors = {doctor_id: get_doctor(doctor_id) for doctor_id in doctor_ids}
+    accepted = []
+    for index, check_in in valid:
+        patient = patients.get(check_in['patient_id'])
+        if patient is None:
+            results[index] = {'row': index, 'success': False, 'error': 'Patient not found'}
+            continue
+        if doctors[check_in['doctor_id']] is None:
+            results[index] = {'row': index, 'success': False, 'error': 'Doctor not found'}
+            continue
+        check_in['age'] = patient_age(patient)
+        check_in['has_chronic_condition'] = has_chronic_condition(patient)
+        check_in['patient'] = patient
+        accepted.append((index, check_in))
+
+    scores = calculate_priority_scores({
+        'is_emergency': [check_in['is_emergency'] for _, check_in in accepted],
+        'symptom_severity': [check_in['symptom_severity'] for _, check_in in accepted],
+        'age': [check_in['age'] for _, check_in in accepted],
+        'has_chronic_condition': [check_in['has_chronic_condition'] for _, check_in in accepted],
+        'visit_type': [check_in['visit_type'] for _, check_in in accepted]
+    })
+    for (_, check_in), score in zip(accepted, scores):
+        check_in['priority_score'] = int(score)
+
+    # 3. Allocate tokens in one block per department
+    by_department = {}
+    for index, check_in in accepted:
+        by_department.setdefault(check_in['department_id'], []).append((index, check_in))
+
+    with transaction():
+        for department_id, department_rows in list(by_department.items()):
+            try:
+                dept_code = get_department_code(department_id)
+            except ValueError as err:
+                for index, _ in department_rows:
+                    results[index] = {'row': index, 'success': False, 'error': str(err)}
+                del by_department[department_id]
+                continue
+            first = allocate_token_numbers(department_id, len(department_rows))
+            for offset, (_, check_in) in enumerate(department_rows):
+                check_in['token_number'] = format_token(dept_code, first + offset)
+
+    # 4. Insert, reorder and recompute ETAs on each affected doctor's executor
+    check_in_time = datetime.now().replace(microsecond=0)
+    by_doctor = {}
+    for department_rows in by_department.values():
+        for index, check_in in department_rows:
+            check_in['check_in_time'] = check_in_time
+            by_doctor.setdefault(check_in['doctor_id'], []).append((index, check_in))
+
+    pending = {
+        doctor_id: submit_queue_command(doctor_id, _check_in_group(doctor_id, doctor_rows))
+        for doctor_id, doctor_rows in by_doctor.items()
+    }
+    for doctor_id, future in pending.items():
+        try:
+            for index, result in wait_for_command(future).items():
+                results[index] = result
+        except Exception as err:
+            # Tokens reserved for these rows are left unused
+            for index, _ in by_doctor[doctor_id]:
+                results[index] = {'row': index, 'success': False, 'error': str(err)}
+
+    elapsed = time.perf_counter() - start
+    accepted_count = sum(1 for result in results if result and result['success'])
+    return {
+        'results': results,
+        'accepted': accepted_count,
+        'rejected': len(rows) - accepted_count,
+        'elapsed_ms': round(elapsed * 1000, 1),
+        'rows_per_second': round(len(rows) / elapsed, 1) if elapsed else None
+    }
+
+
+# CLI: python -m algorithms.bulk_checkin appointments.csv|.json|.ndjson
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python -m algorithms.bulk_checkin <file.csv|file.json|file.ndjson>")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    content_types = {'.csv': 'text/csv', '.ndjson': 'application/x-ndjson', '.jsonl': 'application/x-ndjson'}
+    content_type = next(
+        (value for suffix, value in content_types.items() if path.endswith(suffix)),
+        'application/json'
+    )
+
+    with open(path, encoding='utf-8') as upload:
+        rows = parse_check_ins(upload.read(), content_type)
+
+    init_db()
+    summary = bulk_check_in(rows)
+    for result in summary['results']:
+        if not result['success']:
+            print(f"❌ Row {result['row']}: {result['error']}")
+    print(f"✅ Checked in {summary['accepted']} of {len(rows)} rows in "
+          f"{summary['elapsed_ms']} ms ({summary['rows_per_second']} rows/s)")
@@ -0,0 +1,223 @@
+from models.database import execute_query, transaction, current_unit_of_work, init_db
+from models.async_database import execute_query_async
+from models.cache import TTLCache
+from models.doctor import invalidate_doctor, get_doctor_ids
+from models.history import get_consultation_times
+from config import Config
+import json
+import sys
+
+# One bucket per minute, the last bucket collects everything longer
+HISTOGRAM_BUCKETS = 121
+
+stats_cache = TTLCache('doctor_stats', maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL_SECONDS)
+
+
+def histogram_bucket(minutes):
+    """Bucket index for a consultation duration"""
+    return min(max(int(minutes), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def histogram_quantile(histogram, q):
+    """
+    Streaming percentile from a fixed per-minute histogram
+
+    Args:
+        histogram (list): Counts per minute bucket
+        q (float): Quantile in [0, 1], e.g. 0.9
+
+    Returns:
+        int or None: Duration in minutes, None if the histogram is empty
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    for minutes, count in enumerate(histogram):
+        seen += count
+        if seen >= rank and count:
+            return minutes
+    return len(histogram) - 1
+
+
+class ConsultationStats:
+    """
+    Running consultation-time aggregates for one doctor
+
+    count/sum give the exact mean, ewma tracks recent pace and the
+    histogram answers percentiles. Every update is O(1).
+    """
+
+    def __init__(self, count=0, total=0, ewma=None, histogram=None):
+        self.count = count
+        self.total = total
+        self.ewma = ewma
+        self.histogram = histogram or [0] * HISTOGRAM_BUCKETS
+
+    @classmethod
+    def from_row(cls, row):
+        histogram = row['histogram']
+        if isinstance(histogram, (str, bytes, bytearray)):
+            histogram = json.loads(histogram)
+        return cls(
+            count=row['consultation_count'],
+            total=row['total_minutes'],
+            ewma=float(row['ewma_minutes']) if row['ewma_minutes'] is not None else None,
+            histogram=histogram
+        )
+
+    def add(self, minutes, alpha=Config.STATS_EWMA_ALPHA):
+        """Fold one consultation into the aggregates"""
+        self.count += 1
+        self.total += minutes
+        self.ewma = minutes if self.ewma is None else self.ewma + alpha * (minutes - self.ewma)
+        self.histogram[histogram_bucket(minutes)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q):
+        return histogram_quantile(self.histogram, q)
+
+    def to_dict(self):
+        return {
+            'consultation_count': self.count,
+            'mean_minutes': round(self.mean, 2) if self.count else None,
+            'ewma_minutes': round(self.ewma, 2) if self.ewma is not None else None,
+            'p50_minutes': self.percentile(0.5),
+            'p90_minutes': self.percentile(0.9)
+        }
+
+
+STATS_QUERY = """
+    SELECT consultation_count, total_minutes, ewma_minutes, histogram
+    FROM doctor_stats
+    WHERE doctor_id = %s
+"""
+
+
+def _load_stats(doctor_id):
+    result = execute_query(STATS_QUERY, (doctor_id,), fetch=True)
+    return ConsultationStats.from_row(result[0]) if result else ConsultationStats()
+
+
+async def _load_stats_async(doctor_id):
+    result = await execute_query_async(STATS_QUERY, (doctor_id,), fetch=True)
+    return ConsultationStats.from_row(result[0]) if result else ConsultationStats()
+
+
+def get_consultation_stats(doctor_id):
+    """Running stats for a doctor (cached, recovered from doctor_stats after restart)"""
+    return stats_cache.get(doctor_id, _load_stats)
+
+
+async def get_consultation_stats_async(doctor_id):
+    """get_consultation_stats, awaited on a cache miss (ASGI server)"""
+    return await stats_cache.get_async(doctor_id, _load_stats_async)
+
+
+def record_consultation(doctor_id, minutes):
+    """
+    Fold a finished consultation into the doctor's stats row in O(1)
+
+    The upsert does the arithmetic in the database, so concurrent workers never
+    lose updates. A row without an EWMA yet (a rebuild for a doctor with no
+    history) starts it at this consultation. Also refreshes doctors.average_consultation_time from
+    the running mean (a primary-key read, no history scan).
+
+    Args:
+        doctor_id (int): Doctor's ID
+        minutes (int): Actual consultation time
+    """
+    alpha = Config.STATS_EWMA_ALPHA
+    bucket = f"$[{histogram_bucket(minutes)}]"
+    initial = ConsultationStats()
+    initial.add(minutes, alpha)
+
+    upsert_query = """
+        INSERT INTO doctor_stats
+        (doctor_id, consultation_count, total_minutes, ewma_minutes, histogram)
+        VALUES (%s, 1, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            consultation_count = consultation_count + 1,
+            total_minutes = total_minutes + %s,
+            ewma_minutes = COALESCE(ewma_minutes + %s * (%s - ewma_minutes), %s),
+            histogram = JSON_SET(histogram, %s, JSON_EXTRACT(histogram, %s) + 1)
+    """
+    execute_query(upsert_query, (
+        doctor_id, minutes, minutes, json.dumps(initial.histogram),
+        minutes, alpha, minutes, minutes, bucket, bucket
+    ))
+
+    average_query = """
+        UPDATE doctors
+        SET average_consultation_time = (
+            SELECT ROUND(total_minutes / (consultation_count * 1.0))
+            FROM doctor_stats
+            WHERE doctor_id = %s
+        )
+        WHERE doctor_id = %s
+    """
+    execute_query(average_query, (doctor_id, doctor_id))
+
+    invalidate_doctor(doctor_id)
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.after_commit(lambda: stats_cache.invalidate(doctor_id))
+    else:
+        stats_cache.invalidate(doctor_id)
+
+
+def rebuild_consultation_stats(doctor_id=None):
+    """
+    Recompute doctor_stats from consultation_history
+
+    Args:
+        doctor_id (int): Only rebuild this doctor (default: all doctors)
+
+    Returns:
+        dict: doctor_id -> ConsultationStats
+    """
+    doctor_ids = get_doctor_ids() if doctor_id is None else [doctor_id]
+
+    replace_query = """
+        REPLACE INTO doctor_stats
+        (doctor_id, consultation_count, total_minutes, ewma_minutes, histogram)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    average_query = """
+        UPDATE doctors
+        SET average_consultation_time = %s
+        WHERE doctor_id = %s
+    """
+
+    rebuilt = {}
+    for current_id in doctor_ids:
+        stats = ConsultationStats()
+        for minutes in get_consultation_times(current_id):
+            stats.add(minutes)
+
+        with transaction():
+            execute_query(replace_query, (
+                current_id, stats.count, stats.total, stats.ewma, json.dumps(stats.histogram)
+            ))
+            if stats.count:
+                execute_query(average_query, (round(stats.mean), current_id))
+            invalidate_doctor(current_id)
+        stats_cache.invalidate(current_id)
+
+        rebuilt[current_id] = stats
+        print(f"✅ Doctor {current_id}: {stats.to_dict()}")
+
+    return rebuilt
+
+
+# Rebuild command: python -m algorithms.consultation_stats rebuild [doctor_id]
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'rebuild':
+        init_db()
+        rebuild_consultation_stats(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    else:
+        print("Usage: python -m algorithms.consultation_stats rebuild [doctor_id]")
@@ -0,0 +1,432 @@
+"""
+Consultation-time sketches for wait ranges
+
+Every finished consultation is folded into fixed per-minute histograms
+(the same 121 buckets as doctor_stats) kept per doctor, visit type and
+severity in duration_sketches. (visit type, '*') rows aggregate over
+severity, so a sparse combination falls back to them and then to the
+doctor as a whole, whose histogram is the one doctor_stats already
+keeps; a doctor without enough samples falls back to their average
+consultation time.
+
+A wait is the remaining time of the in-progress consultation plus one
+consultation per patient ahead. With a single term the p50/p90 come
+straight from that histogram; with more, means, variances and third
+central moments add and the range uses the normal approximation with a
+skew correction (Cornish-Fisher), since consultation times are
+right-skewed. Either way an ETA costs O(1) per
+position, never a consultation_history scan.
+
+Usage:
+    python -m algorithms.duration_model rebuild          # from consultation_history
+    python -m algorithms.duration_model benchmark        # replay vs the average-time estimator
+"""
+from models.database import execute_query, init_db, transaction, current_unit_of_work
+from models.cache import TTLCache
+from models.doctor import get_doctor
+from models.history import stream_consultation_kinds
+from models.archive import find_archived_entry
+from algorithms.consultation_stats import (
+    HISTOGRAM_BUCKETS, histogram_bucket, histogram_quantile, get_consultation_stats
+)
+from config import Config
+import json
+import math
+import sys
+
+WILDCARD = '*'
+
+# Standard normal quantiles for the wait range
+Z_SCORES = {0.5: 0.0, 0.9: 1.2816}
+
+# Spread assumed around the average time until a doctor has samples
+PRIOR_CV = 0.5
+
+sketch_cache = TTLCache('duration_sketches', maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL_SECONDS)
+
+
+def sketch_keys(visit_type, symptom_severity):
+    """
+    The duration_sketches rows a consultation is counted in, most specific first
+
+    The doctor-wide distribution is not among them: it is doctor_stats'
+    histogram.
+    """
+    visit_type = visit_type or WILDCARD
+    symptom_severity = symptom_severity or WILDCARD
+    return [
+        key for key in dict.fromkeys([(visit_type, symptom_severity), (visit_type, WILDCARD)])
+        if key != (WILDCARD, WILDCARD)
+    ]
+
+
+class DurationSketch:
+    """
+    Streaming consultation-time distribution as a per-minute histogram
+
+    add() is O(1); mean, moments and quantiles are O(buckets) and
+    memoised, so cached sketches answer in constant time.
+    """
+
+    def __init__(self, count=0, total=0, histogram=None):
+        self.count = count
+        self.total = total
+        self.histogram = histogram or [0] * HISTOGRAM_BUCKETS
+        self._moments = None
+
+    @classmethod
+    def from_row(cls, row):
+        histogram = row['histogram']
+        if isinstance(histogram, (str, bytes, bytearray)):
+            histogram = json.loads(histogram)
+        return cls(count=row['sample_count'], total=row['total_minutes'], histogram=histogram)
+
+    @classmethod
+    def from_stats(cls, stats):
+        """The doctor-wide sketch, from their ConsultationStats (doctor_stats)"""
+        return cls(count=stats.count, total=stats.total, histogram=list(stats.histogram))
+
+    def add(self, minutes):
+        """Fold one consultation into the sketch"""
+        self.count += 1
+        self.total += minutes
+        self.histogram[histogram_bucket(minutes)] += 1
+        self._moments = None
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def _central_moments(self):
+        if self._moments is None:
+            mean = self.mean
+            second = third = 0.0
+            for minutes, count in enumerate(self.histogram):
+                if count:
+                    second += count * (minutes - mean) ** 2
+                    third += count * (minutes - mean) ** 3
+            self._moments = (second / self.count, third / self.count) if self.count else (0.0, 0.0)
+        return self._moments
+
+    @property
+    def variance(self):
+        return self._central_moments()[0]
+
+    @property
+    def third_moment(self):
+        return self._central_moments()[1]
+
+    def quantile(self, q):
+        return histogram_quantile(self.histogram, q) or 0
+
+    def residual(self, elapsed):
+        """
+        Distribution of the time left in a consultation already elapsed minutes long
+
+        Returns:
+            DurationSketch: Remaining minutes, conditioned on the consultation
+            lasting longer than elapsed (empty if it already ran past every sample)
+        """
+        start = max(int(math.floor(elapsed)) + 1, 0)
+        histogram = [0] * HISTOGRAM_BUCKETS
+        count = total = 0
+        for minutes in range(start, HISTOGRAM_BUCKETS):
+            samples = self.histogram[minutes]
+            if samples:
+                remaining = minutes - elapsed
+                histogram[histogram_bucket(remaining)] += samples
+                count += samples
+                total += remaining * samples
+        return DurationSketch(count, total, histogram)
+
+
+class PriorDuration:
+    """Normal guess around a mean, for doctors without enough samples"""
+
+    def __init__(self, mean, cv=PRIOR_CV):
+        self.count = 0
+        self.mean = max(float(mean), 0.0)
+        self.variance = (cv * self.mean) ** 2
+        self.third_moment = 0.0
+
+    def quantile(self, q):
+        return self.mean + Z_SCORES[q] * math.sqrt(self.variance)
+
+    def residual(self, elapsed):
+        return PriorDuration(max(0.0, self.mean - elapsed))
+
+
+class WaitRange:
+    """
+    Sum of consultation times ahead of a patient
+
+    Means, variances and third central moments add; the p50/p90 of a
+    single term are read from its distribution, sums use the skew-corrected
+    normal approximation.
+    """
+
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.third_moment = 0.0
+        self.terms = 0
+        self._single = None
+
+    def add(self, duration, times=1):
+        """Add times consultations drawn from duration"""
+        if times <= 0 or duration is None:
+            return self
+        self.mean += times * duration.mean
+        self.variance += times * duration.variance
+        self.third_moment += times * duration.third_moment
+        self.terms += times
+        self._single = duration if self.terms == 1 else None
+        return self
+
+    def quantile(self, q):
+        if self.terms == 0:
+            return 0.0
+        if self._single is not None:
+            return self._single.quantile(q)
+        if self.variance <= 0:
+            return self.mean
+        z = Z_SCORES[q]
+        skew = self.third_moment / self.variance ** 1.5
+        return self.mean + math.sqrt(self.variance) * (z + (z * z - 1) * skew / 6)
+
+    def minutes(self):
+        """(p50, p90) in whole minutes"""
+        p50 = int(self.quantile(0.5))
+        return p50, max(p50, int(round(self.quantile(0.9))))
+
+
+class DoctorDurationModel:
+    """A doctor's sketches with the fallback from sparse combinations"""
+
+    def __init__(self, doctor_id, sketches, average_minutes, overall=None):
+        self.doctor_id = doctor_id
+        self.sketches = sketches          # (visit_type, severity) -> DurationSketch
+        self.overall = overall            # doctor-wide DurationSketch
+        self.prior = PriorDuration(average_minutes)
+        self._resolved = {}
+
+    def duration(self, visit_type=None, symptom_severity=None):
+        """Best-supported distribution for a visit type and severity"""
+        key = (visit_type, symptom_severity)
+        duration = self._resolved.get(key)
+        if duration is None:
+            duration = self.prior
+            candidates = [self.sketches.get(sketch_key)
+                          for sketch_key in sketch_keys(visit_type, symptom_severity)]
+            for sketch in candidates + [self.overall]:
+                if sketch is not None and sketch.count >= Config.ETA_MIN_SAMPLES:
+                    duration = sketch
+                    break
+            self._resolved[key] = duration
+        return duration
+
+    def remaining(self, visit_type, symptom_severity, elapsed):
+        """Distribution of the time left in the in-progress consultation"""
+        residual = self.duration(visit_type, symptom_severity).residual(elapsed)
+        if residual.count == 0 and isinstance(residual, DurationSketch):
+            return None     # already longer than every recorded consultation
+        return residual
+
+
+def _load_model(doctor_id):
+    doctor = get_doctor(doctor_id)
+    if not doctor:
+        raise ValueError(f"Doctor {doctor_id} not found")
+    query = """
+        SELECT visit_type, symptom_severity, sample_count, total_minutes, histogram
+        FROM duration_sketches
+        WHERE doctor_id = %s
+    """
+    sketches = {
+        (row['visit_type'], row['symptom_severity']): DurationSketch.from_row(row)
+        for row in execute_query(query, (doctor_id,), fetch=True)
+    }
+    overall = DurationSketch.from_stats(get_consultation_stats(doctor_id))
+    return DoctorDurationModel(doctor_id, sketches, doctor['average_consultation_time'], overall)
+
+
+def get_duration_model(doctor_id):
+    """A doctor's duration model (cached, one primary-key range read plus doctor_stats on a miss)"""
+    return sketch_cache.get(doctor_id, _load_model)
+
+
+def record_duration(doctor_id, visit_type, symptom_severity, minutes):
+    """
+    Fold a finished consultation into the doctor's sketches in O(1)
+
+    One multi-row upsert updates the specific and the (visit type, '*')
+    rows, with the arithmetic done in the database so concurrent workers
+    never lose updates. The doctor-wide histogram is record_consultation's.
+
+    Args:
+        doctor_id (int): Doctor's ID
+        visit_type (str): The finished entry's visit type
+        symptom_severity (str): The finished entry's severity
+        minutes (int): Actual consultation time
+    """
+    keys = sketch_keys(visit_type, symptom_severity)
+    if keys:
+        bucket = f"$[{histogram_bucket(minutes)}]"
+        initial = DurationSketch()
+        initial.add(minutes)
+        histogram = json.dumps(initial.histogram)
+
+        values = ", ".join(["(%s, %s, %s, 1, %s, %s)"] * len(keys))
+        upsert_query = f"""
+            INSERT INTO duration_sketches
+            (doctor_id, visit_type, symptom_severity, sample_count, total_minutes, histogram)
+            VALUES {values}
+            ON DUPLICATE KEY UPDATE
+                sample_count = sample_count + 1,
+                total_minutes = total_minutes + %s,
+                histogram = JSON_SET(histogram, %s, JSON_EXTRACT(histogram, %s) + 1)
+        """
+        params = [value for key in keys for value in (doctor_id, key[0], key[1], minutes, histogram)]
+        execute_query(upsert_query, tuple(params + [minutes, bucket, bucket]))
+
+    # The cached model also holds the doctor-wide sketch, which record_consultation moved
+
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.after_commit(lambda: sketch_cache.invalidate(doctor_id))
+    else:
+        sketch_cache.invalidate(doctor_id)
+
+
+def rebuild_duration_sketches(chunk_size=None):
+    """
+    Recompute duration_sketches from consultation_history in one pass
+
+    Visit type and severity come from the live entry, or from the archive
+    once the entry has been moved out.
+
+    Returns:
+        dict: doctor_id -> {(visit_type, severity): DurationSketch}
+    """
+    chunk_size = chunk_size or Config.STREAM_CHUNK_SIZE
+    sketches = {}
+    consultations = 0
+    for row in stream_consultation_kinds(chunk_size=chunk_size):
+        visit_type, severity = row['visit_type'], row['symptom_severity']
+        if visit_type is None:
+            archived = find_archived_entry(row['queue_id'], 'visit_type, symptom_severity')
+            if archived:
+                visit_type, severity = archived['visit_type'], archived['symptom_severity']
+        doctor_sketches = sketches.setdefault(row['doctor_id'], {})
+        for key in sketch_keys(visit_type, severity):
+            doctor_sketches.setdefault(key, DurationSketch()).add(row['actual_consultation_time'])
+        consultations += 1
+
+    replace_query = """
+        REPLACE INTO duration_sketches
+        (doctor_id, visit_type, symptom_severity, sample_count, total_minutes, histogram)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    with transaction():
+        execute_query("DELETE FROM duration_sketches")
+        for doctor_id, doctor_sketches in sketches.items():
+            for (visit_type, severity), sketch in doctor_sketches.items():
+                execute_query(replace_query, (
+                    doctor_id, visit_type, severity, sketch.count, sketch.total,
+                    json.dumps(sketch.histogram)
+                ))
+    sketch_cache.clear()
+
+    print(f"✅ Duration sketches rebuilt from {consultations} consultations "
+          f"for {len(sketches)} doctors")
+    return sketches
+
+
+def benchmark_eta_replay(doctors=20, consultations_per_doctor=2000, horizons=(2, 5, 10), seed=7):
+    """
+    Replay consultations in order and score both estimators on the real waits
+
+    Each doctor sees a synthetic stream of consultations whose
+    length depends on visit type and severity (lognormal, with occasional
+    complications). Before each consultation, the wait of the patient
+    k-1 places behind it is predicted from what was known at that moment:
+    the current estimator multiplies the running average by k-1, the
+    sketches sum the per-kind distributions of the actual patients ahead.
+
+    Returns:
+        dict: horizon -> {'average': {...}, 'sketch': {...}} with mean
+        absolute error of the point estimate and p90 coverage
+    """
+    import random
+
+    rng = random.Random(seed)
+    visit_types = {'Walk-in': 1.0, 'Appointment': 0.8, 'Follow-up': 0.55, 'Emergency': 1.7}
+    severities = {'Low': 0.8, 'Moderate': 1.0, 'High': 1.3, 'Critical': 1.6}
+
+    scores = {k: {'average': [0, 0, 0], 'sketch': [0, 0, 0]} for k in horizons}
+    for doctor_id in range(1, doctors + 1):
+        base = rng.uniform(8, 18)
+        stream = []
+        for _ in range(consultations_per_doctor):
+            visit_type = rng.choices(list(visit_types), weights=(5, 3, 3, 1))[0]
+            severity = rng.choices(list(severities), weights=(3, 5, 2, 1))[0]
+            minutes = base * visit_types[visit_type] * severities[severity] * rng.lognormvariate(0, 0.35)
+            if rng.random() < 0.05:
+                minutes *= 2.5
+            stream.append((visit_type, severity, max(1, int(round(minutes)))))
+
+        sketches = {}
+        overall = DurationSketch()
+        count = total = 0
+        for index, (visit_type, severity, minutes) in enumerate(stream):
+            if count >= Config.ETA_MIN_SAMPLES:
+                model = DoctorDurationModel(doctor_id, sketches, round(total / count), overall)
+                for k in horizons:
+                    ahead = stream[index:index + k - 1]
+                    if len(ahead) < k - 1:
+                        continue
+                    actual = sum(item[2] for item in ahead)
+                    average = (k - 1) * round(total / count)
+
+                    wait = WaitRange()
+                    for ahead_type, ahead_severity, _ in ahead:
+                        wait.add(model.duration(ahead_type, ahead_severity))
+                    p50, p90 = wait.minutes()
+
+                    for name, point, upper in (('average', average, average), ('sketch', p50, p90)):
+                        score = scores[k][name]
+                        score[0] += abs(point - actual)
+                        score[1] += actual <= upper
+                        score[2] += 1
+
+            count += 1
+            total += minutes
+            overall.add(minutes)
+            for key in sketch_keys(visit_type, severity):
+                sketches.setdefault(key, DurationSketch()).add(minutes)
+
+    results = {}
+    for k, by_estimator in scores.items():
+        results[k] = {
+            name: {
+                'mae_minutes': round(absolute / samples, 2),
+                'p90_coverage': round(covered / samples, 3),
+                'predictions': samples
+            }
+            for name, (absolute, covered, samples) in by_estimator.items()
+        }
+        average, sketch = results[k]['average'], results[k]['sketch']
+        print(f"position {k:>2}: average x (k-1) MAE {average['mae_minutes']:6.2f} min, "
+              f"covered {average['p90_coverage']:.1%} | sketch p50 MAE {sketch['mae_minutes']:6.2f} min, "
+              f"p90 covers {sketch['p90_coverage']:.1%}")
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'rebuild':
+        init_db()
+        rebuild_duration_sketches()
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'benchmark':
+        benchmark_eta_replay()
+    else:
+        print("Usage: python -m algorithms.duration_model rebuild | benchmark")
@@ -1,4 +1,92 @@
-def calculate_priority_score(patient_data):
+from config import Config
+import copy
+import json
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # vectorized scoring falls back to the scalar path
+    np = None
+
+# Scoring weights. calculate_priority_score and calculate_priority_scores
+# both read this table; load_priority_rules() swaps in a JSON rule file.
+DEFAULT_PRIORITY_RULES = {
+    # 1. Emergency Status (40 points)
+    'emergency_points': 40,
+    # 2. Symptom Severity (30 points)
+    'severity_points': {
+        'Critical': 30,
+        'High': 20,
+        'Moderate': 10,
+        'Low': 5
+    },
+    'default_severity': 'Moderate',
+    'unknown_severity_points': 10,
+    # 3. Age-based Priority (15 points), first matching band wins
+    'age_bands': [
+        {'min': 70, 'points': 15},
+        {'min': 60, 'points': 10},
+        {'max': 5, 'points': 12},
+        {'max': 12, 'points': 8}
+    ],
+    'default_age': 30,
+    # 4. Chronic Conditions (10 points)
+    'chronic_points': 10,
+    # 5. Visit Type (5 points)
+    'visit_type_points': {
+        'Emergency': 5,
+        'Follow-up': 3,
+        'Appointment': 2,
+        'Walk-in': 0
+    },
+    'default_visit_type': 'Walk-in',
+    'unknown_visit_type_points': 0,
+    'max_score': 100
+}
+
+_rules = copy.deepcopy(DEFAULT_PRIORITY_RULES)
+
+
+def load_priority_rules(path, activate=True):
+    """
+    Load scoring weights from a JSON rule file
+
+    Keys missing from the file keep their default values.
+
+    Args:
+        path (str): JSON file with any subset of DEFAULT_PRIORITY_RULES keys
+        activate (bool): Make these the rules used by default
+
+    Returns:
+        dict: The merged rule table
+    """
+    global _rules
+    with open(path, encoding='utf-8') as rule_file:
+        overrides = json.load(rule_file)
+
+    rules = copy.deepcopy(DEFAULT_PRIORITY_RULES)
+    rules.update(overrides)
+    if activate:
+        _rules = rules
+    return rules
+
+
+def get_priority_rules():
+    """Rule table currently used for scoring"""
+    return _rules
+
+
+def _age_points(age, rules):
+    for band in rules['age_bands']:
+        if 'min' in band and age >= band['min']:
+            return band['points']
+        if 'max' in band and age <= band['max']:
+            return band['points']
+    return 0
+
+
+def calculate_priority_score(patient_data, rules=None):
     """
     Calculate priority score (0-100, higher = more urgent)
     
@@ -10,50 +98,112 @@ def calculate_priority_score(patient_data):
             'has_chronic_condition': bool,
             'visit_type': str
         }
+        rules (dict): Rule table, defaults to the active rules
     
     Returns:
         float: priority_score
     """
+    rules = rules or _rules
     score = 0
     
-    # 1. Emergency Status (40 points)
+    # 1. Emergency Status
     if patient_data.get('is_emergency', False):
-        score += 40
+        score += rules['emergency_points']
     
-    # 2. Symptom Severity (30 points)
-    severity_mapping = {
-        'Critical': 30,
-        'High': 20,
-        'Moderate': 10,
-        'Low': 5
-    }
-    score += severity_mapping.get(patient_data.get('symptom_severity', 'Moderate'), 10)
-    
-    # 3. Age-based Priority (15 points)
-    age = patient_data.get('age', 30)
-    if age >= 70:
-        score += 15
-    elif age >= 60:
-        score += 10
-    elif age <= 5:
-        score += 12
-    elif age <= 12:
-        score += 8
+    # 2. Symptom Severity
+    score += rules['severity_points'].get(
+        patient_data.get('symptom_severity', rules['default_severity']),
+        rules['unknown_severity_points']
+    )
     
-    # 4. Chronic Conditions (10 points)
+    # 3. Age-based Priority
+    score += _age_points(patient_data.get('age', rules['default_age']), rules)
+    
+    # 4. Chronic Conditions
     if patient_data.get('has_chronic_condition', False):
-        score += 10
+        score += rules['chronic_points']
     
-    # 5. Visit Type (5 points)
-    visit_type_mapping = {
-        'Emergency': 5,
-        'Follow-up': 3,
-        'Appointment': 2,
-        'Walk-in': 0
+    # 5. Visit Type
+    score += rules['visit_type_points'].get(
+        patient_data.get('visit_type', rules['default_visit_type']),
+        rules['unknown_visit_type_points']
+    )
+    
+    return min(score, rules['max_score'])  # Cap at 100
+
+
+def _records_to_columns(records, rules):
+    """Turn a list of patient dicts into scoring columns"""
+    return {
+        'is_emergency': [bool(r.get('is_emergency', False)) for r in records],
+        'symptom_severity': [r.get('symptom_severity', rules['default_severity']) for r in records],
+        'age': [r.get('age', rules['default_age']) for r in records],
+        'has_chronic_condition': [bool(r.get('has_chronic_condition', False)) for r in records],
+        'visit_type': [r.get('visit_type', rules['default_visit_type']) for r in records]
     }
-    score += visit_type_mapping.get(patient_data.get('visit_type', 'Walk-in'), 0)
+
+
+def _lookup_points(values, mapping, unknown_points):
+    """Map a column of labels to points with one vectorized compare per rule"""
+    values = np.asarray(values)
+    points = np.full(values.shape, unknown_points, dtype=np.int64)
+    for label, label_points in mapping.items():
+        points[values == label] = label_points
+    return points
+
+
+def calculate_priority_scores(data, rules=None):
+    """
+    Score many patients in one vectorized pass
+    
+    Gives exactly the same results as calling calculate_priority_score
+    on every row.
     
-    return min(score, 100)  # Cap at 100
+    Args:
+        data: Either a list of patient dicts, or columns
+            {'is_emergency': array, 'symptom_severity': array, 'age': array,
+             'has_chronic_condition': array, 'visit_type': array}
+        rules (dict): Rule table, defaults to the active rules
+    
+    Returns:
+        numpy.ndarray (list without NumPy): priority scores in input order
+    """
+    rules = rules or _rules
+    
+    if np is None:
+        if isinstance(data, dict):
+            columns = list(data.keys())
+            data = [dict(zip(columns, row)) for row in zip(*data.values())]
+        return [calculate_priority_score(record, rules) for record in data]
+    
+    columns = _records_to_columns(data, rules) if not isinstance(data, dict) else data
+    
+    is_emergency = np.asarray(columns['is_emergency'], dtype=bool)
+    scores = np.where(is_emergency, rules['emergency_points'], 0).astype(np.int64)
+    
+    scores += _lookup_points(
+        columns['symptom_severity'], rules['severity_points'], rules['unknown_severity_points']
+    )
+    
+    age = np.asarray(columns['age'])
+    conditions = []
+    choices = []
+    for band in rules['age_bands']:
+        if 'min' in band:
+            conditions.append(age >= band['min'])
+        else:
+            conditions.append(age <= band['max'])
+        choices.append(band['points'])
+    scores += np.select(conditions, choices, default=0) if conditions else 0
+    
+    has_chronic = np.asarray(columns['has_chronic_condition'], dtype=bool)
+    scores += np.where(has_chronic, rules['chronic_points'], 0)
+    
+    scores += _lookup_points(
+        columns['visit_type'], rules['visit_type_points'], rules['unknown_visit_type_points']
+    )
+    
+    return np.minimum(scores, rules['max_score'])
 
 
 def test_priority_calculation():
@@ -87,6 +237,46 @@ def test_priority_calculation():
         score = calculate_priority_score(test['data'])
         print(f"{test['name']}: {score} (Expected: {test['expected']})")
 
+def benchmark_priority_scoring(sizes=(1_000, 100_000, 1_000_000)):
+    """Compare the scalar and vectorized scoring paths and check they agree"""
+    severities = list(DEFAULT_PRIORITY_RULES['severity_points'])
+    visit_types = list(DEFAULT_PRIORITY_RULES['visit_type_points'])
+    
+    for size in sizes:
+        records = [
+            {
+                'is_emergency': random.random() < 0.05,
+                'symptom_severity': random.choice(severities),
+                'age': random.randint(0, 95),
+                'has_chronic_condition': random.random() < 0.3,
+                'visit_type': random.choice(visit_types)
+            }
+            for _ in range(size)
+        ]
+        columns = {
+            name: np.asarray(column) if np is not None else column
+            for name, column in _records_to_columns(records, _rules).items()
+        }
+        
+        start = time.perf_counter()
+        scalar = [calculate_priority_score(record) for record in records]
+        scalar_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        vectorized = calculate_priority_scores(columns)
+        vector_time = time.perf_counter() - start
+        
+        matches = list(vectorized) == scalar
+        print(f"{size:>9,} rows: scalar {scalar_time * 1000:9.1f} ms, "
+              f"vectorized {vector_time * 1000:8.1f} ms "
+              f"({scalar_time / vector_time:5.1f}x), identical: {matches}")
+
+
+# Load site-specific weights if configured
+if Config.PRIORITY_RULES_PATH:
+    load_priority_rules(Config.PRIORITY_RULES_PATH)
+
 # Run test
 if __name__ == '__main__':
-    test_priority_calculation()
\ No newline at end of file
+    test_priority_calculation()
+    benchmark_priority_scoring()
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Queue commands shared by the sync (Flask) and async (Quart) routes
+
+Each builder returns a command for the doctor's executor
+(algorithms.queue_executor): command(batch) does the writes inside the
+batch transaction and returns finish(batch), which logs, publishes the
+deltas and returns the request's result once positions and wait ranges
+are known.
+"""
+from models.patient import patient_age, has_chronic_condition
+from models.doctor import set_doctor_status
+from models.queue_entries import insert_entry, get_entry_state, mark_in_progress, mark_completed
+from models.history import record_history, get_outcome_and_next_patient
+from models.event_sink import log_event
+from algorithms.priority import calculate_priority_score
+from algorithms.queue_manager import generate_token
+from algorithms.consultation_stats import record_consultation
+from algorithms.duration_model import record_duration
+from realtime import publish_queue_event
+from datetime import datetime
+
+CHECK_IN_REQUIRED_FIELDS = ['patient_id', 'department_id', 'visit_type']
+
+
+class QueueEntryNotFound(LookupError):
+    """The doctor has no queue entry with that queue_id"""
+
+
+class QueueEntryStateError(ValueError):
+    """The queue entry is not in the status the command needs"""
+
+
+def _require_entry(doctor_id, queue_id, status):
+    """Fail the command before any write unless the doctor's entry has this status"""
+    entry = get_entry_state(queue_id)
+    if entry is None or entry['doctor_id'] != doctor_id:
+        raise QueueEntryNotFound(f"Queue entry {queue_id} not found for doctor {doctor_id}")
+    if entry['status'] != status:
+        raise QueueEntryStateError(f"Queue entry {queue_id} is {entry['status']}, not {status}")
+
+
+def check_in_command(data, patient):
+    """
+    Check a patient in to data['doctor_id']
+
+    Args:
+        data (dict): Validated check-in (see POST /api/patient/checkin)
+        patient (dict): The patient's cached record
+
+    Returns:
+        callable: Command whose result is the check-in response body
+    """
+    age = patient_age(patient)
+    chronic_conditions = patient['chronic_conditions']
+    has_chronic = has_chronic_condition(patient)
+
+    # Calculate priority score
+    priority_data = {
+        'is_emergency': data.get('is_emergency', False),
+        'symptom_severity': data.get('symptom_severity', 'Moderate'),
+        'age': age,
+        'has_chronic_condition': has_chronic,
+        'visit_type': data['visit_type']
+    }
+    priority_score = calculate_priority_score(priority_data)
+
+    def check_in(batch):
+        # Generate token
+        token = generate_token(data['department_id'])
+
+        # Insert into queue
+        check_in_time = datetime.now().replace(microsecond=0)
+        queue_id = insert_entry({
+            'patient_id': data['patient_id'],
+            'doctor_id': data['doctor_id'],
+            'department_id': data['department_id'],
+            'token_number': token,
+            'visit_type': data['visit_type'],
+            'age': age,
+            'symptom_severity': data.get('symptom_severity', 'Moderate'),
+            'has_chronic_condition': has_chronic,
+            'is_emergency': data.get('is_emergency', False),
+            'priority_score': priority_score,
+            'check_in_time': check_in_time,
+            'notes': data.get('notes', '')
+        })
+
+        # Insert into the doctor's queue; the batch persists positions and
+        # refreshes wait ranges once for every check-in it holds
+        batch.add({
+            'queue_id': queue_id,
+            'priority_score': priority_score,
+            'check_in_time': check_in_time,
+            'is_emergency': data.get('is_emergency', False),
+            'visit_type': data['visit_type'],
+            'symptom_severity': data.get('symptom_severity', 'Moderate')
+        }, department_id=data['department_id'])
+
+        def finish(batch):
+            queue_position = batch.positions[queue_id]
+            wait_time, wait_p90 = batch.wait_ranges[queue_id]
+
+            # Log event (written in the background after commit)
+            log_event('Check-in', queue_id, data['doctor_id'], {
+                'department_id': data['department_id'],
+                'priority_score': float(priority_score),
+                'estimated_wait_time': wait_time
+            })
+
+            # Push delta to dashboards once committed (entries_moved follows per batch)
+            publish_queue_event('entry_added', data['doctor_id'], {
+                'entry': {
+                    'queue_id': queue_id,
+                    'token_number': token,
+                    'queue_position': queue_position,
+                    'priority_score': float(priority_score),
+                    'estimated_wait_time': wait_time,
+                    'symptom_severity': data.get('symptom_severity', 'Moderate'),
+                    'is_emergency': bool(data.get('is_emergency', False)),
+                    'notes': data.get('notes', ''),
+                    'first_name': patient['first_name'],
+                    'last_name': patient['last_name'],
+                    'age': age,
+                    'chronic_conditions': chronic_conditions
+                }
+            }, department_id=data['department_id'])
+
+            return {
+                'success': True,
+                'queue_id': queue_id,
+                'doctor_id': data['doctor_id'],
+                'token_number': token,
+                'priority_score': float(priority_score),
+                'queue_position': queue_position,
+                'estimated_wait_time': wait_time,
+                'wait_range': {'p50': wait_time, 'p90': wait_p90},
+                'message': f'Checked in successfully. Token: {token}'
+            }
+
+        return finish
+
+    return check_in
+
+
+def start_consultation_command(doctor_id, queue_id):
+    """
+    Call a waiting patient in; the command's result is None
+
+    Raises QueueEntryNotFound / QueueEntryStateError (nothing is written)
+    unless the entry is the doctor's and Waiting.
+    """
+    def start(batch):
+        _require_entry(doctor_id, queue_id, 'Waiting')
+
+        # Update queue entry
+        mark_in_progress(queue_id, doctor_id)
+
+        # Take the patient out of the waiting queue (wait times are
+        # recalculated once per batch)
+        batch.remove(queue_id)
+
+        # Update doctor status
+        set_doctor_status(doctor_id, 'Busy')
+
+        def finish(batch):
+            # Log event (written in the background after commit)
+            log_event('Consultation_Start', queue_id, doctor_id)
+
+            # Push delta to dashboards once committed (entries_moved follows per batch)
+            publish_queue_event('entry_called', doctor_id, {'queue_id': queue_id})
+
+        return finish
+
+    return start
+
+
+def end_consultation_command(doctor_id, queue_id, notes='', diagnosis=''):
+    """
+    Finish a consultation; the command's result is (consultation_time, next_patient)
+
+    Raises QueueEntryNotFound / QueueEntryStateError (nothing is written)
+    unless the entry is the doctor's and In_Progress.
+    """
+    def end(batch):
+        _require_entry(doctor_id, queue_id, 'In_Progress')
+
+        # Mark consultation complete
+        mark_completed(queue_id)
+
+        # Save to history, computing the actual consultation time in the same statement
+        history_id = record_history(queue_id, doctor_id, notes, diagnosis)
+
+        # Read back the consultation time together with the next patient, the
+        # head of the resident queue once earlier check-ins in the batch are placed
+        outcome = get_outcome_and_next_patient(history_id, queue_id, batch.next_queue_id())
+        actual_time = outcome['duration']
+        next_patient = outcome['next_patient']
+
+        # Update running stats, average consultation time and the wait-range
+        # sketches (O(1), no history scan)
+        if actual_time is not None:
+            record_consultation(doctor_id, actual_time)
+            record_duration(doctor_id, outcome['visit_type'], outcome['symptom_severity'], actual_time)
+
+        # Set doctor as available
+        set_doctor_status(doctor_id, 'Available')
+
+        # Log event (written in the background after commit)
+        log_event('Consultation_End', queue_id, doctor_id, {
+            'consultation_time': actual_time
+        })
+
+        # Push delta to dashboards once committed
+        publish_queue_event('entry_completed', doctor_id, {
+            'queue_id': queue_id,
+            'next_patient': next_patient
+        })
+
+        return lambda batch: (actual_time, next_patient)
+
+    return end
@@ -0,0 +1,314 @@
+"""
+Per-doctor queue command executor
+
+Every queue mutation for a doctor (check-in, start / end consultation)
+is submitted to that doctor's executor: one thread that applies the
+doctor's commands one batch at a time, so they never interleave on the
+same rows. Each doctor has their own executor, so different doctors
+still run in parallel.
+
+A batch is every command that arrived while the previous batch ran, plus,
+during a burst (more commands already waiting, or a previous batch of
+several), those arriving within QUEUE_BATCH_WINDOW_MS of the first; at
+most QUEUE_BATCH_MAX. A lone command runs right away. A batch runs in
+one transaction:
+
+    1. each command's own writes (insert the entry, mark in progress, ...)
+       and the queue changes it asks for (batch.add / batch.remove)
+    2. one positions write and one wait-range pass for the whole batch
+    3. each command's finish step (events, the result for its request)
+    4. one entries_moved delta
+
+so a burst of 10 check-ins costs one reorder and one ETA pass instead
+of ten. If a batch fails it is rolled back and its commands are retried
+one by one, so a bad command only fails its own request.
+
+Commands are functions command(batch) -> finish(batch) -> result. They
+must not be submitted from inside a transaction (the executor opens its
+own). A caller that stops waiting cancels its command only if it has not
+started; once its batch runs, the command commits and the caller waits
+for it (see wait_for_command).
+
+With several workers (Config.WORKERS > 1) each worker has its own
+executors, so a batch first takes the doctor's row lock
+(models.doctor.lock_doctor_queue): one doctor's batches then run one at
+a time across all workers, each on the queue reloaded under that lock.
+"""
+from models.database import current_unit_of_work, transaction
+from models.doctor import lock_doctor_queue
+from models.query_stats import counting_for, current_request_stats
+from algorithms.queue_manager import apply_queue_changes, get_doctor_queue, next_waiting
+from algorithms.wait_time import recalculate_wait_ranges
+from realtime import publish_queue_event, moved_entries
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from config import Config
+import asyncio
+import queue
+import threading
+import time
+
+
+class QueueCommandTimeout(TimeoutError):
+    """The command waited QUEUE_COMMAND_TIMEOUT without starting and was cancelled"""
+
+
+class QueueBatch:
+    """The commands of one batch share its transaction, positions and wait ranges"""
+
+    def __init__(self, doctor_id):
+        self.doctor_id = doctor_id
+        self.department_id = None
+        self.positions = {}          # queue_id -> position of each added entry
+        self.wait_ranges = {}        # queue_id -> (p50, p90), in queue order
+        self.changed = False
+        self._added = []             # pending until flush()
+        self._removed = []
+        self._added_ids = []
+
+    def add(self, entry, department_id=None):
+        """Insert a waiting patient once the batch settles (see add_to_queue)"""
+        self._added.append(entry)
+        self._added_ids.append(entry['queue_id'])
+        self.department_id = department_id or self.department_id
+        self.changed = True
+
+    def remove(self, queue_id):
+        """Take a patient out of the waiting queue once the batch settles"""
+        self._removed.append(queue_id)
+        self.changed = True
+
+    @property
+    def wait_times(self):
+        """queue_id -> median wait, in queue order"""
+        return {queue_id: p50 for queue_id, (p50, _) in self.wait_ranges.items()}
+
+    def flush(self):
+        """
+        Apply the queue changes asked for so far and persist their positions
+
+        For commands that read the queue order mid-batch (the next patient):
+        rows inserted by earlier check-ins have no position until then.
+        """
+        if self._added or self._removed:
+            apply_queue_changes(self.doctor_id, self._added, self._removed)
+            self._added, self._removed = [], []
+
+    def next_queue_id(self):
+        """queue_id at the head of the waiting queue after the changes so far"""
+        self.flush()
+        return next_waiting(self.doctor_id)
+
+    def settle(self):
+        """Persist positions and recompute wait ranges once for the whole batch"""
+        if not self.changed:
+            return
+        self.flush()
+        doctor_queue = get_doctor_queue(self.doctor_id)
+        self.positions = {queue_id: doctor_queue.position(queue_id) for queue_id in self._added_ids}
+        self.wait_ranges = recalculate_wait_ranges(self.doctor_id)
+
+
+class DoctorCommandExecutor:
+    """Single-writer command loop for one doctor's queue"""
+
+    def __init__(self, doctor_id):
+        self.doctor_id = doctor_id
+        self._commands = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_batch_size = 0
+        self.stats = {'commands': 0, 'batches': 0, 'largest_batch': 0, 'retried_batches': 0}
+
+    def submit(self, command):
+        """
+        Queue a command, returns a Future with its result
+
+        The submitting request's query counters travel with the command,
+        so the statements it runs on the executor count for that request.
+        """
+        future = Future()
+        future.request_stats = current_request_stats()
+        with self._lock:
+            self._commands.put((command, future))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'queue-executor-{self.doctor_id}', daemon=True
+                )
+                self._thread.start()
+        return future
+
+    def _next_batch(self):
+        """Block for the first command, then gather the rest of the batch"""
+        try:
+            first = self._commands.get(timeout=Config.QUEUE_EXECUTOR_IDLE_SECONDS)
+        except queue.Empty:
+            return []
+        commands = [first]
+        in_burst = self._last_batch_size > 1 or not self._commands.empty()
+        deadline = time.monotonic() + (Config.QUEUE_BATCH_WINDOW_MS / 1000 if in_burst else 0)
+        while len(commands) < Config.QUEUE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    commands.append(self._commands.get(timeout=remaining))
+                else:
+                    commands.append(self._commands.get_nowait())
+            except queue.Empty:
+                break
+        self._last_batch_size = len(commands)
+        return commands
+
+    def _run(self):
+        while True:
+            commands = self._next_batch()
+            if not commands:
+                with self._lock:
+                    if self._commands.empty():      # idle: let the thread go
+                        self._thread = None
+                        return
+                continue
+            # Drop commands whose caller gave up; the rest can no longer be cancelled
+            commands = [(command, future) for command, future in commands
+                        if future.set_running_or_notify_cancel()]
+            if not commands:
+                continue
+            self.stats['commands'] += len(commands)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(commands))
+            try:
+                self._execute(commands)
+            except Exception as err:
+                if len(commands) == 1:
+                    commands[0][1].set_exception(err)
+                    continue
+                # Isolate the failing command: retry each on its own
+                self.stats['retried_batches'] += 1
+                for command in commands:
+                    try:
+                        self._execute([command])
+                    except Exception as single_err:
+                        command[1].set_exception(single_err)
+
+    def _execute(self, commands):
+        committed = []
+        requests = [getattr(future, 'request_stats', None) for _, future in commands]
+        try:
+            # The batch's shared statements count for its first request
+            with counting_for(requests[0]), transaction() as uow:
+                uow.after_commit(lambda: committed.append(True))    # runs before the emits
+                if Config.WORKERS > 1:
+                    # Other workers' executors for this doctor wait here
+                    lock_doctor_queue(self.doctor_id)
+                batch = QueueBatch(self.doctor_id)
+                finishers = []
+                for (command, _), request in zip(commands, requests):
+                    with counting_for(request):
+                        finishers.append(command(batch))
+                batch.settle()
+                results = []
+                for finish, request in zip(finishers, requests):
+                    with counting_for(request):
+                        results.append(finish(batch))
+                if batch.changed:
+                    publish_queue_event('entries_moved', self.doctor_id, {
+                        'entries': moved_entries(batch.wait_times)
+                    }, department_id=batch.department_id)
+        except Exception as err:
+            if not committed:
+                raise
+            # Committed already: never retry, only the notification failed
+            print(f"⚠️ Queue executor {self.doctor_id}: after-commit step failed: {err}")
+        for (_, future), result in zip(commands, results):
+            future.set_result(result)
+
+
+_executors = {}              # doctor_id -> DoctorCommandExecutor
+_executors_lock = threading.Lock()
+
+
+def get_executor(doctor_id):
+    """The doctor's executor, created on first use"""
+    executor = _executors.get(doctor_id)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.setdefault(doctor_id, DoctorCommandExecutor(doctor_id))
+    return executor
+
+
+def run_queue_command(doctor_id, command):
+    """
+    Run a command on the doctor's executor and wait for its result
+
+    Args:
+        doctor_id (int): Doctor whose queue the command changes
+        command (callable): command(batch) -> finish(batch) -> result
+
+    Returns:
+        Whatever finish returned; exceptions raised by the command are re-raised here
+
+    Raises:
+        RuntimeError: If called inside a transaction
+    """
+    return wait_for_command(submit_queue_command(doctor_id, command))
+
+
+def wait_for_command(future, timeout=None):
+    """
+    A submitted command's result, cancelling it if it has not started in time
+
+    A command whose batch is already running will commit, so after the
+    timeout it is waited for rather than reported as failed (a retry would
+    check the patient in twice).
+
+    Args:
+        future (Future): From submit_queue_command
+        timeout (float): Seconds to wait for it to start (default: Config.QUEUE_COMMAND_TIMEOUT)
+
+    Raises:
+        QueueCommandTimeout: The command was cancelled before it ran
+    """
+    timeout = Config.QUEUE_COMMAND_TIMEOUT if timeout is None else timeout
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise QueueCommandTimeout(f"Queue busy: command not started within {timeout:g}s")
+        return future.result()
+
+
+def submit_queue_command(doctor_id, command):
+    """
+    Queue a command on the doctor's executor without waiting (see run_queue_command)
+
+    Returns:
+        Future: Resolves to the command's result
+
+    Raises:
+        RuntimeError: If called inside a transaction
+    """
+    if current_unit_of_work() is not None:
+        raise RuntimeError("Queue commands run in their own transaction; submit them outside one")
+    return get_executor(doctor_id).submit(command)
+
+
+async def run_queue_command_async(doctor_id, command):
+    """run_queue_command for the ASGI server: awaits the result without holding a thread"""
+    future = get_executor(doctor_id).submit(command)
+    result = asyncio.wrap_future(future)
+    try:
+        # shield: a timeout must not cancel a command that is already running
+        return await asyncio.wait_for(asyncio.shield(result), Config.QUEUE_COMMAND_TIMEOUT)
+    except asyncio.TimeoutError:
+        if future.cancel():
+            raise QueueCommandTimeout(
+                f"Queue busy: command not started within {Config.QUEUE_COMMAND_TIMEOUT:g}s"
+            )
+        return await result
+
+
+def executor_stats():
+    """Batching counters per doctor (for /api/admin/queue-executors)"""
+    return {
+        doctor_id: dict(executor.stats, pending=executor._commands.qsize())
+        for doctor_id, executor in sorted(_executors.items())
+    }
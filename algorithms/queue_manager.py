@@ -1,40 +1,200 @@
-from models.database import execute_query
+from models.database import execute_query, current_unit_of_work
+from models.queue import DoctorQueue
+from models.queue_entries import get_waiting_sort_keys, update_positions
+from models import queue_entries
+from models.department import get_department
 from algorithms.priority import calculate_priority_score
-from datetime import datetime
+from config import Config
+from datetime import datetime, timedelta
+import random
+import threading
+import time
+
+# Resident per-doctor queues, loaded lazily from the database
+_doctor_queues = {}
+_doctor_queues_lock = threading.Lock()
+
+
+def _load_doctor_queue(doctor_id):
+    """Build a DoctorQueue from the doctor's waiting rows"""
+    doctor_queue = DoctorQueue(doctor_id)
+    doctor_queue.load(get_waiting_sort_keys(doctor_id))
+    return doctor_queue
+
+
+def get_doctor_queue(doctor_id):
+    """
+    Get the resident queue for a doctor, loading it on first use
+
+    Readers outside the doctor's executor (the assignment projections) may
+    load it too: the first stored copy wins, so a late load never replaces
+    the queue the executor is already changing.
+    """
+    doctor_queue = _doctor_queues.get(doctor_id)
+    if doctor_queue is None:
+        loaded = _load_doctor_queue(doctor_id)
+        with _doctor_queues_lock:
+            doctor_queue = _doctor_queues.setdefault(doctor_id, loaded)
+    return doctor_queue
+
+
+def _queue_for_update(doctor_id):
+    """
+    The resident queue a mutation should start from
+
+    With several workers (Config.WORKERS > 1) another process may have
+    changed the queue before its delta reached this one, so the queue is
+    reloaded first (one indexed read).
+    """
+    if Config.WORKERS > 1:
+        doctor_queue = _load_doctor_queue(doctor_id)
+        with _doctor_queues_lock:
+            _doctor_queues[doctor_id] = doctor_queue
+    return get_doctor_queue(doctor_id)
+
+
+def drop_doctor_queue(doctor_id):
+    """Forget the resident queue so the next access reloads it"""
+    with _doctor_queues_lock:
+        _doctor_queues.pop(doctor_id, None)
+
+
+def persist_positions(doctor_queue):
+    """
+    Write moved queue positions to the database in a single UPDATE
+
+    Args:
+        doctor_queue (DoctorQueue): Resident queue
+
+    Returns:
+        list: [(queue_id, position), ...] that were written
+    """
+    changes = doctor_queue.changed_positions()
+    update_positions(changes)
+    doctor_queue.mark_persisted(changes)
+    return changes
+
+
+def _reload_on_rollback(doctor_id):
+    """Drop the resident queue if the surrounding transaction rolls back"""
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.on_rollback(lambda: drop_doctor_queue(doctor_id))
+
+
+def add_to_queue(doctor_id, entry):
+    """
+    Insert a new waiting patient into the doctor's queue
+
+    Args:
+        doctor_id (int): Doctor's ID
+        entry (dict): queue_id, priority_score, check_in_time, is_emergency,
+            and visit_type / symptom_severity for the wait ranges
+
+    Returns:
+        int: Patient's queue position
+    """
+    doctor_queue = _queue_for_update(doctor_id)
+    _reload_on_rollback(doctor_id)
+    doctor_queue.add(entry)
+    persist_positions(doctor_queue)
+    return doctor_queue.position(entry['queue_id'])
+
+
+def apply_queue_changes(doctor_id, added=(), removed=()):
+    """
+    Apply several insertions and removals, then persist positions once
+
+    Args:
+        doctor_id (int): Doctor's ID
+        added (list): Entries to insert (see add_to_queue)
+        removed (list): queue_ids leaving the waiting queue
+
+    Returns:
+        dict: queue_id -> queue position of each added entry
+    """
+    doctor_queue = _queue_for_update(doctor_id)
+    _reload_on_rollback(doctor_id)
+    for entry in added:
+        doctor_queue.add(entry)
+    for queue_id in removed:
+        doctor_queue.remove(queue_id)
+    persist_positions(doctor_queue)
+    return {entry['queue_id']: doctor_queue.position(entry['queue_id']) for entry in added}
+
+
+def next_waiting(doctor_id):
+    """queue_id at the head of the doctor's waiting queue, or None if empty"""
+    return _queue_for_update(doctor_id).peek()
+
+
+def remove_from_queue(doctor_id, queue_id):
+    """Remove a patient from the waiting queue and close the gap"""
+    doctor_queue = _queue_for_update(doctor_id)
+    _reload_on_rollback(doctor_id)
+    if doctor_queue.remove(queue_id):
+        persist_positions(doctor_queue)
+
 
 def reorder_queue(doctor_id):
     """
     Reorder waiting patients for a specific doctor
-    
+
+    Reloads the doctor's waiting rows, rebuilds the resident queue
+    and writes only the positions that changed.
+
     Args:
         doctor_id (int): Doctor's ID
     
     Returns:
-        list: Updated queue
+        list: Waiting queue_ids in service order
     """
-    # Get all waiting patients
-    query = """
-        SELECT queue_id, priority_score, check_in_time, is_emergency
-        FROM queue_entries
-        WHERE doctor_id = %s AND status = 'Waiting'
-        ORDER BY is_emergency DESC, 
-                 priority_score DESC, 
-                 check_in_time ASC
+    doctor_queue = _load_doctor_queue(doctor_id)
+    _doctor_queues[doctor_id] = doctor_queue
+    changes = persist_positions(doctor_queue)
+
+    print(f"✅ Queue reordered for Doctor {doctor_id}: {len(doctor_queue)} patients, {len(changes)} moved")
+    return doctor_queue.queue_ids()
+
+
+def get_department_code(department_id):
+    """Get a department's token prefix from the reference cache"""
+    dept = get_department(department_id)
+    
+    if not dept:
+        raise ValueError(f"Department {department_id} not found")
+    
+    return dept['department_code']
+
+
+def allocate_token_numbers(department_id, count=1):
     """
+    Atomically reserve the next token numbers for today
     
-    waiting_patients = execute_query(query, (doctor_id,), fetch=True)
+    Uses one counter row per department per day. The row lock taken by
+    the upsert serializes concurrent check-ins, so numbers are never
+    handed out twice.
     
-    # Assign new positions
-    for position, patient in enumerate(waiting_patients, start=1):
-        update_query = """
-            UPDATE queue_entries
-            SET queue_position = %s, updated_at = NOW()
-            WHERE queue_id = %s
-        """
-        execute_query(update_query, (position, patient['queue_id']))
+    Args:
+        department_id (int): Department ID
+        count (int): How many consecutive numbers to reserve
     
-    print(f"✅ Queue reordered for Doctor {doctor_id}: {len(waiting_patients)} patients")
-    return waiting_patients
+    Returns:
+        int: First reserved number
+    """
+    sequence_query = """
+        INSERT INTO token_sequences (department_id, sequence_date, last_value)
+        VALUES (%s, CURDATE(), LAST_INSERT_ID(%s))
+        ON DUPLICATE KEY UPDATE last_value = LAST_INSERT_ID(last_value + %s)
+    """
+    # LAST_INSERT_ID(expr) makes the new counter value the statement's lastrowid
+    last_value = execute_query(sequence_query, (department_id, count, count))
+    return last_value - count + 1
+
+
+def format_token(dept_code, number):
+    """Format: CARD-001, CARD-002, etc."""
+    return f"{dept_code}-{str(number).zfill(3)}"
 
 
 def generate_token(department_id):
@@ -47,32 +207,59 @@ def generate_token(department_id):
     Returns:
         str: Token number
     """
-    # Get department code
-    dept_query = "SELECT department_code FROM departments WHERE department_id = %s"
-    dept = execute_query(dept_query, (department_id,), fetch=True)
-    
-    if not dept:
-        raise ValueError(f"Department {department_id} not found")
-    
-    dept_code = dept[0]['department_code']
-    
-    # Count today's patients for this department
-    count_query = """
-        SELECT COUNT(*) as cnt 
-        FROM queue_entries
-        WHERE department_id = %s 
-        AND DATE(check_in_time) = CURDATE()
-    """
-    count_result = execute_query(count_query, (department_id,), fetch=True)
-    count = count_result[0]['cnt'] if count_result else 0
-    
-    # Format: CARD-001, CARD-002, etc.
-    token = f"{dept_code}-{str(count + 1).zfill(3)}"
-    return token
+    dept_code = get_department_code(department_id)
+    return format_token(dept_code, allocate_token_numbers(department_id))
 
 
 def get_queue_position(queue_id):
     """Get current queue position for a patient"""
-    query = "SELECT queue_position FROM queue_entries WHERE queue_id = %s"
-    result = execute_query(query, (queue_id,), fetch=True)
-    return result[0]['queue_position'] if result else None
\ No newline at end of file
+    return queue_entries.get_queue_position(queue_id)
+
+
+def benchmark_check_in(depths=(10, 60, 250, 1000), runs=200):
+    """
+    Benchmark in-memory check-in cost as queue depth grows
+
+    Each run inserts one patient into a queue of the given depth and
+    computes the positions that would be written. The DB cost is a
+    single batched UPDATE regardless of depth.
+    """
+    base_time = datetime.now()
+    for depth in depths:
+        doctor_queue = DoctorQueue(doctor_id=0)
+        doctor_queue.load([
+            {
+                'queue_id': i,
+                'priority_score': random.choice([10, 15, 25, 35, 60]),
+                'check_in_time': base_time + timedelta(seconds=i),
+                'is_emergency': False,
+                'queue_position': None
+            }
+            for i in range(depth)
+        ])
+        doctor_queue.mark_persisted(doctor_queue.changed_positions())
+
+        moved = 0
+        start = time.perf_counter()
+        for run in range(runs):
+            queue_id = depth + run
+            doctor_queue.add({
+                'queue_id': queue_id,
+                'priority_score': random.choice([10, 15, 25, 35, 60]),
+                'check_in_time': base_time + timedelta(seconds=queue_id),
+                'is_emergency': False
+            })
+            changes = doctor_queue.changed_positions()
+            doctor_queue.mark_persisted(changes)
+            moved += len(changes)
+            doctor_queue.remove(queue_id)
+            doctor_queue.mark_persisted(doctor_queue.changed_positions())
+        elapsed_us = (time.perf_counter() - start) / runs * 1e6
+
+        print(f"depth={depth:5d}: {elapsed_us:8.1f} µs/check-in, "
+              f"{moved / runs:6.1f} rows moved, 1 UPDATE statement")
+
+
+# Run benchmark
+if __name__ == '__main__':
+    benchmark_check_in()
\ No newline at end of file
@@ -0,0 +1,389 @@
+"""
+Hourly operations rollups per doctor (and so per department / hospital)
+
+Check-ins, consultations, no-shows, waits and consultation durations are
+folded into ops_rollups / ops_rollup_minutes as the event sink writes
+system_events, so analytics never scan the raw tables. Counters are
+upserted with in-database arithmetic, which keeps concurrent workers from
+losing updates. Percentiles come from the per-minute histograms.
+
+A consultation's wait is attributed to the hour it started, its duration
+to the hour it ended, and a no-show (checked in, never called) to its
+check-in hour once the day is closed.
+
+Usage:
+    python -m algorithms.rollups backfill          # rebuild from history, one pass
+    python -m algorithms.rollups close-day [YYYY-MM-DD]
+"""
+from models.database import execute_query, execute_many, init_db, transaction
+from models.event_sink import event_sink, stream_events
+from models.archive import find_archived_entry, partitions_for_time
+from models.doctor import get_doctor
+from algorithms.consultation_stats import histogram_quantile
+from config import Config
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import json
+import sys
+import threading
+
+# Waits / durations above this land in the last histogram bucket
+MAX_MINUTES = 720
+
+# Check-in times remembered for the wait calculation (recent entries)
+_check_in_times = OrderedDict()
+_check_in_lock = threading.Lock()
+CHECK_IN_MEMORY = 100000
+
+COUNTERS = ('check_ins', 'consultations', 'wait_count', 'wait_minutes',
+            'duration_count', 'duration_minutes')
+
+
+def bucket_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _parse_time(value):
+    # Spilled and replayed events carry their timestamp as a string
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class RollupDelta:
+    """Counter and histogram increments gathered from a batch of events"""
+
+    def __init__(self):
+        self.counters = {}      # (hour, doctor_id) -> {'department_id', counter: n}
+        self.minutes = {}       # (hour, doctor_id, metric, minutes) -> [department_id, count]
+
+    def _row(self, moment, doctor_id, department_id):
+        key = (bucket_hour(moment), doctor_id)
+        row = self.counters.get(key)
+        if row is None:
+            row = self.counters[key] = dict.fromkeys(COUNTERS, 0)
+            row['department_id'] = department_id
+        return row
+
+    def _observe(self, moment, doctor_id, department_id, metric, minutes):
+        minutes = min(max(int(minutes), 0), MAX_MINUTES)
+        key = (bucket_hour(moment), doctor_id, metric, minutes)
+        entry = self.minutes.setdefault(key, [department_id, 0])
+        entry[1] += 1
+        return minutes
+
+    def add_check_in(self, moment, doctor_id, department_id):
+        self._row(moment, doctor_id, department_id)['check_ins'] += 1
+
+    def add_wait(self, moment, doctor_id, department_id, minutes):
+        row = self._row(moment, doctor_id, department_id)
+        row['wait_count'] += 1
+        row['wait_minutes'] += self._observe(moment, doctor_id, department_id, 'wait', minutes)
+
+    def add_consultation(self, moment, doctor_id, department_id, minutes):
+        row = self._row(moment, doctor_id, department_id)
+        row['consultations'] += 1
+        if minutes is not None:
+            row['duration_count'] += 1
+            row['duration_minutes'] += self._observe(moment, doctor_id, department_id, 'duration', minutes)
+
+    def write(self):
+        """Add the increments to the rollup tables (one transaction)"""
+        counter_query = """
+            INSERT INTO ops_rollups
+            (bucket_hour, doctor_id, department_id, check_ins, consultations,
+             wait_count, wait_minutes, duration_count, duration_minutes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                check_ins = check_ins + %s,
+                consultations = consultations + %s,
+                wait_count = wait_count + %s,
+                wait_minutes = wait_minutes + %s,
+                duration_count = duration_count + %s,
+                duration_minutes = duration_minutes + %s
+        """
+        minutes_query = """
+            INSERT INTO ops_rollup_minutes
+            (bucket_hour, doctor_id, department_id, metric, minutes, count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE count = count + %s
+        """
+        with transaction():
+            for (hour, doctor_id), row in self.counters.items():
+                values = [row[name] for name in COUNTERS]
+                execute_query(counter_query, (hour, doctor_id, row['department_id'], *values, *values))
+            for (hour, doctor_id, metric, minutes), (department_id, count) in self.minutes.items():
+                execute_query(minutes_query, (hour, doctor_id, department_id, metric, minutes, count, count))
+
+    def write_fresh(self):
+        """Insert into empty rollup tables with multi-row INSERTs (backfill)"""
+        execute_many("""
+            INSERT INTO ops_rollups
+            (bucket_hour, doctor_id, department_id, check_ins, consultations,
+             wait_count, wait_minutes, duration_count, duration_minutes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [
+            (hour, doctor_id, row['department_id'], *[row[name] for name in COUNTERS])
+            for (hour, doctor_id), row in self.counters.items()
+        ])
+        execute_many("""
+            INSERT INTO ops_rollup_minutes
+            (bucket_hour, doctor_id, department_id, metric, minutes, count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [
+            (hour, doctor_id, department_id, metric, minutes, count)
+            for (hour, doctor_id, metric, minutes), (department_id, count) in self.minutes.items()
+        ])
+
+
+def _doctor_department(doctor_id):
+    doctor = get_doctor(doctor_id)
+    return doctor['department_id'] if doctor else None
+
+
+def _remember_check_in(queue_id, moment):
+    with _check_in_lock:
+        _check_in_times[queue_id] = moment
+        if len(_check_in_times) > CHECK_IN_MEMORY:
+            _check_in_times.popitem(last=False)
+
+
+def _lookup_check_ins(queue_ids):
+    """Check-in times not seen as events (restart, backfill order), from the entries"""
+    found = {}
+    with _check_in_lock:
+        for queue_id in queue_ids:
+            if queue_id in _check_in_times:
+                found[queue_id] = _check_in_times.pop(queue_id)
+    missing = [queue_id for queue_id in queue_ids if queue_id not in found]
+    if missing:
+        placeholders = ", ".join(["%s"] * len(missing))
+        rows = execute_query(
+            f"SELECT queue_id, check_in_time FROM queue_entries WHERE queue_id IN ({placeholders})",
+            tuple(missing), fetch=True
+        )
+        found.update({row['queue_id']: row['check_in_time'] for row in rows})
+        for queue_id in missing:
+            if queue_id not in found:
+                archived = find_archived_entry(queue_id, 'check_in_time')
+                if archived:
+                    found[queue_id] = archived['check_in_time']
+    return found
+
+
+def fold_events(rows, delta=None):
+    """
+    Fold written events into a RollupDelta
+
+    Args:
+        rows (list): (event_type, queue_id, doctor_id, event_data_json, timestamp)
+        delta (RollupDelta): Accumulate into this one (default: a new one)
+    """
+    delta = delta or RollupDelta()
+    starts = []
+    for event_type, queue_id, doctor_id, event_data, timestamp in rows:
+        if doctor_id is None:
+            continue
+        timestamp = _parse_time(timestamp)
+        data = json.loads(event_data) if isinstance(event_data, (str, bytes)) else (event_data or {})
+
+        if event_type == 'Check-in':
+            delta.add_check_in(timestamp, doctor_id, data.get('department_id') or _doctor_department(doctor_id))
+            if queue_id is not None:
+                _remember_check_in(queue_id, timestamp)
+        elif event_type == 'Consultation_Start' and queue_id is not None:
+            starts.append((queue_id, doctor_id, timestamp))
+        elif event_type == 'Consultation_End':
+            delta.add_consultation(timestamp, doctor_id, _doctor_department(doctor_id),
+                                   data.get('consultation_time'))
+
+    if starts:
+        check_ins = _lookup_check_ins([queue_id for queue_id, _, _ in starts])
+        for queue_id, doctor_id, timestamp in starts:
+            check_in = _parse_time(check_ins.get(queue_id))
+            if check_in is not None:
+                minutes = (timestamp - check_in).total_seconds() / 60
+                delta.add_wait(timestamp, doctor_id, _doctor_department(doctor_id), minutes)
+    return delta
+
+
+def apply_events(rows):
+    """Event sink listener: add a written batch to the rollups"""
+    delta = fold_events(rows)
+    if delta.counters:
+        delta.write()
+
+
+event_sink.add_listener(apply_events)
+
+
+def close_day(day):
+    """
+    Record no-shows for a finished day: entries still waiting (or cancelled)
+
+    Idempotent, the counts are set rather than added.
+
+    Returns:
+        int: No-shows recorded
+    """
+    start = datetime(day.year, day.month, day.day)
+    return settle_no_shows(start, start + timedelta(days=1))
+
+
+def settle_no_shows(start, end):
+    """
+    Set no_shows for every hour in [start, end) from the queue entries
+
+    Entries the archival has moved out are counted from the archive
+    partitions covering the range.
+    """
+    counts = {}
+    rows = []
+    for table in ['queue_entries'] + partitions_for_time('queue_entries', start, end):
+        rows += execute_query(f"""
+            SELECT doctor_id, department_id, check_in_time
+            FROM {table}
+            WHERE check_in_time >= %s AND check_in_time < %s
+              AND status IN ('Waiting', 'Cancelled')
+        """, (start, end), fetch=True)
+    for row in rows:
+        key = (bucket_hour(row['check_in_time']), row['doctor_id'])
+        department_id, count = counts.get(key, (row['department_id'], 0))
+        counts[key] = (department_id, count + 1)
+
+    upsert_query = """
+        INSERT INTO ops_rollups (bucket_hour, doctor_id, department_id, no_shows)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE no_shows = %s
+    """
+    with transaction():
+        for (hour, doctor_id), (department_id, count) in counts.items():
+            execute_query(upsert_query, (hour, doctor_id, department_id, count, count))
+    return sum(count for _, count in counts.values())
+
+
+def backfill_rollups(chunk_size=None):
+    """
+    Rebuild the rollups from system_events (live and archived) in one pass
+
+    Events are streamed from a server-side cursor and folded in memory,
+    which is bounded by hours x doctors, not by the number of events.
+
+    Returns:
+        dict: {'events', 'hours', 'no_shows'}
+    """
+    chunk_size = chunk_size or Config.STREAM_CHUNK_SIZE
+    delta = RollupDelta()
+    events = 0
+    first = None
+    chunk = []
+
+    for row in stream_events(chunk_size=chunk_size):
+        chunk.append((row['event_type'], row['queue_id'], row['doctor_id'],
+                      row['event_data'], row['timestamp']))
+        first = min(first, row['timestamp']) if first else row['timestamp']
+        if len(chunk) >= chunk_size:
+            fold_events(chunk, delta)
+            events += len(chunk)
+            chunk = []
+    if chunk:
+        fold_events(chunk, delta)
+        events += len(chunk)
+
+    with transaction():
+        execute_query("DELETE FROM ops_rollups")
+        execute_query("DELETE FROM ops_rollup_minutes")
+        delta.write_fresh()
+
+    no_shows = 0
+    if first is not None:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        no_shows = settle_no_shows(bucket_hour(first), today)
+
+    print(f"✅ Rollups rebuilt from {events} events: {len(delta.counters)} doctor-hours, "
+          f"{no_shows} no-shows")
+    return {'events': events, 'hours': len(delta.counters), 'no_shows': no_shows}
+
+
+def _group_key(row, group_by):
+    if group_by == 'hour':
+        return row['bucket_hour']
+    if group_by == 'doctor':
+        return row['doctor_id']
+    if group_by == 'department':
+        return row['department_id']
+    return 'total'
+
+
+def _summary(counters, histograms):
+    """Counters plus mean / p50 / p90 for one group"""
+    summary = {name: counters.get(name, 0) for name in ('check_ins', 'consultations', 'no_shows')}
+    for metric in ('wait', 'duration'):
+        count = counters.get(f'{metric}_count', 0)
+        histogram = histograms.get(metric)
+        summary[f'mean_{metric}_minutes'] = round(counters[f'{metric}_minutes'] / count, 2) if count else None
+        summary[f'p50_{metric}_minutes'] = histogram_quantile(histogram, 0.5) if histogram else None
+        summary[f'p90_{metric}_minutes'] = histogram_quantile(histogram, 0.9) if histogram else None
+    return summary
+
+
+def query_rollups(start, end, doctor_id=None, department_id=None, group_by='hour'):
+    """
+    Aggregate the rollups over [start, end)
+
+    Args:
+        start, end (datetime): Range, hour-aligned in effect
+        doctor_id (int): Only this doctor
+        department_id (int): Only this department
+        group_by (str): 'hour', 'doctor', 'department' or 'total'
+
+    Returns:
+        list: [{'key': ..., 'check_ins', 'consultations', 'no_shows',
+                'mean/p50/p90_wait_minutes', 'mean/p50/p90_duration_minutes'}, ...]
+    """
+    conditions, params = ["bucket_hour >= %s", "bucket_hour < %s"], [start, end]
+    if doctor_id is not None:
+        conditions.insert(0, "doctor_id = %s")
+        params.insert(0, doctor_id)
+    if department_id is not None:
+        conditions.insert(0, "department_id = %s")
+        params.insert(0, department_id)
+    where = " AND ".join(conditions)
+
+    counter_rows = execute_query(f"""
+        SELECT bucket_hour, doctor_id, department_id, check_ins, consultations, no_shows,
+               wait_count, wait_minutes, duration_count, duration_minutes
+        FROM ops_rollups
+        WHERE {where}
+    """, tuple(params), fetch=True)
+    minute_rows = execute_query(f"""
+        SELECT bucket_hour, doctor_id, department_id, metric, minutes, count
+        FROM ops_rollup_minutes
+        WHERE {where}
+    """, tuple(params), fetch=True)
+
+    groups = {}
+    for row in counter_rows:
+        counters, _ = groups.setdefault(_group_key(row, group_by), ({}, {}))
+        for name in COUNTERS + ('no_shows',):
+            counters[name] = counters.get(name, 0) + row[name]
+    for row in minute_rows:
+        _, histograms = groups.setdefault(_group_key(row, group_by), ({}, {}))
+        histogram = histograms.setdefault(row['metric'], [0] * (MAX_MINUTES + 1))
+        histogram[row['minutes']] += row['count']
+
+    return [
+        dict(_summary(dict.fromkeys(COUNTERS + ('no_shows',), 0) | counters, histograms), key=key)
+        for key, (counters, histograms) in sorted(groups.items(), key=lambda item: (item[0] is None, item[0]))
+    ]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'backfill':
+        init_db()
+        backfill_rollups()
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'close-day':
+        init_db()
+        day = (datetime.strptime(sys.argv[2], '%Y-%m-%d') if len(sys.argv) > 2
+               else datetime.now() - timedelta(days=1))
+        print(f"✅ {close_day(day)} no-shows recorded for {day:%Y-%m-%d}")
+    else:
+        print("Usage: python -m algorithms.rollups backfill | close-day [YYYY-MM-DD]")
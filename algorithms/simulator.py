@@ -0,0 +1,360 @@
+"""
+Discrete-event simulator for an OPD day
+
+Drives the production scoring (calculate_priority_score), ordering
+(models.queue.DoctorQueue), wait estimation (wait_time_for_position) and
+doctor assignment (algorithms.assignment.DoctorAssignmentHeap) in memory,
+without MySQL, and reports how they behave under load.
+
+Usage:
+    python -m algorithms.simulator --doctors 50 --patients 5000 --arrivals bursty
+    python -m algorithms.simulator --arrivals replay --replay-date 2024-03-01
+    python -m algorithms.simulator --arrivals bursty --compare-assignment
+"""
+from models.queue import DoctorQueue
+from algorithms.priority import calculate_priority_score
+from algorithms.wait_time import wait_time_for_position
+from algorithms.assignment import DoctorAssignmentHeap
+from datetime import date, datetime, timedelta
+import argparse
+import heapq
+import math
+import random
+import time
+
+ARRIVAL_PROCESSES = ('poisson', 'bursty', 'replay')
+
+# fixed: the patient keeps the doctor drawn at arrival (the front desk's pick);
+# least_wait: the department's doctor projected to be free first
+ASSIGNMENT_POLICIES = ('fixed', 'least_wait')
+
+SEVERITY_WEIGHTS = {'Low': 0.3, 'Moderate': 0.45, 'High': 0.2, 'Critical': 0.05}
+VISIT_TYPE_WEIGHTS = {'Walk-in': 0.5, 'Appointment': 0.3, 'Follow-up': 0.2}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list (q in [0, 100])"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def poisson_arrivals(patients, day_minutes, rng):
+    """Homogeneous Poisson process: given N arrivals, times are uniform order statistics"""
+    return sorted(rng.uniform(0, day_minutes) for _ in range(patients))
+
+
+def bursty_arrivals(patients, day_minutes, rng, bursts=((30, 20, 0.35), (240, 30, 0.15))):
+    """
+    Morning-peak arrivals: a uniform background plus Gaussian bursts
+
+    Args:
+        bursts: (center_minute, spread_minutes, share_of_patients) per burst
+    """
+    times = []
+    for _ in range(patients):
+        pick = rng.random()
+        for center, spread, share in bursts:
+            if pick < share:
+                times.append(min(max(rng.gauss(center, spread), 0), day_minutes))
+                break
+            pick -= share
+        else:
+            times.append(rng.uniform(0, day_minutes))
+    return sorted(times)
+
+
+def replay_arrivals(replay_date):
+    """
+    Check-in times and doctors from system_events for one day (needs the DB)
+
+    Returns:
+        list: [(minute_of_day, doctor_id), ...]
+    """
+    from models.database import init_db
+    from models.event_sink import get_events
+
+    init_db()
+    day = date.fromisoformat(replay_date)
+    rows = get_events('Check-in', day, day + timedelta(days=1))
+    if not rows:
+        return []
+    first = rows[0]['timestamp']
+    return [((row['timestamp'] - first).total_seconds() / 60, row['doctor_id']) for row in rows]
+
+
+def random_patient(rng, emergency_rate):
+    """Patient attributes for scoring"""
+    is_emergency = rng.random() < emergency_rate
+    severity = 'Critical' if is_emergency else rng.choices(
+        list(SEVERITY_WEIGHTS), weights=list(SEVERITY_WEIGHTS.values()))[0]
+    visit_type = 'Emergency' if is_emergency else rng.choices(
+        list(VISIT_TYPE_WEIGHTS), weights=list(VISIT_TYPE_WEIGHTS.values()))[0]
+    return {
+        'is_emergency': is_emergency,
+        'symptom_severity': severity,
+        'age': rng.randint(0, 90),
+        'has_chronic_condition': rng.random() < 0.3,
+        'visit_type': visit_type
+    }
+
+
+class SimulatedDoctor:
+    """Queue, running average and in-progress consultation for one doctor"""
+
+    def __init__(self, doctor_id, mean_minutes, initial_average=10):
+        self.doctor_id = doctor_id
+        self.queue = DoctorQueue(doctor_id)
+        self.mean_minutes = mean_minutes        # true (hidden) consultation pace
+        self.average_time = initial_average     # what the estimator sees
+        self.completed = 0
+        self.total_minutes = 0
+        self.current = None
+        self.consultation_start = None
+        self.current_end = None                 # projected, from average_time
+
+    def projected_free(self, minute):
+        """Same projection as the production scheduler, in simulated minutes"""
+        start = max(minute, self.current_end if self.current is not None else minute)
+        return start + len(self.queue) * self.average_time
+
+    def record(self, minutes):
+        """Same running mean the stats row feeds into average_consultation_time"""
+        self.completed += 1
+        self.total_minutes += minutes
+        self.average_time = round(self.total_minutes / self.completed)
+
+
+def simulate_day(doctors=50, patients=5000, arrivals='poisson', day_minutes=480,
+                 emergency_rate=0.03, duration_sigma=0.5, seed=None, replay_date=None,
+                 sample_every=15, departments=10, assignment='fixed'):
+    """
+    Simulate one OPD day
+
+    Args:
+        doctors (int): Number of doctors (ignored for replay, which uses the logged doctors)
+        patients (int): Number of arrivals (ignored for replay)
+        arrivals (str): 'poisson', 'bursty' or 'replay'
+        day_minutes (int): Length of the check-in window
+        emergency_rate (float): Share of arrivals injected as emergencies
+        duration_sigma (float): Lognormal sigma of consultation times
+        seed (int): Random seed for reproducible runs
+        replay_date (str): YYYY-MM-DD to replay from system_events
+        sample_every (int): Queue-depth sampling interval in minutes
+        departments (int): Doctors are spread over this many departments
+        assignment (str): 'fixed' or 'least_wait' (see ASSIGNMENT_POLICIES)
+
+    Returns:
+        dict: Wait-time percentiles, ETA error, queue depth timeline, events/sec
+    """
+    if arrivals not in ARRIVAL_PROCESSES:
+        raise ValueError(f"arrivals must be one of {ARRIVAL_PROCESSES}")
+    if assignment not in ASSIGNMENT_POLICIES:
+        raise ValueError(f"assignment must be one of {ASSIGNMENT_POLICIES}")
+
+    rng = random.Random(seed)
+    wall_start = time.perf_counter()
+
+    if arrivals == 'replay':
+        schedule = replay_arrivals(replay_date)
+        doctor_ids = sorted({doctor_id for _, doctor_id in schedule})
+    else:
+        times = (poisson_arrivals if arrivals == 'poisson' else bursty_arrivals)(
+            patients, day_minutes, rng)
+        doctor_ids = list(range(1, doctors + 1))
+        schedule = [(minute, rng.choice(doctor_ids)) for minute in times]
+
+    staff = {
+        doctor_id: SimulatedDoctor(doctor_id, mean_minutes=rng.uniform(6, 15))
+        for doctor_id in doctor_ids
+    }
+    base_time = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+
+    # One assignment heap per department, fed on every queue change
+    department_of = {doctor_id: index % departments for index, doctor_id in enumerate(doctor_ids)}
+    heaps = {}
+    for doctor_id in doctor_ids:
+        heaps.setdefault(department_of[doctor_id], DoctorAssignmentHeap()).update(doctor_id, 0)
+
+    def project(doctor_id, minute):
+        return staff[doctor_id].projected_free(minute)
+
+    def reproject(doctor, minute):
+        heaps[department_of[doctor.doctor_id]].update(doctor.doctor_id, doctor.projected_free(minute))
+
+    # Event heap: (minute, sequence, kind, payload)
+    events = []
+    for sequence, (minute, doctor_id) in enumerate(schedule):
+        events.append((minute, sequence, 'arrival', doctor_id))
+    heapq.heapify(events)
+    sequence = len(events)
+
+    arrivals_at = {}
+    predicted = {}
+    waits = []
+    eta_errors = []
+    depth_timeline = []
+    waiting_total = 0
+    next_sample = 0
+    processed = 0
+    last_minute = 0
+
+    def start_next(doctor, minute):
+        nonlocal sequence, waiting_total
+        queue_id = doctor.queue.peek()
+        if queue_id is None:
+            doctor.current = None
+            return
+        doctor.queue.remove(queue_id)
+        waiting_total -= 1
+        doctor.current = queue_id
+        doctor.consultation_start = base_time + timedelta(minutes=minute)
+        doctor.current_end = minute + doctor.average_time
+
+        wait = minute - arrivals_at[queue_id]
+        waits.append(wait)
+        eta_errors.append(predicted[queue_id] - wait)
+
+        mu = math.log(doctor.mean_minutes) - duration_sigma ** 2 / 2
+        duration = max(1.0, rng.lognormvariate(mu, duration_sigma))
+        heapq.heappush(events, (minute + duration, sequence, 'end', (doctor.doctor_id, duration)))
+        sequence += 1
+
+    while events:
+        minute, _, kind, payload = heapq.heappop(events)
+        processed += 1
+        last_minute = minute
+
+        while next_sample <= minute:
+            depth_timeline.append((next_sample, waiting_total))
+            next_sample += sample_every
+
+        if kind == 'arrival':
+            doctor_id = payload
+            if assignment == 'least_wait':
+                doctor_id, _ = heaps[department_of[doctor_id]].pick(project, minute)
+            doctor = staff[doctor_id]
+            queue_id = processed
+            patient = random_patient(rng, emergency_rate)
+            now = base_time + timedelta(minutes=minute)
+            doctor.queue.add({
+                'queue_id': queue_id,
+                'priority_score': calculate_priority_score(patient),
+                'check_in_time': now,
+                'is_emergency': patient['is_emergency']
+            })
+            waiting_total += 1
+            arrivals_at[queue_id] = minute
+
+            position = doctor.queue.position(queue_id)
+            current_start = doctor.consultation_start if doctor.current else None
+            predicted[queue_id] = wait_time_for_position(
+                position, doctor.average_time, current_start, now)
+
+            if doctor.current is None:
+                start_next(doctor, minute)
+            reproject(doctor, minute)
+        else:
+            doctor_id, duration = payload
+            doctor = staff[doctor_id]
+            doctor.record(int(duration))
+            start_next(doctor, minute)
+            reproject(doctor, minute)
+
+    wall_time = time.perf_counter() - wall_start
+    absolute_errors = [abs(error) for error in eta_errors]
+    return {
+        'doctors': len(staff),
+        'patients': len(schedule),
+        'arrivals': arrivals,
+        'assignment': assignment,
+        'simulated_minutes': round(last_minute, 1),
+        'wait_minutes': {
+            'mean': round(sum(waits) / len(waits), 1) if waits else None,
+            'p50': round(percentile(waits, 50), 1) if waits else None,
+            'p90': round(percentile(waits, 90), 1) if waits else None,
+            'p99': round(percentile(waits, 99), 1) if waits else None,
+            'max': round(max(waits), 1) if waits else None
+        },
+        'eta_error_minutes': {
+            'mean_bias': round(sum(eta_errors) / len(eta_errors), 1) if eta_errors else None,
+            'mae': round(sum(absolute_errors) / len(absolute_errors), 1) if eta_errors else None,
+            'p90_abs': round(percentile(absolute_errors, 90), 1) if eta_errors else None
+        },
+        'queue_depth': {
+            'max': max((depth for _, depth in depth_timeline), default=0),
+            'timeline': depth_timeline
+        },
+        'events': processed,
+        'wall_seconds': round(wall_time, 3),
+        'events_per_second': round(processed / wall_time) if wall_time else None
+    }
+
+
+def print_report(report):
+    """Human-readable summary of simulate_day output"""
+    print(f"🏥 {report['doctors']} doctors, {report['patients']} patients, "
+          f"{report['arrivals']} arrivals, {report['assignment']} assignment, "
+          f"day ran {report['simulated_minutes']} min")
+    waits = report['wait_minutes']
+    print(f"⏳ Wait (min): mean {waits['mean']}, p50 {waits['p50']}, "
+          f"p90 {waits['p90']}, p99 {waits['p99']}, max {waits['max']}")
+    eta = report['eta_error_minutes']
+    print(f"🎯 ETA error (min): bias {eta['mean_bias']}, MAE {eta['mae']}, p90 |err| {eta['p90_abs']}")
+    peak = report['queue_depth']['max']
+    print(f"📈 Queue depth: max {peak} waiting")
+    for minute, depth in report['queue_depth']['timeline'][::4]:
+        bar = '█' * (depth * 50 // peak if peak else 0)
+        print(f"   {int(minute):4d} min  {bar} {depth}")
+    print(f"⚡ {report['events']} events in {report['wall_seconds']} s "
+          f"({report['events_per_second']} events/s)")
+
+
+def compare_assignment(**kwargs):
+    """
+    Run the same day under every assignment policy and print the waits
+
+    Returns:
+        dict: policy -> simulate_day report
+    """
+    kwargs.setdefault('seed', 42)
+    reports = {policy: simulate_day(assignment=policy, **kwargs) for policy in ASSIGNMENT_POLICIES}
+    for policy, report in reports.items():
+        waits = report['wait_minutes']
+        print(f"{policy:>10}: mean {waits['mean']:6.1f}  p50 {waits['p50']:6.1f}  "
+              f"p90 {waits['p90']:6.1f}  p99 {waits['p99']:6.1f}  max {waits['max']:6.1f} min, "
+              f"peak depth {report['queue_depth']['max']}")
+    return reports
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate an OPD day in memory')
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--arrivals', choices=ARRIVAL_PROCESSES, default='poisson')
+    parser.add_argument('--day-minutes', type=int, default=480)
+    parser.add_argument('--emergency-rate', type=float, default=0.03)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--replay-date', help='YYYY-MM-DD, required for --arrivals replay')
+    parser.add_argument('--departments', type=int, default=10)
+    parser.add_argument('--assignment', choices=ASSIGNMENT_POLICIES, default='fixed')
+    parser.add_argument('--compare-assignment', action='store_true',
+                        help='Run every assignment policy on the same day and compare waits')
+    args = parser.parse_args()
+
+    options = dict(
+        doctors=args.doctors,
+        patients=args.patients,
+        arrivals=args.arrivals,
+        day_minutes=args.day_minutes,
+        emergency_rate=args.emergency_rate,
+        seed=args.seed,
+        replay_date=args.replay_date,
+        departments=args.departments
+    )
+    if args.compare_assignment:
+        compare_assignment(**options)
+    else:
+        print_report(simulate_day(assignment=args.assignment, **options))
@@ -1,84 +1,198 @@
-from models.database import execute_query
+from models.doctor import get_doctor
+from models.queue_entries import (
+    get_in_progress_timing, get_position_and_doctor, update_wait_ranges
+)
+from algorithms.queue_manager import get_doctor_queue
+from algorithms.duration_model import get_duration_model, WaitRange
 from datetime import datetime
 
-def estimate_wait_time(queue_id):
+
+def remaining_consultation_time(avg_time, consultation_start_time=None, now=None):
+    """Minutes left in the in-progress consultation (0 if the doctor is free)"""
+    if consultation_start_time is None:
+        return 0
+    now = now or datetime.now()
+    elapsed = (now - consultation_start_time).total_seconds() / 60
+    return max(0, avg_time - elapsed)
+
+
+def wait_time_for_position(queue_position, avg_time, consultation_start_time=None, now=None):
     """
-    Calculate estimated waiting time for a patient
-    
+    Pure O(1) wait estimate for a single queue position (no DB access)
+
     Args:
-        queue_id (int): Queue entry ID
-    
+        queue_position (int): 1-based position in the waiting queue
+        avg_time (float): Doctor's average consultation time in minutes
+        consultation_start_time (datetime): Start of the in-progress consultation, if any
+        now (datetime): Reference time, defaults to datetime.now()
+
     Returns:
         int: Estimated wait time in minutes
     """
-    # Get patient's queue details
-    patient_query = """
-        SELECT queue_position, doctor_id
-        FROM queue_entries
-        WHERE queue_id = %s
+    wait_time = remaining_consultation_time(avg_time, consultation_start_time, now)
+    wait_time += (queue_position - 1) * avg_time
+    return int(wait_time)
+
+
+def compute_wait_times(queue_length, avg_time, consultation_start_time=None, now=None):
+    """
+    Pure one-pass wait estimates for a whole queue (no DB access)
+
+    Args:
+        queue_length (int): Number of waiting patients
+        avg_time (float): Doctor's average consultation time in minutes
+        consultation_start_time (datetime): Start of the in-progress consultation, if any
+        now (datetime): Reference time, defaults to datetime.now()
+
+    Returns:
+        list: Wait time in minutes for positions 1..queue_length
+    """
+    wait_time = remaining_consultation_time(avg_time, consultation_start_time, now)
+    wait_times = []
+    for _ in range(queue_length):
+        wait_times.append(int(wait_time))
+        wait_time += avg_time
+    return wait_times
+
+
+def load_doctor_state(doctor_id):
     """
-    patient = execute_query(patient_query, (queue_id,), fetch=True)
-    
+    Load what the estimator needs for a doctor
+
+    The average time and duration sketches come from caches; only the
+    in-progress consultation is queried.
+
+    Returns:
+        dict: {'average_consultation_time': int, 'consultation_start_time': datetime or None,
+               'current_kind': (visit_type, severity) or None, 'duration_model': DoctorDurationModel}
+    """
+    doctor = get_doctor(doctor_id)
+    if not doctor:
+        raise ValueError(f"Doctor {doctor_id} not found")
+
+    current = get_in_progress_timing(doctor_id)
+    return {
+        'average_consultation_time': doctor['average_consultation_time'],
+        'consultation_start_time': current['consultation_start_time'] if current else None,
+        'current_kind': (current['visit_type'], current['symptom_severity']) if current else None,
+        'duration_model': get_duration_model(doctor_id)
+    }
+
+
+def _remaining_range(doctor, now=None):
+    """WaitRange holding what is left of the in-progress consultation"""
+    wait = WaitRange()
+    if doctor['consultation_start_time'] is not None:
+        now = now or datetime.now()
+        elapsed = (now - doctor['consultation_start_time']).total_seconds() / 60
+        wait.add(doctor['duration_model'].remaining(*doctor['current_kind'], elapsed))
+    return wait
+
+
+def wait_range_for_position(queue_position, doctor, now=None):
+    """
+    O(1) wait range for a single queue position
+
+    Patients ahead are counted as the doctor's typical consultation.
+
+    Args:
+        queue_position (int): 1-based position in the waiting queue
+        doctor (dict): load_doctor_state output
+        now (datetime): Reference time, defaults to datetime.now()
+
+    Returns:
+        tuple: (p50, p90) in minutes
+    """
+    wait = _remaining_range(doctor, now)
+    wait.add(doctor['duration_model'].duration(), queue_position - 1)
+    return wait.minutes()
+
+
+def compute_wait_ranges(kinds, doctor, now=None):
+    """
+    One-pass wait ranges for a whole queue
+
+    Args:
+        kinds (list): (visit_type, severity) of each waiting patient, in queue order
+        doctor (dict): load_doctor_state output
+        now (datetime): Reference time, defaults to datetime.now()
+
+    Returns:
+        list: (p50, p90) in minutes for positions 1..len(kinds)
+    """
+    model = doctor['duration_model']
+    wait = _remaining_range(doctor, now)
+    ranges = []
+    for kind in kinds:
+        ranges.append(wait.minutes())
+        wait.add(model.duration(*kind))
+    return ranges
+
+
+def estimate_wait_range(queue_id):
+    """
+    Calculate the estimated waiting range for a patient
+
+    Args:
+        queue_id (int): Queue entry ID
+
+    Returns:
+        dict: {'p50': int, 'p90': int} in minutes
+    """
+    # Get patient's queue details
+    patient = get_position_and_doctor(queue_id)
+
     if not patient:
-        return 0
-    
-    patient = patient[0]
-    queue_position = patient['queue_position']
-    doctor_id = patient['doctor_id']
-    
-    # Get doctor's average consultation time
-    doctor_query = """
-        SELECT average_consultation_time, current_status
-        FROM doctors
-        WHERE doctor_id = %s
-    """
-    doctor = execute_query(doctor_query, (doctor_id,), fetch=True)[0]
-    avg_time = doctor['average_consultation_time']
-    
-    # Check if doctor is currently consulting
-    current_query = """
-        SELECT consultation_start_time
-        FROM queue_entries
-        WHERE doctor_id = %s AND status = 'In_Progress'
-        ORDER BY consultation_start_time DESC
-        LIMIT 1
-    """
-    current_patient = execute_query(current_query, (doctor_id,), fetch=True)
-    
-    wait_time = 0
-    
-    if current_patient:
-        # Calculate remaining time for current consultation
-        start_time = current_patient[0]['consultation_start_time']
-        elapsed = (datetime.now() - start_time).total_seconds() / 60
-        remaining = max(0, avg_time - elapsed)
-        wait_time += remaining
-    
-    # Add time for patients ahead in queue
-    patients_ahead = queue_position - 1
-    wait_time += patients_ahead * avg_time
-    
+        return {'p50': 0, 'p90': 0}
+
+    doctor = load_doctor_state(patient['doctor_id'])
+    p50, p90 = wait_range_for_position(patient['queue_position'], doctor)
+
     # Update in database
-    update_query = """
-        UPDATE queue_entries
-        SET estimated_wait_time = %s
-        WHERE queue_id = %s
+    update_wait_ranges([(queue_id, p50, p90)])
+
+    return {'p50': p50, 'p90': p90}
+
+
+def estimate_wait_time(queue_id):
     """
-    execute_query(update_query, (int(wait_time), queue_id))
-    
-    return int(wait_time)
+    Calculate estimated waiting time for a patient
+
+    Args:
+        queue_id (int): Queue entry ID
+
+    Returns:
+        int: Estimated (median) wait time in minutes
+    """
+    return estimate_wait_range(queue_id)['p50']
+
+
+def recalculate_wait_ranges(doctor_id):
+    """
+    Recalculate wait ranges for all waiting patients of a doctor
+
+    Loads the doctor state once, walks the resident queue in order
+    (summing each patient's own visit-type / severity distribution) and
+    writes every estimate with one UPDATE.
+
+    Returns:
+        dict: queue_id -> (p50, p90) in minutes, in queue order
+    """
+    doctor = load_doctor_state(doctor_id)
+    doctor_queue = get_doctor_queue(doctor_id)
+    queue_ids = doctor_queue.queue_ids()
+    ranges = compute_wait_ranges([doctor_queue.kind(queue_id) for queue_id in queue_ids], doctor)
+
+    estimates = dict(zip(queue_ids, ranges))
+    update_wait_ranges([(queue_id, p50, p90) for queue_id, (p50, p90) in estimates.items()])
+    return estimates
 
 
 def recalculate_wait_times(doctor_id):
-    """Recalculate wait times for all waiting patients of a doctor"""
-    query = """
-        SELECT queue_id 
-        FROM queue_entries
-        WHERE doctor_id = %s AND status = 'Waiting'
-    """
-    patients = execute_query(query, (doctor_id,), fetch=True)
-    
-    for patient in patients:
-        estimate_wait_time(patient['queue_id'])
-    
-    print(f"✅ Wait times recalculated for {len(patients)} patients")
\ No newline at end of file
+    """
+    Recalculate wait times for all waiting patients of a doctor
+
+    Returns:
+        dict: queue_id -> estimated (median) wait time in minutes
+    """
+    return {queue_id: p50 for queue_id, (p50, _) in recalculate_wait_ranges(doctor_id).items()}
@@ -1,11 +1,12 @@
 from flask import Flask, render_template
-from flask_socketio import SocketIO
 from flask_cors import CORS
 from config import Config
 from models.database import init_db
+from realtime import socketio
+from bus import bus, socketio_options
 
 # Import blueprints
-from routes import patient, doctor
+from routes import patient, doctor, queue, admin, analytics, metrics
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -13,19 +14,36 @@ app.config.from_object(Config)
 # Enable CORS
 CORS(app)
 
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Initialize SocketIO (queue deltas are pushed from realtime.py); several
+# workers fan emits out to each other's clients through the message queue
+socketio_kwargs = socketio_options(Config.SOCKETIO_MESSAGE_QUEUE) if Config.WORKERS > 1 else {}
+socketio.init_app(app, cors_allowed_origins="*", **socketio_kwargs)
 
 # Initialize database
 try:
     init_db()
 except Exception as e:
     print(f"❌ Failed to initialize database: {e}")
+    print("💡 Set DB_BACKEND=sqlite to run without a MySQL server")
     exit(1)
 
+# Several workers: share cache / queue invalidation (see bus.py)
+if Config.WORKERS > 1:
+    if Config.DB_BACKEND == 'sqlite' and Config.SQLITE_PATH == ':memory:':
+        print("❌ WORKERS > 1 needs a shared database: MySQL, or SQLITE_PATH pointing at a file")
+        exit(1)
+    bus.start(Config.SOCKETIO_MESSAGE_QUEUE)
+
 # Register blueprints
 app.register_blueprint(patient.bp, url_prefix='/api/patient')
 app.register_blueprint(doctor.bp, url_prefix='/api/doctor')
+app.register_blueprint(queue.bp, url_prefix='/api/queue')
+app.register_blueprint(admin.bp, url_prefix='/api/admin')
+app.register_blueprint(analytics.bp, url_prefix='/api/analytics')
+app.register_blueprint(metrics.bp)
+
+# Per-request query counts (/metrics, optional X-DB-Queries / Server-Timing)
+metrics.init_request_metrics(app)
 
 # Home route
 @app.route('/')
@@ -113,11 +131,26 @@ def index():
             <h3>🔌 Available API Endpoints</h3>
             <ul>
                 <li><code>POST /api/patient/checkin</code> - Check in patient</li>
+                <li><code>POST /api/patient/bulk-checkin</code> - Bulk check-in (JSON, NDJSON or CSV)</li>
                 <li><code>GET /api/patient/queue-status/&lt;queue_id&gt;</code> - Get queue status</li>
                 <li><code>GET /api/doctor/&lt;doctor_id&gt;/queue</code> - Get doctor's queue</li>
                 <li><code>GET /api/doctor/&lt;doctor_id&gt;/current</code> - Get current patient</li>
+                <li><code>GET /api/doctor/&lt;doctor_id&gt;/history</code> - Past consultations (?after=&amp;limit=, ?format=ndjson)</li>
+                <li><code>GET /api/doctor/&lt;doctor_id&gt;/stats</code> - Consultation-time stats</li>
+                <li><code>GET /api/doctor/&lt;doctor_id&gt;/overview</code> - Current patient, queue and stats in one call</li>
                 <li><code>POST /api/doctor/&lt;doctor_id&gt;/start-consultation</code> - Start consultation</li>
                 <li><code>POST /api/doctor/&lt;doctor_id&gt;/end-consultation</code> - End consultation</li>
+                <li><code>GET /api/queue/board?department_id=&amp;next=</code> - Now serving and next tokens for every doctor</li>
+                <li><code>GET /api/analytics/operations</code> - Hourly check-ins, consultations, no-shows, wait p50/p90 (?group_by=doctor|department)</li>
+                <li><code>GET /api/admin/cache-stats</code> - Reference cache hit/miss counters</li>
+                <li><code>GET /api/admin/event-sink</code> - Event writer queue depth and flush latency</li>
+                <li><code>GET /api/admin/bus</code> - Messages exchanged with the other workers</li>
+                <li><code>GET /api/admin/queue-executors</code> - Queue commands and batches per doctor</li>
+                <li><code>GET /api/admin/slow-queries</code> - Recent statements over SLOW_QUERY_MS</li>
+                <li><code>GET /api/admin/pool</code> - Connection pool utilisation, waits and timeouts</li>
+                <li><code>GET /api/admin/history</code> - Consultation history export (?after=&amp;limit=, ?format=ndjson)</li>
+                <li><code>GET /api/admin/events</code> - System event export (?after=&amp;limit=, ?format=ndjson)</li>
+                <li><code>GET /metrics</code> - Prometheus metrics (query latency, pool wait, caches)</li>
             </ul>
         </div>
     </body>
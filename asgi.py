@@ -0,0 +1,80 @@
+"""
+ASGI server for the patient and doctor APIs (Quart)
+
+Serves /api/patient and /api/doctor on one event loop: reads await the
+async pool (models/async_database.py, aiomysql on MySQL), and queue
+changes are awaited on the per-doctor command executors, so a slow query
+or a long-polling display never ties up a thread.
+
+Socket.IO, the dashboards and the remaining APIs stay on the Flask app
+(app.py / serve.py / gunicorn.conf.py); route /api/patient and
+/api/doctor here from the same origin. With WORKERS > 1 the deltas this
+server publishes reach the Flask workers' clients through
+SOCKETIO_MESSAGE_QUEUE.
+
+Usage:
+    hypercorn asgi:app --bind 0.0.0.0:5001
+    python asgi.py [--port 5001]
+"""
+from quart import Quart
+from config import Config
+from models.database import init_db
+from models.async_database import init_async_db, close_async_db
+from models.event_sink import event_sink
+from realtime import socketio
+from bus import bus, socketio_options
+
+# Import blueprints
+from routes import async_patient, async_doctor
+
+app = Quart(__name__)
+app.config.from_object(Config)
+
+# Initialize database (the command executors and bulk imports use the sync pool)
+try:
+    init_db()
+except Exception as e:
+    print(f"❌ Failed to initialize database: {e}")
+    print("💡 Set DB_BACKEND=sqlite to run without a MySQL server")
+    exit(1)
+
+# Deltas go to the Flask workers' Socket.IO clients through the message queue
+if Config.WORKERS > 1:
+    socketio.init_app(None, **socketio_options(Config.SOCKETIO_MESSAGE_QUEUE, write_only=True))
+    bus.start(Config.SOCKETIO_MESSAGE_QUEUE)
+
+# Register blueprints
+app.register_blueprint(async_patient.bp, url_prefix='/api/patient')
+app.register_blueprint(async_doctor.bp, url_prefix='/api/doctor')
+
+
+@app.before_serving
+async def open_async_pool():
+    await init_async_db()
+
+
+@app.after_serving
+async def close_async_pool():
+    await close_async_db()
+    event_sink.flush()
+
+
+# Error handlers
+@app.errorhandler(404)
+async def not_found(error):
+    return {'error': 'Endpoint not found'}, 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+    return {'error': 'Internal server error'}, 500
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the async patient / doctor API')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    args = parser.parse_args()
+
+    print("🚀 Starting Hospital OPD async API...")
+    app.run(host=args.host, port=args.port)
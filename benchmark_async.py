@@ -0,0 +1,159 @@
+"""
+Requests/sec of the async (asgi.py) and sync (serve.py) servers
+
+Seeds a SQLite database file, then runs the same patient / doctor API
+mix against each server from many concurrent clients (1,000 by
+default): overview (current + queue + stats), current, queue,
+queue-status and ~2% check-ins. Each request opens its own connection,
+as polling displays do. The client is plain asyncio, so both servers
+are measured with the same load generator.
+
+On SQLite every read goes to one in-process connection, so the async
+server mostly saves the thread per connection; against MySQL it also
+overlaps the query round trips (run with DB_BACKEND=mysql on a seeded
+database to measure that).
+
+Usage:
+    python benchmark_async.py [--clients 1000] [--duration 20] [--servers async sync]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import closing
+
+from load_test import ROOT, free_port, seed_database, stop_server
+
+
+def start_server(kind, path, port, scratch):
+    """Launch the async (hypercorn) or sync (serve.py, one worker) server"""
+    env = dict(
+        os.environ, DB_BACKEND='sqlite', SQLITE_PATH=path, WORKERS='1',
+        EVENT_SINK_SPILL_PATH=os.path.join(scratch, f'{kind}_spill.ndjson'),
+        SLOW_QUERY_MS='100000'
+    )
+    if kind == 'async':
+        command = ['hypercorn', 'asgi:app', '--bind', f'127.0.0.1:{port}', '--backlog', '2048']
+    else:
+        command = [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port), '--workers', '1']
+    server = subprocess.Popen(command, cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            status, _ = asyncio.run(fetch(port, 'GET', '/api/doctor/1/stats'))
+            if status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.3)
+    server.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+async def fetch(port, method, path, body=None):
+    """One HTTP/1.1 request on a new connection; returns (status, body bytes)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        payload = json.dumps(body).encode() if body is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+        writer.write(head.encode() + payload)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    status_line = response.split(b'\r\n', 1)[0].split()
+    return int(status_line[1]) if len(status_line) > 1 else 0, response
+
+
+async def client(port, number, stop_at, doctors, waiting, patient_ids, latencies, failures):
+    rng = random.Random(number)
+    while time.monotonic() < stop_at:
+        roll = rng.random()
+        doctor_id = rng.randint(1, doctors)
+        if roll < 0.30:
+            call = ('GET', f'/api/doctor/{doctor_id}/overview', None)
+        elif roll < 0.55:
+            call = ('GET', f'/api/doctor/{doctor_id}/current', None)
+        elif roll < 0.78:
+            call = ('GET', f'/api/doctor/{doctor_id}/queue', None)
+        elif roll < 0.98 or not patient_ids:
+            call = ('GET', f'/api/patient/queue-status/{rng.randint(1, waiting)}', None)
+        else:
+            call = ('POST', '/api/patient/checkin', {
+                'patient_id': patient_ids.pop(), 'department_id': 1 + doctor_id % 2,
+                'visit_type': 'Walk-in', 'symptom_severity': 'Moderate'
+            })
+        start = time.perf_counter()
+        try:
+            status, _ = await asyncio.wait_for(fetch(port, *call), 60)
+        except (OSError, asyncio.TimeoutError):
+            status = 0
+        if 200 <= status < 400:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            failures.append(status)
+
+
+async def drive(port, clients, duration, doctors, waiting, patient_ids):
+    """Run the clients for duration seconds; returns (latencies, failures, elapsed)"""
+    latencies, failures = [], []
+    start = time.monotonic()
+    await asyncio.gather(*(
+        client(port, number, start + duration, doctors, waiting, patient_ids, latencies, failures)
+        for number in range(clients)
+    ))
+    return latencies, failures, time.monotonic() - start
+
+
+def run(servers=('async', 'sync'), clients=1000, duration=20, doctors=10, patients=50000, waiting=400):
+    """Benchmark each server on its own copy of the seeded database"""
+    print(f"🖥️  CPU cores: {os.cpu_count()}, {clients} concurrent clients, {duration}s per server")
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        seed_path = os.path.join(scratch, 'seed.db')
+        seed_database(seed_path, doctors, patients, waiting)
+        for kind in servers:
+            path = os.path.join(scratch, f'{kind}.db')
+            # backup() includes pages still in the seed's WAL file
+            with closing(sqlite3.connect(seed_path)) as source, closing(sqlite3.connect(path)) as target:
+                source.backup(target)
+            port = free_port()
+            server = start_server(kind, path, port, scratch)
+            try:
+                patient_ids = list(range(patients, waiting, -1))
+                latencies, failures, elapsed = asyncio.run(
+                    drive(port, clients, duration, doctors, waiting, patient_ids)
+                )
+            finally:
+                stop_server(server)
+            latencies.sort()
+            if not latencies:
+                print(f"❌ {kind}: no successful requests ({len(failures)} failures)")
+                continue
+            results[kind] = len(latencies) / elapsed
+            print(f"⚡ {kind:5s}: {results[kind]:8.1f} req/s  "
+                  f"p50 {latencies[len(latencies) // 2]:7.1f} ms  "
+                  f"p99 {latencies[int(len(latencies) * 0.99)]:8.1f} ms  "
+                  f"failed {len(failures)} {dict(Counter(failures)) if failures else ''}")
+    if 'async' in results and 'sync' in results:
+        print(f"Async / sync throughput: x{results['async'] / results['sync']:.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the async and sync API servers')
+    parser.add_argument('--servers', nargs='+', default=['async', 'sync'], choices=['async', 'sync'])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--duration', type=int, default=20)
+    parser.add_argument('--doctors', type=int, default=10)
+    args = parser.parse_args()
+    run(args.servers, args.clients, args.duration, args.doctors)
@@ -0,0 +1,122 @@
+"""
+Profile the check-in / consultation hot paths without a MySQL server
+
+Runs the real Flask routes against the in-memory SQLite backend.
+
+Usage:
+    python benchmark_hot_paths.py [--patients 500] [--doctors 5] [--profile]
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ.setdefault('SQLITE_PATH', ':memory:')
+
+from app import app                                  # noqa: E402  (reads DB_BACKEND)
+from models.database import execute_query, execute_many, transaction   # noqa: E402
+from models.event_sink import event_sink             # noqa: E402
+
+
+def seed_demo_data(doctors=5, patients=500, departments=2):
+    """Insert departments, doctors and patients for the benchmark"""
+    with transaction():
+        execute_many(
+            "INSERT INTO departments (department_name, department_code) VALUES (%s, %s)",
+            [(f"Department {i}", f"D{i}") for i in range(1, departments + 1)]
+        )
+        execute_many(
+            """
+            INSERT INTO doctors (doctor_name, specialization, department_id, average_consultation_time)
+            VALUES (%s, %s, %s, %s)
+            """,
+            [(f"Dr. {i}", 'General', (i - 1) % departments + 1, random.randint(6, 15))
+             for i in range(1, doctors + 1)]
+        )
+        execute_many(
+            """
+            INSERT INTO patients
+            (registration_number, first_name, last_name, date_of_birth, gender, phone, chronic_conditions)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            [
+                (f"REG{i:06d}", f"Patient{i}", 'Test',
+                 f"{random.randint(1940, 2020)}-0{random.randint(1, 9)}-1{random.randint(0, 9)}",
+                 random.choice(['M', 'F']), f"90000{i:05d}",
+                 json.dumps(['Diabetes'] if random.random() < 0.3 else []))
+                for i in range(1, patients + 1)
+            ]
+        )
+    doctor_rows = execute_query("SELECT doctor_id, department_id FROM doctors", fetch=True)
+    return {row['doctor_id']: row['department_id'] for row in doctor_rows}
+
+
+def timed(timings, name, call):
+    start = time.perf_counter()
+    response = call()
+    timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{name} failed: {response.status_code} {response.get_data(as_text=True)}")
+    return response.get_json()
+
+
+def run(doctors=5, patients=500):
+    """Check every patient in, then call and finish each doctor's queue"""
+    departments = seed_demo_data(doctors, patients)
+    client = app.test_client()
+    timings = {}
+
+    for patient_id in range(1, patients + 1):
+        doctor_id = random.choice(list(departments))
+        timed(timings, 'POST /checkin', lambda: client.post('/api/patient/checkin', json={
+            'patient_id': patient_id,
+            'doctor_id': doctor_id,
+            'department_id': departments[doctor_id],
+            'visit_type': random.choice(['Walk-in', 'Appointment', 'Follow-up']),
+            'symptom_severity': random.choice(['Low', 'Moderate', 'High', 'Critical']),
+            'is_emergency': random.random() < 0.03
+        }))
+
+    for doctor_id in departments:
+        while True:
+            queue = timed(timings, 'GET /queue', lambda: client.get(f'/api/doctor/{doctor_id}/queue'))
+            if not queue['queue']:
+                break
+            queue_id = queue['queue'][0]['queue_id']
+            timed(timings, 'POST /start-consultation', lambda: client.post(
+                f'/api/doctor/{doctor_id}/start-consultation', json={'queue_id': queue_id}))
+            timed(timings, 'POST /end-consultation', lambda: client.post(
+                f'/api/doctor/{doctor_id}/end-consultation', json={'queue_id': queue_id}))
+
+    event_sink.flush()
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the OPD hot paths on SQLite')
+    parser.add_argument('--doctors', type=int, default=5)
+    parser.add_argument('--patients', type=int, default=500)
+    parser.add_argument('--profile', action='store_true', help='Print the top cProfile entries')
+    args = parser.parse_args()
+
+    random.seed(7)
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    timings = run(args.doctors, args.patients)
+    if profiler:
+        profiler.disable()
+
+    for name, samples in timings.items():
+        samples.sort()
+        print(f"⚡ {name:28s} n={len(samples):5d}  "
+              f"avg {sum(samples) / len(samples):6.2f} ms  "
+              f"p50 {samples[len(samples) // 2]:6.2f} ms  "
+              f"p99 {samples[int(len(samples) * 0.99)]:6.2f} ms")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
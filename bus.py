@@ -0,0 +1,285 @@
+"""
+Cross-worker pub/sub for multi-process deployments
+
+With several worker processes (Config.WORKERS > 1) each worker holds its
+own reference caches, resident queues and queue versions, and its own
+Socket.IO clients. Both are kept consistent over the message queue named
+by Config.SOCKETIO_MESSAGE_QUEUE:
+
+- Socket.IO emits are fanned out to clients connected to other workers
+  (the standard python-socketio pub/sub client manager)
+- cache invalidations and queue deltas are broadcast on a second channel
+  (InvalidationBus), so other workers drop stale cache entries and
+  resident queues and bump their queue / board versions
+
+Message queue URLs:
+    redis://host:6379/0     production (needs the redis package)
+    local://127.0.0.1:6380  development broker run by serve.py, no Redis needed
+    memory://               one process only (tests)
+"""
+from config import Config
+from models.cache import add_invalidation_listener, get_cache
+from multiprocessing.connection import Client, Listener
+from urllib.parse import urlparse
+import json
+import queue
+import socketio
+import threading
+import time
+import uuid
+
+BUS_AUTHKEY = Config.SECRET_KEY.encode() if isinstance(Config.SECRET_KEY, str) else b'opd-bus'
+
+
+# ---------------------------------------------------------------------------
+# Transports: publish(channel, message) and a blocking listen(channel)
+# ---------------------------------------------------------------------------
+
+class RedisTransport:
+    """Redis PUBLISH / SUBSCRIBE"""
+
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self.redis.publish(channel, message)
+
+    def listen(self, channel):
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(channel)
+                for item in pubsub.listen():
+                    data = item.get('data')
+                    yield data.decode() if isinstance(data, bytes) else data
+            except Exception as err:
+                print(f"⚠️ Bus connection lost ({err}), reconnecting")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+class LocalTransport:
+    """Client of the development broker (run_broker) over multiprocessing.connection"""
+
+    def __init__(self, address):
+        self.address = address
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._connection is None:
+                        self._connection = Client(self.address, authkey=BUS_AUTHKEY)
+                    self._connection.send(('publish', channel, message))
+                    return
+                except (OSError, EOFError):
+                    self._connection = None
+                    if attempt:
+                        raise
+
+    def listen(self, channel):
+        while True:
+            try:
+                connection = Client(self.address, authkey=BUS_AUTHKEY)
+                connection.send(('subscribe', channel))
+                while True:
+                    yield connection.recv()
+            except (OSError, EOFError) as err:
+                print(f"⚠️ Bus connection lost ({err}), reconnecting")
+                time.sleep(1)
+
+
+class MemoryTransport:
+    """In-process channels, for tests and single-process runs"""
+
+    _subscribers = {}        # channel -> [queue.Queue, ...]
+    _lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def listen(self, channel):
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(inbox)
+        while True:
+            yield inbox.get()
+
+
+def broker_address(url):
+    """(host, port) of a local:// URL"""
+    parsed = urlparse(url)
+    return parsed.hostname or '127.0.0.1', parsed.port or 6380
+
+
+def open_transport(url):
+    """Transport for a message queue URL"""
+    scheme = urlparse(url).scheme
+    if scheme in ('redis', 'rediss'):
+        return RedisTransport(url)
+    if scheme == 'local':
+        return LocalTransport(broker_address(url))
+    if scheme == 'memory':
+        return MemoryTransport()
+    raise ValueError(f"Unsupported message queue URL: {url}")
+
+
+def run_broker(url):
+    """
+    Development broker for local:// URLs: relays every published message
+    to the channel's subscribers. Blocks; serve.py runs it in a thread.
+    """
+    listener = Listener(broker_address(url), authkey=BUS_AUTHKEY)
+    subscribers = {}         # channel -> [connection, ...]
+    lock = threading.Lock()
+
+    def relay(connection):
+        try:
+            while True:
+                command = connection.recv()
+                if command[0] == 'subscribe':
+                    with lock:
+                        subscribers.setdefault(command[1], []).append(connection)
+                elif command[0] == 'publish':
+                    _, channel, message = command
+                    with lock:
+                        targets = list(subscribers.get(channel, ()))
+                    for target in targets:
+                        try:
+                            target.send(message)
+                        except (OSError, EOFError):
+                            with lock:
+                                subscribers[channel].remove(target)
+        except (OSError, EOFError):
+            pass
+
+    print(f"✅ Message broker listening on {url}")
+    while True:
+        connection = listener.accept()
+        threading.Thread(target=relay, args=(connection,), daemon=True).start()
+
+
+# ---------------------------------------------------------------------------
+# Socket.IO fan-out
+# ---------------------------------------------------------------------------
+
+class BusClientManager(socketio.PubSubManager):
+    """python-socketio pub/sub client manager over local:// and memory:// transports"""
+
+    name = 'opd-bus'
+
+    def __init__(self, url, channel='flask-socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.transport = open_transport(url)
+
+    def _publish(self, data):
+        self.transport.publish(self.channel, self.json.dumps(data))
+
+    def _listen(self):
+        yield from self.transport.listen(self.channel)
+
+
+def socketio_options(url, write_only=False):
+    """
+    SocketIO init_app arguments that share emits through the message queue
+
+    write_only is for processes that emit without serving Socket.IO
+    clients (the ASGI server, asgi.py).
+    """
+    if urlparse(url).scheme in ('redis', 'rediss'):
+        return {'message_queue': url}       # Flask-SocketIO makes it write-only without an app
+    return {'client_manager': BusClientManager(url, write_only=write_only)}
+
+
+# ---------------------------------------------------------------------------
+# Cross-worker invalidation
+# ---------------------------------------------------------------------------
+
+class InvalidationBus:
+    """
+    Broadcast state changes to the other workers
+
+    Messages are JSON objects with a 'kind' and the sending worker's id;
+    each worker applies other workers' messages with the handler
+    registered for the kind and ignores its own.
+    """
+
+    def __init__(self, channel='opd-invalidation'):
+        self.channel = channel
+        self.worker_id = None
+        self._handlers = {}
+        self._transport = None
+        self._thread = None
+        self.stats = {'published': 0, 'received': 0, 'failed': 0}
+
+    @property
+    def started(self):
+        return self._transport is not None
+
+    def on(self, kind, callback):
+        """Apply other workers' messages of this kind with callback(message)"""
+        self._handlers[kind] = callback
+
+    def start(self, url):
+        """Connect to the message queue and start applying remote messages"""
+        if self.started:
+            return
+        self.worker_id = uuid.uuid4().hex      # here, not at import: workers may be forked after it
+        self._transport = open_transport(url)
+        self._thread = threading.Thread(target=self._run, name='invalidation-bus', daemon=True)
+        self._thread.start()
+        add_invalidation_listener(self._publish_cache_invalidation)
+        print(f"✅ Invalidation bus started (worker {self.worker_id[:8]}, {urlparse(url).scheme})")
+
+    def publish(self, kind, **fields):
+        """Send a message to the other workers (no-op until started)"""
+        if not self.started:
+            return
+        message = json.dumps(dict(fields, kind=kind, origin=self.worker_id), default=str)
+        try:
+            self._transport.publish(self.channel, message)
+            self.stats['published'] += 1
+        except Exception as err:
+            self.stats['failed'] += 1
+            print(f"❌ Bus publish failed: {err}")
+
+    def _publish_cache_invalidation(self, name, key):
+        self.publish('cache', cache=name, key=key)
+
+    def _run(self):
+        for raw in self._transport.listen(self.channel):
+            try:
+                message = json.loads(raw)
+                if message.get('origin') == self.worker_id:
+                    continue
+                self.stats['received'] += 1
+                handler = self._handlers.get(message.get('kind'))
+                if handler is not None:
+                    handler(message)
+            except Exception as err:
+                self.stats['failed'] += 1
+                print(f"❌ Bus message failed: {err}")
+
+
+def _apply_cache_invalidation(message):
+    cache = get_cache(message['cache'])
+    if cache is None:
+        return
+    key = message['key']
+    if key is None:
+        cache.clear(propagate=False)
+    else:
+        cache.invalidate(tuple(key) if isinstance(key, list) else key, propagate=False)
+
+
+# Process-wide bus; started by app.py when Config.WORKERS > 1
+bus = InvalidationBus()
+bus.on('cache', _apply_cache_invalidation)
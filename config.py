@@ -14,5 +14,75 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'krithi_raj07')
     DB_NAME = os.getenv('DB_NAME', 'hospital_opd')
     
-    # SocketIO
-    SOCKETIO_MESSAGE_QUEUE = 'redis://localhost:6379/0'
\ No newline at end of file
+    # Storage backend: 'mysql' (production) or 'sqlite' (tests, benchmarks, kiosks)
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', ':memory:')
+    
+    # MySQL connection pool (callers wait up to DB_POOL_TIMEOUT when it is exhausted)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+    DB_POOL_MAX_AGE = int(os.getenv('DB_POOL_MAX_AGE', 1800))    # seconds before a connection is recycled
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_POOL_LEAK_SECONDS = int(os.getenv('DB_POOL_LEAK_SECONDS', 30))
+    
+    # Async read pool of the ASGI server (asgi.py, aiomysql)
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 20))
+    
+    # Reference data cache (doctors, departments, patients)
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 300))
+    
+    # Waiting-hall boards (/api/queue/board)
+    BOARD_CACHE_SECONDS = int(os.getenv('BOARD_CACHE_SECONDS', 5))
+    BOARD_MAX_NEXT = int(os.getenv('BOARD_MAX_NEXT', 10))
+    
+    # Listings: keyset pages (?after=&limit=) and NDJSON streams
+    PAGE_DEFAULT_LIMIT = int(os.getenv('PAGE_DEFAULT_LIMIT', 100))
+    PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', 1000))
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 500))
+    
+    # Nightly archival (python -m algorithms.archival)
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 1000))
+    ARCHIVE_EVENT_KEEP_DAYS = int(os.getenv('ARCHIVE_EVENT_KEEP_DAYS', 7))
+    
+    # Check-ins without doctor_id: department heaps are rebuilt this often
+    ASSIGNMENT_REFRESH_SECONDS = int(os.getenv('ASSIGNMENT_REFRESH_SECONDS', 60))
+    
+    # Per-doctor queue command executor: a batch waits this long for more
+    # commands after the first, up to QUEUE_BATCH_MAX of them
+    QUEUE_BATCH_WINDOW_MS = float(os.getenv('QUEUE_BATCH_WINDOW_MS', 5))
+    QUEUE_BATCH_MAX = int(os.getenv('QUEUE_BATCH_MAX', 50))
+    QUEUE_COMMAND_TIMEOUT = float(os.getenv('QUEUE_COMMAND_TIMEOUT', 30))
+    QUEUE_EXECUTOR_IDLE_SECONDS = float(os.getenv('QUEUE_EXECUTOR_IDLE_SECONDS', 60))
+    
+    # Consultation-time stats
+    STATS_EWMA_ALPHA = float(os.getenv('STATS_EWMA_ALPHA', 0.2))
+    
+    # Wait ranges: sketches need this many samples before replacing the average
+    ETA_MIN_SAMPLES = int(os.getenv('ETA_MIN_SAMPLES', 20))
+    
+    # Optional JSON file overriding the priority scoring weights
+    PRIORITY_RULES_PATH = os.getenv('PRIORITY_RULES_PATH')
+    
+    # Query instrumentation (/metrics)
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    DB_TIMING_HEADERS = os.getenv('DB_TIMING_HEADERS', 'false').lower() == 'true'    # X-DB-Queries / Server-Timing
+    
+    # system_events background writer
+    EVENT_SINK_BATCH_SIZE = int(os.getenv('EVENT_SINK_BATCH_SIZE', 100))
+    EVENT_SINK_FLUSH_MS = int(os.getenv('EVENT_SINK_FLUSH_MS', 500))
+    EVENT_SINK_MAX_QUEUE = int(os.getenv('EVENT_SINK_MAX_QUEUE', 10000))
+    EVENT_SINK_OVERFLOW = os.getenv('EVENT_SINK_OVERFLOW', 'spill')  # block, drop or spill
+    EVENT_SINK_SPILL_PATH = os.getenv('EVENT_SINK_SPILL_PATH', 'event_spill.ndjson')
+    
+    # SocketIO and multi-process serving (serve.py, gunicorn.conf.py)
+    # With WORKERS > 1 the workers share Socket.IO fan-out and cache / queue
+    # invalidation through SOCKETIO_MESSAGE_QUEUE: redis://..., or local://host:port
+    # for the development broker serve.py runs (see bus.py)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', 'redis://localhost:6379/0')
+    WORKERS = int(os.getenv('WORKERS', 1))
+    # Epoch of the shared queue versions; serve.py and gunicorn.conf.py set
+    # it once for all their workers (set it yourself for other launchers)
+    QUEUE_EPOCH = os.getenv('QUEUE_EPOCH')
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', 32))
\ No newline at end of file
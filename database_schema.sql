@@ -1,3 +1,5 @@
+-- Base schema. Apply migrations/ afterwards: python -m migrations.runner
+
 USE hospital_opd;
 
 -- Table 1: Patients
@@ -92,4 +94,24 @@ CREATE TABLE system_events (
     doctor_id INT,
     event_data JSON,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Table 7: Token Sequences (one counter per department per day)
+CREATE TABLE token_sequences (
+    department_id INT NOT NULL,
+    sequence_date DATE NOT NULL,
+    last_value INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (department_id, sequence_date),
+    FOREIGN KEY (department_id) REFERENCES departments(department_id)
+);
+
+-- Table 8: Doctor Stats (running consultation-time aggregates)
+CREATE TABLE doctor_stats (
+    doctor_id INT PRIMARY KEY,
+    consultation_count INT NOT NULL DEFAULT 0,
+    total_minutes BIGINT NOT NULL DEFAULT 0,
+    ewma_minutes DECIMAL(8,3),
+    histogram JSON NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id)
+);
@@ -0,0 +1,58 @@
+"""
+Production server settings
+
+Usage:
+    WORKERS=4 SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 gunicorn -c gunicorn.conf.py
+
+Each worker imports the app after the fork (no preload), so it opens its
+own database connections and joins the message queue (see bus.py).
+Browsers connect over WebSocket only, so a Socket.IO session never
+needs to reach the same worker twice and no sticky sessions are needed.
+"""
+import os
+
+from config import Config
+from serve import adopt_orphaned_spills, worker_spill_path
+
+wsgi_app = 'app:app'
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = Config.WORKERS
+worker_class = 'gthread'
+threads = Config.WORKER_THREADS
+preload_app = False
+timeout = 60
+graceful_timeout = 30
+accesslog = '-'
+
+
+def on_starting(server):
+    """Run pending migrations once, before any worker starts"""
+    import subprocess
+    import sys
+    import time
+
+    # One queue-version epoch for every worker, restarted ones included
+    Config.QUEUE_EPOCH = os.environ['QUEUE_EPOCH'] = Config.QUEUE_EPOCH or str(int(time.time()))
+    subprocess.run([sys.executable, '-m', 'migrations.runner'], check=True)
+    adopt_orphaned_spills(server.num_workers)
+    if Config.SOCKETIO_MESSAGE_QUEUE.startswith('local://'):
+        import threading
+        from bus import run_broker
+
+        threading.Thread(target=run_broker, args=(Config.SOCKETIO_MESSAGE_QUEUE,), daemon=True).start()
+
+
+def pre_fork(server, worker):
+    """
+    Give the new worker the lowest slot no live worker holds
+
+    worker.age grows with every restart; the slot does not, so a
+    replacement worker picks up (and replays) its predecessor's spill file.
+    """
+    taken = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(1, len(taken) + 2) if slot not in taken)
+
+
+def post_fork(server, worker):
+    """Give each worker its own event spill file"""
+    Config.EVENT_SINK_SPILL_PATH = worker_spill_path(worker.slot)
@@ -0,0 +1,184 @@
+"""
+Throughput of the multi-process server (serve.py) by worker count
+
+Seeds a SQLite database file, then for each worker count starts serve.py
+with the local message broker and drives a read-mostly mix (display
+board, doctor queue and current patient, queue status, ~5% check-ins)
+from several client processes. Reports requests/sec, latency and the
+speed-up over one worker. Scaling is bounded by the CPU cores available
+and, on SQLite, by its single writer; use MySQL for production numbers.
+
+Usage:
+    python load_test.py [--workers 1 2 4] [--clients 16] [--duration 15]
+"""
+from multiprocessing import Pool
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SEED_SCRIPT = """
+import random
+from benchmark_hot_paths import app, seed_demo_data
+random.seed(11)
+departments = seed_demo_data(doctors={doctors}, patients={patients})
+client = app.test_client()
+for patient_id in range(1, {waiting} + 1):
+    doctor_id = random.choice(list(departments))
+    client.post('/api/patient/checkin', json={{
+        'patient_id': patient_id, 'doctor_id': doctor_id,
+        'department_id': departments[doctor_id], 'visit_type': 'Walk-in',
+        'symptom_severity': random.choice(['Low', 'Moderate', 'High'])
+    }})
+"""
+
+
+def seed_database(path, doctors, patients, waiting):
+    """Fill a fresh SQLite file with doctors, patients and a waiting queue"""
+    env = dict(os.environ, DB_BACKEND='sqlite', SQLITE_PATH=path, WORKERS='1')
+    script = SEED_SCRIPT.format(doctors=doctors, patients=patients, waiting=waiting)
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(path, workers, port, broker_port, spill_dir):
+    """Launch serve.py and wait until it answers"""
+    env = dict(
+        os.environ, DB_BACKEND='sqlite', SQLITE_PATH=path, WORKERS=str(workers),
+        SOCKETIO_MESSAGE_QUEUE=f'local://127.0.0.1:{broker_port}',
+        EVENT_SINK_SPILL_PATH=os.path.join(spill_dir, 'spill.ndjson'),
+        SLOW_QUERY_MS='100000'
+    )
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/queue/board', timeout=2).read()
+            time.sleep(1)            # let the remaining workers finish importing
+            return server
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"serve.py with {workers} workers did not start")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def request(base, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    call = urllib.request.Request(base + path, data=data, method=method,
+                                  headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(call, timeout=30) as response:
+        return response.read()
+
+
+def client_loop(args):
+    """One client process: issue the request mix until the deadline"""
+    base, client_number, doctors, patient_range, waiting, stop_at = args
+    rng = random.Random(client_number)
+    next_patient, last_patient = patient_range
+    latencies, errors = [], 0
+
+    while time.time() < stop_at:
+        roll = rng.random()
+        doctor_id = rng.randint(1, doctors)
+        if roll < 0.35:
+            call = ('GET', '/api/queue/board', None)
+        elif roll < 0.60:
+            call = ('GET', f'/api/doctor/{doctor_id}/queue', None)
+        elif roll < 0.80:
+            call = ('GET', f'/api/doctor/{doctor_id}/current', None)
+        elif roll < 0.95 or next_patient > last_patient:
+            call = ('GET', f'/api/patient/queue-status/{rng.randint(1, waiting)}', None)
+        else:
+            call = ('POST', '/api/patient/checkin', {
+                'patient_id': next_patient, 'department_id': 1 + doctor_id % 2,
+                'visit_type': 'Walk-in', 'symptom_severity': 'Moderate'
+            })
+            next_patient += 1
+        start = time.perf_counter()
+        try:
+            request(base, *call)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except (urllib.error.URLError, ConnectionError, OSError):
+            errors += 1
+    return latencies, errors
+
+
+def drive(port, clients, duration, doctors, patients, waiting, offset):
+    """Run the clients against one server; returns (latencies, errors, elapsed)"""
+    base = f'http://127.0.0.1:{port}'
+    per_client = (patients - waiting) // (clients * 4)     # check-in patients, disjoint per run
+    start_at = time.time()
+    jobs = []
+    for number in range(clients):
+        first = waiting + 1 + (offset * clients + number) * per_client
+        jobs.append((base, number, doctors, (first, first + per_client - 1), waiting,
+                     start_at + duration))
+    with Pool(clients) as pool:
+        results = pool.map(client_loop, jobs)
+    elapsed = time.time() - start_at
+    latencies = sorted(sample for samples, _ in results for sample in samples)
+    return latencies, sum(errors for _, errors in results), elapsed
+
+
+def run(worker_counts=(1, 2, 4), clients=16, duration=15, doctors=10, patients=20000, waiting=400):
+    """Load test serve.py at each worker count and print the comparison"""
+    print(f"🖥️  CPU cores: {os.cpu_count()}, clients: {clients}, {duration}s per run")
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'load_test.db')
+        seed_database(path, doctors, patients, waiting)
+        for offset, workers in enumerate(worker_counts):
+            server = start_server(path, workers, free_port(), free_port(), scratch)
+            try:
+                port = int(server.args[-1])
+                latencies, errors, elapsed = drive(port, clients, duration, doctors,
+                                                   patients, waiting, offset)
+            finally:
+                stop_server(server)
+            if not latencies:
+                print(f"❌ {workers} workers: no successful requests ({errors} errors)")
+                continue
+            throughput = len(latencies) / elapsed
+            results[workers] = throughput
+            baseline = results.get(worker_counts[0], throughput)
+            print(f"⚡ {workers} workers: {throughput:8.1f} req/s  "
+                  f"p50 {latencies[len(latencies) // 2]:6.1f} ms  "
+                  f"p99 {latencies[int(len(latencies) * 0.99)]:7.1f} ms  "
+                  f"errors {errors}  x{throughput / baseline:.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test serve.py by worker count')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=int, default=15)
+    parser.add_argument('--doctors', type=int, default=10)
+    args = parser.parse_args()
+    run(args.workers, args.clients, args.duration, args.doctors)
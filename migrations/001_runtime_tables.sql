@@ -0,0 +1,22 @@
+-- Tables added after the original schema, for databases created from an
+-- older database_schema.sql
+
+-- One token counter per department per day
+CREATE TABLE IF NOT EXISTS token_sequences (
+    department_id INT NOT NULL,
+    sequence_date DATE NOT NULL,
+    last_value INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (department_id, sequence_date),
+    FOREIGN KEY (department_id) REFERENCES departments(department_id)
+);
+
+-- Running consultation-time aggregates
+CREATE TABLE IF NOT EXISTS doctor_stats (
+    doctor_id INT PRIMARY KEY,
+    consultation_count INT NOT NULL DEFAULT 0,
+    total_minutes BIGINT NOT NULL DEFAULT 0,
+    ewma_minutes DECIMAL(8,3),
+    histogram JSON NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id)
+);
@@ -0,0 +1,25 @@
+-- Indexes for the hot access paths
+
+-- Waiting / in-progress lists ordered by position (queue endpoints, next patient)
+CREATE INDEX idx_queue_doctor_status_position
+    ON queue_entries (doctor_id, status, queue_position);
+
+-- In-progress consultation start time (wait-time estimates)
+CREATE INDEX idx_queue_doctor_status_start
+    ON queue_entries (doctor_id, status, consultation_start_time);
+
+-- Per-department daily lookups (tokens, boards)
+CREATE INDEX idx_queue_department_checkin
+    ON queue_entries (department_id, check_in_time);
+
+-- Bulk check-in reads new rows back by (check_in_time, token_number)
+CREATE INDEX idx_queue_checkin_token
+    ON queue_entries (check_in_time, token_number);
+
+-- Per-doctor history in insertion order (stats rebuild), covering
+CREATE INDEX idx_history_doctor
+    ON consultation_history (doctor_id, history_id, actual_consultation_time);
+
+-- Event replay / analytics by type and time
+CREATE INDEX idx_events_type_time
+    ON system_events (event_type, timestamp);
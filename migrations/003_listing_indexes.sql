@@ -0,0 +1,9 @@
+-- Keyset pagination / NDJSON exports of system_events (event_id order)
+
+-- Events of one type, paged by event_id
+CREATE INDEX idx_events_type_id
+    ON system_events (event_type, event_id);
+
+-- One doctor's events, paged by event_id
+CREATE INDEX idx_events_doctor_id
+    ON system_events (doctor_id, event_id);
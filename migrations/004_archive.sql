@@ -0,0 +1,49 @@
+-- Hot/cold split: completed queue entries and old events move to monthly
+-- archive tables (see algorithms/archival.py)
+
+-- One row per archive table: its month and the id / time range it holds,
+-- so historical reads only touch the partitions that can match
+CREATE TABLE archive_partitions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    source_table VARCHAR(64) NOT NULL,
+    period CHAR(7) NOT NULL,
+    min_id INT NOT NULL,
+    max_id INT NOT NULL,
+    min_time TIMESTAMP NULL,
+    max_time TIMESTAMP NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_archive_source (source_table, period)
+);
+
+-- consultation_history outlives the queue entries it came from, so its
+-- queue_id can no longer reference queue_entries. Rebuilt without that
+-- foreign key (the portable way: SQLite cannot drop a foreign key).
+CREATE TABLE consultation_history_unlinked (
+    history_id INT PRIMARY KEY AUTO_INCREMENT,
+    queue_id INT NOT NULL,
+    patient_id INT NOT NULL,
+    doctor_id INT NOT NULL,
+    actual_consultation_time INT,
+    consultation_notes TEXT,
+    diagnosis TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (patient_id) REFERENCES patients(patient_id),
+    FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id)
+);
+
+INSERT INTO consultation_history_unlinked SELECT * FROM consultation_history;
+
+DROP TABLE consultation_history;
+
+ALTER TABLE consultation_history_unlinked RENAME TO consultation_history;
+
+CREATE INDEX idx_history_doctor
+    ON consultation_history (doctor_id, history_id, actual_consultation_time);
+
+CREATE INDEX idx_history_queue
+    ON consultation_history (queue_id);
+
+-- Archival selects events by age
+CREATE INDEX idx_events_time
+    ON system_events (timestamp);
@@ -0,0 +1,32 @@
+-- Hourly operations rollups, maintained from the event sink
+-- (see algorithms/rollups.py)
+
+-- Counters and sums per doctor per hour
+CREATE TABLE ops_rollups (
+    bucket_hour TIMESTAMP NOT NULL,
+    doctor_id INT NOT NULL,
+    department_id INT,
+    check_ins INT NOT NULL DEFAULT 0,
+    consultations INT NOT NULL DEFAULT 0,
+    no_shows INT NOT NULL DEFAULT 0,
+    wait_count INT NOT NULL DEFAULT 0,
+    wait_minutes BIGINT NOT NULL DEFAULT 0,
+    duration_count INT NOT NULL DEFAULT 0,
+    duration_minutes BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_hour, doctor_id),
+    INDEX idx_rollups_doctor (doctor_id, bucket_hour),
+    INDEX idx_rollups_department (department_id, bucket_hour)
+);
+
+-- Minute histograms of waits and consultation durations, for percentiles
+CREATE TABLE ops_rollup_minutes (
+    bucket_hour TIMESTAMP NOT NULL,
+    doctor_id INT NOT NULL,
+    department_id INT,
+    metric VARCHAR(16) NOT NULL,
+    minutes INT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_hour, doctor_id, metric, minutes),
+    INDEX idx_rollup_minutes_doctor (doctor_id, bucket_hour),
+    INDEX idx_rollup_minutes_department (department_id, bucket_hour)
+);
@@ -0,0 +1,17 @@
+-- Consultation-time sketches for wait ranges (see algorithms/duration_model.py)
+
+-- One per-minute histogram per doctor, visit type and severity; '*' rows
+-- aggregate over visit type / severity and back the sparse combinations
+CREATE TABLE duration_sketches (
+    doctor_id INT NOT NULL,
+    visit_type VARCHAR(20) NOT NULL,
+    symptom_severity VARCHAR(20) NOT NULL,
+    sample_count INT NOT NULL DEFAULT 0,
+    total_minutes BIGINT NOT NULL DEFAULT 0,
+    histogram JSON NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (doctor_id, visit_type, symptom_severity)
+);
+
+-- Upper end of the wait range; estimated_wait_time holds the median
+ALTER TABLE queue_entries ADD COLUMN estimated_wait_p90 INT;
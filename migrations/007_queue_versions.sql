@@ -0,0 +1,7 @@
+-- Queue versions shared by all workers (WORKERS > 1, see models/queue.py)
+
+-- Last version handed out per doctor; bumped once per published delta
+CREATE TABLE queue_versions (
+    doctor_id INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
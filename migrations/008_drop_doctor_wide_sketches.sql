@@ -0,0 +1,3 @@
+-- The doctor-wide consultation-time histogram lives in doctor_stats only
+-- (see algorithms/duration_model.py); drop the duplicate '*' / '*' rows
+DELETE FROM duration_sketches WHERE visit_type = '*' AND symptom_severity = '*';
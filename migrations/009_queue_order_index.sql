@@ -0,0 +1,4 @@
+-- Waiting queue listings in service order, keyset-paged on the sort key
+-- (see models/queue_entries.py _waiting_queue_listing)
+CREATE INDEX idx_queue_doctor_status_order
+    ON queue_entries (doctor_id, status, is_emergency DESC, priority_score DESC, check_in_time, queue_id);
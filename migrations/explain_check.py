@@ -0,0 +1,288 @@
+"""
+EXPLAIN-based regression check for the hot queries
+
+Seeds realistic volumes, drives the check-in / consultation routes and
+the batch jobs with statement capture on, then EXPLAINs every distinct
+statement that ran and fails if one of them full-scans a hot table.
+SQL strings in models/, routes/ and algorithms/ that never ran are listed
+so new statements do not slip past the check unnoticed.
+
+Usage:
+    python -m migrations.explain_check                  # in-memory SQLite (default)
+    DB_BACKEND=mysql python -m migrations.explain_check --seed   # scratch MySQL database
+"""
+import argparse
+import ast
+import json
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+
+from app import app                                                     # noqa: E402
+from models import database                                             # noqa: E402
+from models.database import execute_query, execute_many, transaction   # noqa: E402
+from models.query_stats import query_stats, fingerprint                 # noqa: E402
+from models.event_sink import event_sink, get_events                    # noqa: E402
+from algorithms.consultation_stats import rebuild_consultation_stats    # noqa: E402
+from algorithms.wait_time import estimate_wait_time                     # noqa: E402
+from algorithms.bulk_checkin import bulk_check_in                       # noqa: E402
+from algorithms.queue_manager import get_queue_position                 # noqa: E402
+from models.doctor import get_doctor_ids                                # noqa: E402
+from algorithms.archival import run_archival                            # noqa: E402
+from algorithms.rollups import backfill_rollups, settle_no_shows         # noqa: E402
+from algorithms.duration_model import rebuild_duration_sketches         # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCANNED_PACKAGES = ('models', 'routes', 'algorithms')
+
+# Tables that grow with traffic; small reference tables may be scanned
+HOT_TABLES = {
+    'queue_entries', 'consultation_history', 'system_events',
+    'patients', 'token_sequences', 'doctor_stats'
+}
+
+SQL_START = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT|REPLACE)\b', re.I)
+
+# SQL literals in the source: upper-case keywords, as written throughout the repo
+SQL_LITERAL = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT|REPLACE)\b[\s\S]*\b(FROM|SET|INTO)\b')
+
+
+def seed_realistic_data(departments=10, doctors=50, patients=20000, past_entries=60000,
+                        events_per_entry=3, chunk=5000):
+    """Bulk-load a few months of OPD history"""
+    random.seed(11)
+    now = datetime.now().replace(microsecond=0)
+
+    def insert_chunks(query, rows):
+        for start in range(0, len(rows), chunk):
+            with transaction():
+                execute_many(query, rows[start:start + chunk])
+
+    insert_chunks(
+        "INSERT INTO departments (department_name, department_code) VALUES (%s, %s)",
+        [(f"Department {i}", f"DP{i}") for i in range(1, departments + 1)]
+    )
+    insert_chunks(
+        """
+        INSERT INTO doctors (doctor_name, specialization, department_id, average_consultation_time)
+        VALUES (%s, %s, %s, %s)
+        """,
+        [(f"Dr. {i}", 'General', (i - 1) % departments + 1, random.randint(6, 15))
+         for i in range(1, doctors + 1)]
+    )
+    insert_chunks(
+        """
+        INSERT INTO patients
+        (registration_number, first_name, last_name, date_of_birth, gender, phone, chronic_conditions)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        [(f"REG{i:07d}", f"Patient{i}", 'Seed', f"{random.randint(1940, 2020)}-01-15",
+          random.choice(['M', 'F']), f"9{i:09d}", json.dumps([]))
+         for i in range(1, patients + 1)]
+    )
+
+    entries = []
+    for i in range(1, past_entries + 1):
+        doctor_id = random.randint(1, doctors)
+        check_in = now - timedelta(days=random.randint(1, 90), minutes=random.randint(0, 600))
+        start = check_in + timedelta(minutes=random.randint(0, 120))
+        entries.append((
+            random.randint(1, patients), doctor_id, (doctor_id - 1) % departments + 1,
+            f"DP{(doctor_id - 1) % departments + 1}-{i:06d}", 'Walk-in', random.randint(1, 90),
+            'Moderate', False, False, random.choice([10, 20, 35, 50]), None, 'Completed',
+            check_in, start, start + timedelta(minutes=random.randint(3, 25))
+        ))
+    insert_chunks(
+        """
+        INSERT INTO queue_entries
+        (patient_id, doctor_id, department_id, token_number, visit_type, age,
+         symptom_severity, has_chronic_condition, is_emergency, priority_score,
+         queue_position, status, check_in_time, consultation_start_time, consultation_end_time)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        entries
+    )
+    insert_chunks(
+        """
+        INSERT INTO consultation_history (queue_id, patient_id, doctor_id, actual_consultation_time)
+        VALUES (%s, %s, %s, %s)
+        """,
+        [(queue_id, entry[0], entry[1], int((entry[14] - entry[13]).total_seconds() // 60))
+         for queue_id, entry in enumerate(entries, start=1)]
+    )
+    event_types = ('Check-in', 'Consultation_Start', 'Consultation_End')
+    insert_chunks(
+        "INSERT INTO system_events (event_type, queue_id, doctor_id, event_data, timestamp) VALUES (%s, %s, %s, %s, %s)",
+        [(event_types[k], queue_id, entry[1], None, entry[12 + k])
+         for queue_id, entry in enumerate(entries, start=1)
+         for k in range(events_per_entry)]
+    )
+    print(f"✅ Seeded {patients} patients, {past_entries} past visits, "
+          f"{past_entries * events_per_entry} events")
+
+
+def exercise_hot_paths(doctors=50, departments=10, check_ins=200):
+    """Run the routes and batch jobs once with statement capture on"""
+    query_stats.capture_samples = True
+    client = app.test_client()
+
+    for patient_id in range(1, check_ins + 1):
+        doctor_id = random.randint(1, doctors)
+        response = client.post('/api/patient/checkin', json={
+            'patient_id': patient_id,
+            'doctor_id': doctor_id,
+            'department_id': (doctor_id - 1) % departments + 1,
+            'visit_type': 'Walk-in',
+            'symptom_severity': random.choice(['Low', 'Moderate', 'High'])
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+    response = client.post('/api/patient/checkin', json={
+        'patient_id': check_ins + 100, 'department_id': 1, 'visit_type': 'Walk-in'
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    queue_id = response.get_json()['queue_id']
+    client.get(f'/api/patient/queue-status/{queue_id}')
+
+    bulk_check_in([
+        {'patient_id': check_ins + i, 'doctor_id': 1, 'department_id': 1, 'visit_type': 'Appointment'}
+        for i in range(1, 21)
+    ])
+
+    for doctor_id in range(1, 4):
+        queue = client.get(f'/api/doctor/{doctor_id}/queue').get_json()['queue']
+        if queue:
+            queue_id = queue[0]['queue_id']
+            client.post(f'/api/doctor/{doctor_id}/start-consultation', json={'queue_id': queue_id})
+            client.get(f'/api/doctor/{doctor_id}/current')
+            client.post(f'/api/doctor/{doctor_id}/end-consultation', json={'queue_id': queue_id})
+        client.get(f'/api/doctor/{doctor_id}/stats')
+    client.get('/api/queue/board?department_id=1')
+    client.get('/api/doctor/1/queue?limit=5')
+    client.get('/api/doctor/1/queue?after=5&limit=5')
+    client.get('/api/doctor/1/history?after=100&limit=50')
+    client.get('/api/admin/history?limit=50').get_data()
+    client.get('/api/admin/history?after=1000&format=ndjson').get_data()
+    client.get('/api/admin/events?event_type=Check-in&after=1000&limit=50')
+    client.get('/api/admin/events?doctor_id=2&limit=50')
+    client.get('/api/admin/events?after=1000&format=ndjson').get_data()
+    client.get('/api/queue/board')
+
+    if queue:
+        estimate_wait_time(queue[-1]['queue_id'])
+        get_queue_position(queue[-1]['queue_id'])
+    get_doctor_ids()
+    rebuild_consultation_stats(1)
+    get_events('Check-in', datetime.now() - timedelta(days=1), datetime.now())
+    event_sink.flush()
+    client.get('/api/analytics/operations?group_by=doctor')
+    client.get('/api/analytics/operations?department_id=1&start=2020-01-01')
+    client.get('/api/analytics/operations?doctor_id=1&group_by=total')
+    settle_no_shows(datetime.now() - timedelta(days=1), datetime.now())
+
+    # Nightly archival, then historical reads that fall back to the archive
+    run_archival()
+    client.get('/api/patient/queue-status/1')
+    client.get('/api/admin/events?event_type=Check-in&limit=50')
+    get_events('Check-in', datetime.now() - timedelta(days=60), datetime.now() - timedelta(days=59))
+    backfill_rollups()
+    rebuild_duration_sketches()
+
+    query_stats.capture_samples = False
+    return dict(query_stats.samples)
+
+
+def static_statements():
+    """
+    fingerprint -> 'file:line' for SQL string literals in the scanned packages
+
+    f-string SQL (IN lists, bulk_update) is only covered by the runtime capture.
+    """
+    statements = {}
+    for package in SCANNED_PACKAGES:
+        for dirpath, _, filenames in os.walk(os.path.join(ROOT, package)):
+            for filename in filenames:
+                if not filename.endswith('.py'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                with open(path, encoding='utf-8') as source:
+                    tree = ast.parse(source.read())
+                in_fstrings = {
+                    id(part) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr)
+                    for part in node.values
+                }
+                for node in ast.walk(tree):
+                    if isinstance(node, ast.Constant) and isinstance(node.value, str) \
+                            and id(node) not in in_fstrings and SQL_LITERAL.match(node.value):
+                        location = f"{os.path.relpath(path, ROOT)}:{node.lineno}"
+                        statements[fingerprint(node.value)] = location
+    return statements
+
+
+def explain(query, params):
+    """
+    Full scans of hot tables in the statement's plan
+
+    Returns:
+        list: Human-readable plan lines that scan a hot table
+    """
+    scans = []
+    if database.backend.name == 'sqlite':
+        for row in execute_query("EXPLAIN QUERY PLAN " + query, params, fetch=True):
+            match = re.match(r'^SCAN (\w+)', row['detail'])
+            if match and match.group(1) in HOT_TABLES:
+                scans.append(row['detail'])
+    else:
+        for row in execute_query("EXPLAIN " + query, params, fetch=True):
+            if row.get('table') in HOT_TABLES and row.get('type') in ('ALL', 'index'):
+                scans.append(f"{row['table']}: type={row['type']} rows={row.get('rows')} key={row.get('key')}")
+    return scans
+
+
+def run_check(seed=True):
+    """
+    Returns:
+        int: Number of statements that full-scan a hot table
+    """
+    if seed:
+        seed_realistic_data()
+    samples = exercise_hot_paths()
+
+    failures = 0
+    checked = 0
+    for key, (query, params) in sorted(samples.items()):
+        if not SQL_START.match(query) or 'schema_migrations' in query:
+            continue
+        if re.match(r'^\s*(INSERT|REPLACE)\b', query, re.I) and not re.search(r'\bSELECT\b', query, re.I):
+            continue    # plain INSERT ... VALUES has no plan to check
+        checked += 1
+        scans = explain(query, params)
+        if scans:
+            failures += 1
+            print(f"❌ Full scan: {key[:150]}")
+            for scan in scans:
+                print(f"      {scan}")
+
+    unexercised = {
+        key: location for key, location in static_statements().items()
+        if key not in samples and key.split(' ')[0].upper() != 'INSERT'
+    }
+    for key, location in sorted(unexercised.items(), key=lambda item: item[1]):
+        print(f"⚠️ Not exercised by the check ({location}): {key[:120]}")
+
+    print(f"{'✅' if not failures else '❌'} EXPLAIN check: {checked} statements, "
+          f"{failures} full scans of hot tables")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fail if a hot query full-scans a large table')
+    parser.add_argument('--seed', action='store_true',
+                        help='Seed realistic volumes (always done for SQLite)')
+    args = parser.parse_args()
+
+    seed = args.seed or database.backend.name == 'sqlite'
+    sys.exit(1 if run_check(seed=seed) else 0)
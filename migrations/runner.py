@@ -0,0 +1,132 @@
+"""
+Versioned schema migrations
+
+Applies migrations/NNN_name.sql files in order and records each one in
+schema_migrations, so running it again is a no-op. Statements that hit
+"already exists" errors (an index created by hand, a table from a newer
+database_schema.sql) are skipped, which keeps every migration idempotent
+on MySQL as well as SQLite.
+
+Usage:
+    python -m migrations.runner            # apply pending migrations
+    python -m migrations.runner --status   # list applied / pending
+"""
+from models.database import execute_query, init_db
+from models import database
+from models.backends import translate_schema
+import hashlib
+import os
+import re
+import sys
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# MySQL error numbers / SQLite messages meaning "this change is already there"
+ALREADY_APPLIED_ERRNOS = (1050, 1060, 1061)    # table exists, duplicate column, duplicate key name
+ALREADY_APPLIED_MESSAGES = ('already exists', 'duplicate column')
+
+
+def _ensure_migrations_table():
+    execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def discover_migrations():
+    """
+    Migration files in version order
+
+    Returns:
+        list: [(version, name, path), ...]
+    """
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = re.match(r'^(\d+)_(\w+)\.sql$', filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+
+def split_statements(sql):
+    """Split a migration file into statements, dropping -- comments"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def _already_applied(err):
+    if getattr(err, 'errno', None) in ALREADY_APPLIED_ERRNOS:
+        return True
+    return any(message in str(err).lower() for message in ALREADY_APPLIED_MESSAGES)
+
+
+def applied_migrations():
+    """version -> checksum for every applied migration"""
+    _ensure_migrations_table()
+    rows = execute_query("SELECT version, checksum FROM schema_migrations", fetch=True)
+    return {row['version']: row['checksum'] for row in rows}
+
+
+def migrate(verbose=True):
+    """
+    Apply every pending migration
+
+    Returns:
+        list: Versions applied by this run
+    """
+    applied = applied_migrations()
+    newly_applied = []
+
+    for version, name, path in discover_migrations():
+        with open(path, encoding='utf-8') as migration_file:
+            sql = migration_file.read()
+        checksum = hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+        if version in applied:
+            if applied[version] != checksum:
+                print(f"⚠️ Migration {version:03d}_{name} changed after it was applied")
+            continue
+
+        if database.backend.name == 'sqlite':
+            sql = translate_schema(sql)
+
+        # DDL commits implicitly in MySQL, so statements run one by one
+        for statement in split_statements(sql):
+            try:
+                execute_query(statement)
+            except Exception as err:
+                if not _already_applied(err):
+                    raise
+                if verbose:
+                    print(f"   ↪ already present, skipped: {statement.splitlines()[0]}")
+
+        execute_query(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (version, name, checksum)
+        )
+        newly_applied.append(version)
+        if verbose:
+            print(f"✅ Applied migration {version:03d}_{name}")
+
+    if verbose and not newly_applied:
+        print("✅ Schema is up to date")
+    return newly_applied
+
+
+def print_status():
+    applied = applied_migrations()
+    for version, name, _ in discover_migrations():
+        state = 'applied' if version in applied else 'pending'
+        print(f"{version:03d}_{name}: {state}")
+
+
+if __name__ == '__main__':
+    init_db()
+    if '--status' in sys.argv:
+        print_status()
+    else:
+        migrate()
@@ -0,0 +1,198 @@
+from models.database import execute_query
+from models.async_database import execute_query_async
+from models import database
+from models.backends import translate_schema
+
+# Tables with a cold archive: id and time columns, columns copied, and
+# which rows may be archived (besides being older than the cutoff)
+ARCHIVED_TABLES = {
+    'queue_entries': {
+        'id': 'queue_id',
+        'time': 'check_in_time',
+        'columns': (
+            'queue_id', 'patient_id', 'doctor_id', 'department_id', 'token_number',
+            'visit_type', 'age', 'symptom_severity', 'has_chronic_condition',
+            'is_emergency', 'priority_score', 'queue_position', 'status',
+            'check_in_time', 'consultation_start_time', 'consultation_end_time',
+            'estimated_wait_time', 'notes', 'created_at', 'updated_at'
+        ),
+        'condition': "status IN ('Completed', 'Cancelled')"
+    },
+    'system_events': {
+        'id': 'event_id',
+        'time': 'timestamp',
+        'columns': ('event_id', 'event_type', 'queue_id', 'doctor_id', 'event_data', 'timestamp'),
+        'condition': None
+    }
+}
+
+# Partition DDL: same columns as the live table, no foreign keys, indexes
+# for the historical lookups only
+PARTITION_DDL = {
+    'queue_entries': """
+        CREATE TABLE IF NOT EXISTS {table} (
+            queue_id INT PRIMARY KEY,
+            patient_id INT NOT NULL,
+            doctor_id INT NOT NULL,
+            department_id INT NOT NULL,
+            token_number VARCHAR(20) NOT NULL,
+            visit_type VARCHAR(20) NOT NULL,
+            age INT NOT NULL,
+            symptom_severity VARCHAR(20),
+            has_chronic_condition BOOLEAN,
+            is_emergency BOOLEAN,
+            priority_score DECIMAL(5,2) NOT NULL,
+            queue_position INT,
+            status VARCHAR(20),
+            check_in_time TIMESTAMP NULL,
+            consultation_start_time TIMESTAMP NULL,
+            consultation_end_time TIMESTAMP NULL,
+            estimated_wait_time INT,
+            notes TEXT,
+            created_at TIMESTAMP NULL,
+            updated_at TIMESTAMP NULL,
+            INDEX idx_{table}_patient (patient_id),
+            INDEX idx_{table}_doctor (doctor_id, check_in_time)
+        );
+    """,
+    'system_events': """
+        CREATE TABLE IF NOT EXISTS {table} (
+            event_id INT PRIMARY KEY,
+            event_type VARCHAR(32) NOT NULL,
+            queue_id INT,
+            doctor_id INT,
+            event_data JSON,
+            timestamp TIMESTAMP NULL,
+            INDEX idx_{table}_type_time (event_type, timestamp),
+            INDEX idx_{table}_doctor (doctor_id, event_id)
+        );
+    """
+}
+
+
+def partition_name(source_table, month):
+    """Archive table holding a month of source_table, e.g. system_events_archive_202501"""
+    return f"{source_table}_archive_{month.strftime('%Y%m')}"
+
+
+def ensure_partition(source_table, month):
+    """Create the month's archive table if needed, returns its name"""
+    table = partition_name(source_table, month)
+    ddl = PARTITION_DDL[source_table].format(table=table)
+    if database.backend.name == 'sqlite':
+        ddl = translate_schema(ddl)
+    for statement in ddl.split(';'):
+        if statement.strip():
+            execute_query(statement)
+    return table
+
+
+def record_partition(table, source_table, month, rows):
+    """
+    Widen a partition's catalog entry to cover newly archived rows
+
+    Args:
+        rows (list): Archived rows with the source table's id and time columns
+    """
+    spec = ARCHIVED_TABLES[source_table]
+    ids = [row[spec['id']] for row in rows]
+    times = [row[spec['time']] for row in rows if row[spec['time']] is not None]
+
+    existing = execute_query(
+        "SELECT min_id, max_id, min_time, max_time, row_count FROM archive_partitions WHERE table_name = %s",
+        (table,), fetch=True
+    )
+    if existing:
+        current = existing[0]
+        ids += [current['min_id'], current['max_id']]
+        times += [t for t in (current['min_time'], current['max_time']) if t is not None]
+        execute_query("""
+            UPDATE archive_partitions
+            SET min_id = %s, max_id = %s, min_time = %s, max_time = %s,
+                row_count = %s, archived_at = NOW()
+            WHERE table_name = %s
+        """, (min(ids), max(ids), min(times, default=None), max(times, default=None),
+              current['row_count'] + len(rows), table))
+    else:
+        execute_query("""
+            INSERT INTO archive_partitions
+            (table_name, source_table, period, min_id, max_id, min_time, max_time, row_count)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (table, source_table, month.strftime('%Y-%m'), min(ids), max(ids),
+              min(times, default=None), max(times, default=None), len(rows)))
+
+
+PARTITIONS_QUERY = """
+    SELECT table_name, period, min_id, max_id, min_time, max_time, row_count
+    FROM archive_partitions
+    WHERE source_table = %s
+    ORDER BY period ASC
+"""
+
+
+def get_partitions(source_table):
+    """
+    Catalog entries of a table's archive, oldest month first
+
+    Returns:
+        list: archive_partitions rows
+    """
+    return execute_query(PARTITIONS_QUERY, (source_table,), fetch=True)
+
+
+def _covering(partitions, row_id):
+    return [
+        partition['table_name'] for partition in partitions
+        if partition['min_id'] <= row_id <= partition['max_id']
+    ]
+
+
+def partitions_for_id(source_table, row_id):
+    """Archive tables whose id range covers row_id"""
+    return _covering(get_partitions(source_table), row_id)
+
+
+def partitions_for_time(source_table, start, end):
+    """Archive tables holding rows in [start, end)"""
+    return [
+        partition['table_name'] for partition in get_partitions(source_table)
+        if partition['min_time'] is not None
+        and partition['min_time'] < end and partition['max_time'] >= start
+    ]
+
+
+def partitions_after_id(source_table, after):
+    """Archive tables holding ids greater than after, by lowest id"""
+    partitions = [p for p in get_partitions(source_table) if p['max_id'] > (after or 0)]
+    return [p['table_name'] for p in sorted(partitions, key=lambda p: p['min_id'])]
+
+
+def find_archived_entry(queue_id, columns):
+    """
+    An archived queue entry by id
+
+    Args:
+        columns (str): Column list to select, as in the live query
+
+    Returns:
+        dict or None: The row, if the entry was archived
+    """
+    for table in partitions_for_id('queue_entries', queue_id):
+        result = execute_query(
+            f"SELECT {columns} FROM {table} WHERE queue_id = %s", (queue_id,), fetch=True
+        )
+        if result:
+            return result[0]
+    return None
+
+
+async def find_archived_entry_async(queue_id, columns):
+    """find_archived_entry, awaited (ASGI server)"""
+    partitions = await execute_query_async(PARTITIONS_QUERY, ('queue_entries',), fetch=True)
+    for table in _covering(partitions, queue_id):
+        result = await execute_query_async(
+            f"SELECT {columns} FROM {table} WHERE queue_id = %s", (queue_id,), fetch=True
+        )
+        if result:
+            return result[0]
+    return None
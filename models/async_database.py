@@ -0,0 +1,185 @@
+"""
+asyncio database access for the ASGI server (asgi.py)
+
+The async routes await these helpers instead of blocking a thread per
+statement:
+
+- MySQL: an aiomysql pool of ASYNC_DB_POOL_SIZE connections
+- SQLite: the process's single connection (models.database), used from
+  a worker thread; there is no network round trip to overlap, so this
+  only keeps one code path for development and tests
+
+Only reads are async. Queue writes keep going through the per-doctor
+command executors (algorithms.queue_executor), which run on the
+synchronous pool, so there is no async transaction here.
+"""
+from models import database
+from models.query_stats import query_stats
+from config import Config
+import asyncio
+import time
+
+# Async backend, created by init_async_db() on the event loop
+async_backend = None
+
+
+class AsyncMySQLBackend:
+    """aiomysql pool (autocommit reads, dict rows)"""
+
+    name = 'mysql'
+
+    def __init__(self, pool, error):
+        self.pool = pool
+        self.Error = error
+        self._checkouts = 0
+
+    @classmethod
+    async def create(cls):
+        import aiomysql
+
+        pool = await aiomysql.create_pool(
+            host=Config.DB_HOST,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            db=Config.DB_NAME,
+            minsize=1,
+            maxsize=Config.ASYNC_DB_POOL_SIZE,
+            pool_recycle=Config.DB_POOL_MAX_AGE,
+            autocommit=True,
+            cursorclass=aiomysql.DictCursor
+        )
+        return cls(pool, aiomysql.Error)
+
+    async def _acquire(self):
+        start = time.perf_counter()
+        connection = await asyncio.wait_for(self.pool.acquire(), Config.DB_POOL_TIMEOUT)
+        query_stats.record_checkout(time.perf_counter() - start)
+        self._checkouts += 1
+        return connection
+
+    async def execute(self, query, params, fetch):
+        connection = await self._acquire()
+        try:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, params or ())
+                if fetch:
+                    return list(await cursor.fetchall())
+                return cursor.lastrowid
+        finally:
+            self.pool.release(connection)
+
+    async def stream(self, query, params, chunk_size):
+        import aiomysql
+
+        connection = await self._acquire()
+        try:
+            # Server-side cursor: rows arrive chunk_size at a time
+            async with connection.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params or ())
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+        finally:
+            self.pool.release(connection)
+
+    async def close(self):
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    def metrics(self):
+        return {
+            'backend': self.name,
+            'capacity': self.pool.maxsize,
+            'open': self.pool.size,
+            'idle': self.pool.freesize,
+            'checkouts': self._checkouts
+        }
+
+
+class AsyncSQLiteBackend:
+    """The synchronous SQLite backend, called from worker threads"""
+
+    name = 'sqlite'
+
+    def __init__(self):
+        self.Error = database.backend.Error
+
+    async def execute(self, query, params, fetch):
+        return await asyncio.to_thread(database.execute_query, query, params, fetch)
+
+    async def stream(self, query, params, chunk_size):
+        # The connection lock must be released by the thread that took it,
+        # so the rows are read in one call (fine for development data sizes)
+        rows = await asyncio.to_thread(
+            lambda: list(database.stream_query(query, params, chunk_size))
+        )
+        for row in rows:
+            yield row
+
+    async def close(self):
+        pass
+
+    def metrics(self):
+        return dict(database.pool_metrics(), async_backend='threads')
+
+
+async def init_async_db():
+    """
+    Create the async backend for Config.DB_BACKEND
+
+    The synchronous backend (init_db) must already be initialized: the
+    command executors and, on SQLite, the reads use it.
+    """
+    global async_backend
+    if Config.DB_BACKEND == 'mysql':
+        async_backend = await AsyncMySQLBackend.create()
+    else:
+        async_backend = AsyncSQLiteBackend()
+    print(f"✅ Async database backend ready ({async_backend.name})")
+
+
+async def close_async_db():
+    """Close the async pool (ASGI shutdown)"""
+    global async_backend
+    if async_backend is not None:
+        await async_backend.close()
+        async_backend = None
+
+
+async def execute_query_async(query, params=None, fetch=False):
+    """Same contract as models.database.execute_query, awaited"""
+    if async_backend is None:
+        raise RuntimeError("Async database not initialized, call init_async_db() first")
+    if async_backend.name == 'sqlite':
+        return await async_backend.execute(query, params, fetch)    # timed by execute_query
+
+    start = time.perf_counter()
+    try:
+        result = await async_backend.execute(query, params, fetch)
+    except async_backend.Error as err:
+        query_stats.record_query(query, time.perf_counter() - start, failed=True)
+        print(f"❌ Query error: {err}")
+        raise
+    query_stats.record_query(query, time.perf_counter() - start, params=params)
+    return result
+
+
+async def stream_query_async(query, params=None, chunk_size=500):
+    """
+    Async generator of rows, chunk_size at a time from a server-side cursor
+
+    Yields:
+        dict: One row at a time
+    """
+    if async_backend is None:
+        raise RuntimeError("Async database not initialized, call init_async_db() first")
+    async for row in async_backend.stream(query, params, chunk_size):
+        yield row
+
+
+def async_pool_metrics():
+    """Pool counters of the async backend (empty before init_async_db)"""
+    return async_backend.metrics() if async_backend is not None else {}
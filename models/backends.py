@@ -0,0 +1,256 @@
+from config import Config
+from models.pool import ConnectionPool
+from datetime import date, datetime
+from functools import lru_cache
+import os
+import re
+import sqlite3
+import threading
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_schema.sql')
+
+BACKENDS = ('mysql', 'sqlite')
+
+
+class MySQLBackend:
+    """
+    Production backend: mysql-connector connections in a bounded pool
+
+    Sized and tuned from Config (DB_POOL_*); see models.pool.ConnectionPool.
+    """
+
+    name = 'mysql'
+
+    def __init__(self):
+        import mysql.connector
+
+        self.Error = mysql.connector.Error
+
+        def connect():
+            return mysql.connector.connect(
+                host=Config.DB_HOST,
+                user=Config.DB_USER,
+                password=Config.DB_PASSWORD,
+                database=Config.DB_NAME
+            )
+
+        def reset(raw):
+            if raw.in_transaction:
+                raw.rollback()
+
+        self.pool = ConnectionPool(
+            connect,
+            ping=lambda raw: raw.is_connected(),
+            reset=reset,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+            timeout=Config.DB_POOL_TIMEOUT,
+            max_age=Config.DB_POOL_MAX_AGE,
+            pre_ping=Config.DB_POOL_PRE_PING,
+            leak_seconds=Config.DB_POOL_LEAK_SECONDS
+        )
+        # Fail at startup, not on the first request, if MySQL is unreachable
+        self.pool.checkout().close()
+
+    def get_connection(self):
+        return self.pool.checkout()
+
+    def metrics(self):
+        return dict(self.pool.metrics(), backend=self.name)
+
+
+# ---------------------------------------------------------------------------
+# SQLite: tests, benchmarks and single-node kiosks
+# ---------------------------------------------------------------------------
+
+def _format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter('TIMESTAMP', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('DATETIME', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('DATE', lambda raw: date.fromisoformat(raw.decode()))
+
+
+def _timestampdiff(unit, start, end):
+    """MySQL TIMESTAMPDIFF(unit, start, end), truncated toward zero"""
+    start, end = _parse_datetime(start), _parse_datetime(end)
+    if start is None or end is None:
+        return None
+    seconds = (end - start).total_seconds()
+    divisor = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400, 'WEEK': 604800}[unit.upper()]
+    return int(seconds / divisor)
+
+
+@lru_cache(maxsize=512)
+def translate_query(query):
+    """
+    Rewrite the MySQL idioms used in this codebase for SQLite
+
+    %s placeholders, ON DUPLICATE KEY UPDATE and TIMESTAMPDIFF units;
+    NOW(), CURDATE(), TIMESTAMPDIFF() and LAST_INSERT_ID(expr) are
+    registered as SQL functions on the connection.
+    """
+    query = query.replace('%s', '?')
+    query = re.sub(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', 'ON CONFLICT DO UPDATE SET', query, flags=re.I)
+    query = re.sub(r'TIMESTAMPDIFF\(\s*(\w+)\s*,', r"TIMESTAMPDIFF('\1',", query, flags=re.I)
+    return query
+
+
+def translate_schema(ddl):
+    """Turn database_schema.sql (or a migration) into SQLite DDL"""
+    ddl = re.sub(r'^\s*USE\s+\w+;', '', ddl, flags=re.I | re.M)
+    ddl = re.sub(r'CREATE TABLE (?!IF NOT EXISTS)', 'CREATE TABLE IF NOT EXISTS ', ddl)
+    ddl = re.sub(r'INT PRIMARY KEY AUTO_INCREMENT', 'INTEGER PRIMARY KEY AUTOINCREMENT', ddl)
+    ddl = re.sub(r'ENUM\([^)]*\)', 'TEXT', ddl)
+    ddl = re.sub(r'ON UPDATE CURRENT_TIMESTAMP', '', ddl)
+    ddl = re.sub(r'\bJSON\b', 'TEXT', ddl)
+
+    # Inline INDEX clauses become CREATE INDEX statements after their table
+    def move_indexes(match):
+        table, body = match.group(1), match.group(2)
+        indexes = re.findall(r',\s*INDEX\s+(\w+)\s*(\([^)]*\))', body)
+        body = re.sub(r',\s*INDEX\s+\w+\s*\([^)]*\)', '', body)
+        statements = [f"CREATE TABLE IF NOT EXISTS {table} ({body});"]
+        statements += [f"CREATE INDEX IF NOT EXISTS {name} ON {table} {columns};" for name, columns in indexes]
+        return '\n'.join(statements)
+
+    return re.sub(r'CREATE TABLE IF NOT EXISTS (\w+) \(([\s\S]*?)\);', move_indexes, ddl)
+
+
+class _SQLiteCursor:
+    """dictionary=True cursor with the mysql-connector surface we use"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def execute(self, query, params=()):
+        self._connection.last_insert_id = None
+        self._cursor.execute(translate_query(query), tuple(params))
+        # LAST_INSERT_ID(expr) sets the statement's lastrowid, as in MySQL
+        if self._connection.last_insert_id is not None:
+            self.lastrowid = self._connection.last_insert_id
+        else:
+            self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(translate_query(query), [tuple(params) for params in seq_params])
+        self.rowcount = self._cursor.rowcount
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size):
+        return [dict(row) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor.close()
+
+
+class _SQLiteConnection:
+    """Checked-out handle on the shared connection; close() releases it"""
+
+    def __init__(self, backend):
+        self._backend = backend
+        self.raw = backend.raw
+        self.last_insert_id = None
+
+    def cursor(self, dictionary=True):
+        return _SQLiteCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self._backend.release()
+
+
+class SQLiteBackend:
+    """
+    In-process backend on one SQLite connection (':memory:' by default)
+
+    The schema is created from database_schema.sql. Connections are
+    handed out one thread at a time, so a transaction never sees another
+    thread's uncommitted writes, same as separate MySQL connections.
+    """
+
+    name = 'sqlite'
+    Error = sqlite3.Error
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.raw = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        self.raw.row_factory = sqlite3.Row
+        self.raw.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            self.raw.execute("PRAGMA journal_mode = WAL")
+
+        self._lock = threading.RLock()
+        self._current = None
+        self._checkouts = 0
+        self.raw.create_function('NOW', 0, lambda: _format_datetime(datetime.now()))
+        self.raw.create_function('CURDATE', 0, lambda: date.today().isoformat())
+        self.raw.create_function('TIMESTAMPDIFF', 3, _timestampdiff)
+        self.raw.create_function('LAST_INSERT_ID', 1, self._last_insert_id)
+
+        with open(SCHEMA_PATH, encoding='utf-8') as schema:
+            self.raw.executescript(translate_schema(schema.read()))
+
+    def _last_insert_id(self, value):
+        if self._current is not None:
+            self._current.last_insert_id = value
+        return value
+
+    def get_connection(self):
+        self._lock.acquire()
+        self._checkouts += 1
+        self._current = _SQLiteConnection(self)
+        return self._current
+
+    def release(self):
+        self._current = None
+        self._lock.release()
+
+    def metrics(self):
+        return {
+            'backend': self.name,
+            'path': self.path,
+            'capacity': 1,
+            'in_use': 1 if self._current is not None else 0,
+            'checkouts': self._checkouts
+        }
+
+
+def create_backend(name=None):
+    """
+    Build the storage backend named by Config.DB_BACKEND
+
+    Args:
+        name (str): 'mysql' (production) or 'sqlite' (Config.SQLITE_PATH,
+            ':memory:' for tests and benchmarks)
+    """
+    name = (name or Config.DB_BACKEND).lower()
+    if name == 'mysql':
+        return MySQLBackend()
+    if name == 'sqlite':
+        return SQLiteBackend(Config.SQLITE_PATH)
+    raise ValueError(f"DB_BACKEND must be one of {BACKENDS}, got {name!r}")
@@ -0,0 +1,98 @@
+from models.cache import TTLCache
+from models.queue import queue_changes
+from models.queue_entries import get_board_rows
+from config import Config
+from datetime import datetime
+import threading
+
+# (department_id, board version) -> snapshot; a new version is a new key,
+# so old snapshots simply age out. The TTL bounds staleness for changes
+# made by other processes, which do not bump this process's versions.
+board_cache = TTLCache('queue_board', maxsize=256, ttl=Config.BOARD_CACHE_SECONDS)
+
+# One rebuild at a time, so screens polling together cause one query
+_build_lock = threading.Lock()
+
+
+def build_board(department_id=None):
+    """
+    Current and waiting tokens for every doctor of a department (or the hospital)
+
+    Returns:
+        dict: {
+            'department_id': int or None,
+            'generated_at': str,
+            'doctors': [{
+                'doctor_id', 'doctor_name', 'specialization', 'department_id',
+                'current_status', 'current': {...} or None,
+                'waiting': [{...}, ...], 'total_waiting': int
+            }, ...]
+        }
+    """
+    doctors = {}
+    for row in get_board_rows(department_id):
+        doctor = doctors.get(row['doctor_id'])
+        if doctor is None:
+            doctor = doctors[row['doctor_id']] = {
+                'doctor_id': row['doctor_id'],
+                'doctor_name': row['doctor_name'],
+                'specialization': row['specialization'],
+                'department_id': row['department_id'],
+                'current_status': row['current_status'],
+                'current': None,
+                'waiting': []
+            }
+        if row['queue_id'] is None:
+            continue
+
+        token = {
+            'queue_id': row['queue_id'],
+            'token_number': row['token_number'],
+            'is_emergency': bool(row['is_emergency'])
+        }
+        if row['status'] == 'In_Progress':
+            start = row['consultation_start_time']
+            token['consultation_start_time'] = start.isoformat() if start else None
+            doctor['current'] = token
+        else:
+            token['queue_position'] = row['queue_position']
+            token['estimated_wait_time'] = row['estimated_wait_time']
+            doctor['waiting'].append(token)
+
+    for doctor in doctors.values():
+        doctor['total_waiting'] = len(doctor['waiting'])
+
+    return {
+        'department_id': department_id,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'doctors': list(doctors.values())
+    }
+
+
+def get_board(department_id=None):
+    """
+    Shared board snapshot, rebuilt only when a queue in scope has changed
+
+    Every screen showing the same department reads the same snapshot, so
+    adding screens adds no database load.
+
+    Returns:
+        dict: build_board() output plus 'version'
+    """
+    version = queue_changes.board_version(department_id)
+    key = (department_id, version)
+
+    board = board_cache.peek(key)
+    if board is None:
+        with _build_lock:
+            board = board_cache.get(key, lambda _: dict(build_board(department_id), version=version))
+    return board
+
+
+def board_view(board, next_count):
+    """Trim each doctor's waiting list to the next next_count tokens"""
+    doctors = [
+        dict(doctor, waiting=doctor['waiting'][:next_count])
+        for doctor in board['doctors']
+    ]
+    return dict(board, doctors=doctors)
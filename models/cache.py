@@ -0,0 +1,141 @@
+from collections import OrderedDict
+import threading
+import time
+
+# All caches, by name, for stats reporting
+_caches = {}
+
+# Marks a key that is not in the cache
+_MISSING = object()
+
+# Called as listener(cache_name, key) after every invalidation (key None
+# for clear()); the cross-worker bus (bus.py) forwards them to other workers
+_invalidation_listeners = []
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a per-entry time-to-live
+
+    Used as a read-through cache for reference rows (doctors, departments,
+    patients). Write paths call invalidate() once their change is committed.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=300):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()    # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _caches[name] = self
+
+    def get(self, key, loader):
+        """
+        Return the cached value for key, calling loader(key) on a miss
+
+        Args:
+            key: Cache key
+            loader (callable): Fetches the value from the database
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self.peek(key)
+        if value is not None:
+            return value
+
+        value = loader(key)
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    async def get_async(self, key, loader):
+        """get() with an async loader (ASGI server)"""
+        value = self.peek(key)
+        if value is not None:
+            return value
+
+        value = await loader(key)
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def peek(self, key):
+        """Return the cached value or None, counting the hit or miss"""
+        now = time.monotonic()
+        with self._lock:
+            expires_at, value = self._entries.get(key, (0, _MISSING))
+            if value is not _MISSING and expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key, propagate=True):
+        """Drop one entry (and, with propagate, tell the invalidation listeners)"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+        if propagate:
+            _notify(self.name, key)
+
+    def clear(self, propagate=True):
+        """Drop every entry"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+        if propagate:
+            _notify(self.name, None)
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def _notify(name, key):
+    for listener in _invalidation_listeners:
+        try:
+            listener(name, key)
+        except Exception as err:
+            print(f"❌ Cache invalidation listener failed: {err}")
+
+
+def add_invalidation_listener(callback):
+    """Call callback(cache_name, key) after every invalidate() / clear() (key None)"""
+    if callback not in _invalidation_listeners:
+        _invalidation_listeners.append(callback)
+
+
+def get_cache(name):
+    """A registered cache by name, or None"""
+    return _caches.get(name)
+
+
+def cache_stats():
+    """Stats for every registered cache, keyed by name"""
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -1,53 +1,267 @@
-import mysql.connector
-from mysql.connector import pooling
-from config import Config
+from contextlib import contextmanager
+from models.backends import create_backend
+from models.pool import PoolTimeoutError
+from models.query_stats import query_stats, timed_checkout
+import threading
+import time
 
-# Connection Pool for better performance
-connection_pool = None
+# Storage backend (MySQL pool or SQLite), chosen by Config.DB_BACKEND
+backend = None
 
-def init_db():
-    """Initialize database connection pool"""
-    global connection_pool
+# Request-scoped unit of work (one per thread)
+_local = threading.local()
+
+def init_db(backend_name=None):
+    """
+    Initialize the storage backend
+
+    Args:
+        backend_name (str): 'mysql' or 'sqlite' (default: Config.DB_BACKEND)
+    """
+    global backend
     try:
-        connection_pool = mysql.connector.pooling.MySQLConnectionPool(
-            pool_name="opd_pool",
-            pool_size=5,
-            host=Config.DB_HOST,
-            user=Config.DB_USER,
-            password=Config.DB_PASSWORD,
-            database=Config.DB_NAME
-        )
-        print("✅ Database connection pool created successfully")
-    except mysql.connector.Error as err:
+        backend = create_backend(backend_name)
+        print(f"✅ Database backend ready ({backend.name})")
+        if backend.name == 'sqlite':
+            # A fresh SQLite database gets the migrations right away
+            from migrations.runner import migrate
+            migrate(verbose=False)
+    except Exception as err:
         print(f"❌ Database connection failed: {err}")
         raise
 
 def get_db_connection():
-    """Get connection from pool"""
+    """
+    Get connection from pool
+
+    Waits up to Config.DB_POOL_TIMEOUT for a free connection, then raises
+    models.pool.PoolTimeoutError.
+    """
+    if backend is None:
+        raise RuntimeError("Database not initialized, call init_db() first")
     try:
-        return connection_pool.get_connection()
-    except mysql.connector.Error as err:
+        return timed_checkout(backend.get_connection)
+    except (backend.Error, PoolTimeoutError) as err:
         print(f"❌ Error getting connection: {err}")
         raise
 
+class UnitOfWork:
+    """
+    One connection, one cursor and one commit for a whole request
+
+    Statements run through execute_query while a unit of work is active
+    join it instead of checking out their own pooled connection.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor(dictionary=True)
+        self._after_commit = []
+        self._on_rollback = []
+
+    def execute(self, query, params=None, fetch=False):
+        """Same contract as execute_query, without committing"""
+        start = time.perf_counter()
+        try:
+            self.cursor.execute(query, params or ())
+            if fetch:
+                result = self.cursor.fetchall()
+                query_stats.record_query(query, time.perf_counter() - start, params=params)
+                return result
+            query_stats.record_query(query, time.perf_counter() - start, params=params)
+            return self.cursor.lastrowid
+        except backend.Error as err:
+            query_stats.record_query(query, time.perf_counter() - start, failed=True)
+            print(f"❌ Query error: {err}")
+            raise
+
+    def execute_many(self, query, seq_params):
+        """Run one statement for many parameter sets (batched INSERTs)"""
+        start = time.perf_counter()
+        try:
+            self.cursor.executemany(query, seq_params)
+            query_stats.record_query(query, time.perf_counter() - start)
+            return self.cursor.rowcount
+        except backend.Error as err:
+            query_stats.record_query(query, time.perf_counter() - start, failed=True)
+            print(f"❌ Query error: {err}")
+            raise
+
+    def after_commit(self, callback):
+        """Run callback once the transaction has committed"""
+        self._after_commit.append(callback)
+
+    def on_rollback(self, callback):
+        """Run callback if the transaction is rolled back"""
+        self._on_rollback.append(callback)
+
+
+def current_unit_of_work():
+    """Get the unit of work active on this thread, if any"""
+    return getattr(_local, 'unit_of_work', None)
+
+
+@contextmanager
+def transaction():
+    """
+    Run a block of queries as a single transaction
+
+    Nested calls join the outer unit of work. Commits on success,
+    rolls back and re-raises on any exception.
+
+    Usage:
+        with transaction() as uow:
+            execute_query(...)
+            uow.after_commit(lambda: ...)
+    """
+    outer = current_unit_of_work()
+    if outer is not None:
+        yield outer
+        return
+
+    conn = get_db_connection()
+    uow = UnitOfWork(conn)
+    _local.unit_of_work = uow
+
+    try:
+        yield uow
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        for callback in uow._on_rollback:
+            callback()
+        raise
+    finally:
+        _local.unit_of_work = None
+        uow.cursor.close()
+        conn.close()
+
+    for callback in uow._after_commit:
+        callback()
+
+
+def execute_many(query, seq_params):
+    """Execute one statement for many parameter sets in a single round trip"""
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.execute_many(query, seq_params)
+
+    with transaction() as uow:
+        return uow.execute_many(query, seq_params)
+
+
+def bulk_update(table, key_column, column, changes, touch_updated_at=False):
+    """
+    Set a column on many rows with one UPDATE ... CASE statement
+
+    Args:
+        table (str): Table name (trusted, not user input)
+        key_column (str): Primary key column
+        column (str or tuple): Column to set, or several columns
+        changes (list): [(key, value), ...], or [(key, value1, value2, ...), ...]
+            with one value per column
+        touch_updated_at (bool): Also set updated_at = NOW()
+
+    Returns:
+        int: Number of rows in the batch
+    """
+    if not changes:
+        return 0
+
+    columns = (column,) if isinstance(column, str) else tuple(column)
+    cases = " ".join(["WHEN %s THEN %s"] * len(changes))
+    placeholders = ", ".join(["%s"] * len(changes))
+    touch = ", updated_at = NOW()" if touch_updated_at else ""
+    assignments = ", ".join(f"{name} = CASE {key_column} {cases} END" for name in columns)
+    query = f"""
+        UPDATE {table}
+        SET {assignments}{touch}
+        WHERE {key_column} IN ({placeholders})
+    """
+    params = [
+        value
+        for offset in range(1, len(columns) + 1)
+        for change in changes
+        for value in (change[0], change[offset])
+    ]
+    params += [change[0] for change in changes]
+    execute_query(query, tuple(params))
+    return len(changes)
+
+
 def execute_query(query, params=None, fetch=False):
     """Execute SQL query with proper connection handling"""
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.execute(query, params, fetch)
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+    start = time.perf_counter()
     
     try:
         cursor.execute(query, params or ())
         
         if fetch:
             result = cursor.fetchall()
+            query_stats.record_query(query, time.perf_counter() - start, params=params)
             return result
         else:
             conn.commit()
+            query_stats.record_query(query, time.perf_counter() - start, params=params)
             return cursor.lastrowid
-    except mysql.connector.Error as err:
+    except backend.Error as err:
+        query_stats.record_query(query, time.perf_counter() - start, failed=True)
         conn.rollback()
         print(f"❌ Query error: {err}")
         raise
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+def stream_query(query, params=None, chunk_size=500):
+    """
+    Yield rows from a server-side cursor, chunk_size rows at a time
+
+    The connection is held until the generator is exhausted or closed,
+    so memory stays flat however many rows match. Runs outside any unit
+    of work; meant for exports and NDJSON responses.
+
+    Yields:
+        dict: One row at a time
+    """
+    conn = get_db_connection()
+    # mysql-connector cursors are unbuffered unless asked otherwise
+    cursor = conn.cursor(dictionary=True)
+    start = time.perf_counter()
+    finished = False
+
+    try:
+        try:
+            cursor.execute(query, params or ())
+        except backend.Error as err:
+            query_stats.record_query(query, time.perf_counter() - start, failed=True)
+            print(f"❌ Query error: {err}")
+            raise
+        query_stats.record_query(query, time.perf_counter() - start, params=params)
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                finished = True
+                break
+            yield from rows
+    finally:
+        if not finished:
+            # Client went away mid-stream: drain what the server already sent
+            consume_results = getattr(conn, 'consume_results', None)
+            if consume_results is not None:
+                consume_results()
+        cursor.close()
+        conn.close()
+
+
+def pool_metrics():
+    """Connection pool utilisation, waits and timeouts (empty before init_db)"""
+    return backend.metrics() if backend is not None else {}
@@ -0,0 +1,25 @@
+from models.database import execute_query
+from models.cache import TTLCache
+from config import Config
+
+department_cache = TTLCache('departments', maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL_SECONDS)
+
+
+def _load_department(department_id):
+    query = """
+        SELECT department_id, department_name, department_code
+        FROM departments
+        WHERE department_id = %s
+    """
+    result = execute_query(query, (department_id,), fetch=True)
+    return result[0] if result else None
+
+
+def get_department(department_id):
+    """
+    Get a department's record through the read-through cache
+
+    Returns:
+        dict or None: departments row
+    """
+    return department_cache.get(department_id, _load_department)
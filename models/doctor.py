@@ -0,0 +1,87 @@
+from models.database import execute_query, current_unit_of_work
+from models.async_database import execute_query_async
+from models.cache import TTLCache
+from config import Config
+
+doctor_cache = TTLCache('doctors', maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL_SECONDS)
+
+
+DOCTOR_QUERY = """
+    SELECT doctor_id, doctor_name, specialization, department_id,
+           average_consultation_time, is_available, current_status,
+           max_patients_per_session
+    FROM doctors
+    WHERE doctor_id = %s
+"""
+
+
+def _load_doctor(doctor_id):
+    result = execute_query(DOCTOR_QUERY, (doctor_id,), fetch=True)
+    return result[0] if result else None
+
+
+async def _load_doctor_async(doctor_id):
+    result = await execute_query_async(DOCTOR_QUERY, (doctor_id,), fetch=True)
+    return result[0] if result else None
+
+
+def get_doctor(doctor_id):
+    """
+    Get a doctor's record through the read-through cache
+
+    Returns:
+        dict or None: doctors row
+    """
+    return doctor_cache.get(doctor_id, _load_doctor)
+
+
+async def get_doctor_async(doctor_id):
+    """get_doctor, awaited on a cache miss (ASGI server)"""
+    return await doctor_cache.get_async(doctor_id, _load_doctor_async)
+
+
+def invalidate_doctor(doctor_id):
+    """
+    Drop a doctor's cached record
+
+    Inside a transaction this waits for the commit, so a concurrent
+    reader cannot re-cache the old row in between.
+    """
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.after_commit(lambda: doctor_cache.invalidate(doctor_id))
+    else:
+        doctor_cache.invalidate(doctor_id)
+
+
+def get_doctor_ids():
+    """All doctor ids"""
+    return [row['doctor_id'] for row in execute_query("SELECT doctor_id FROM doctors", fetch=True)]
+
+
+def get_department_doctor_ids(department_id):
+    """Doctor ids of one department"""
+    query = "SELECT doctor_id FROM doctors WHERE department_id = %s"
+    return [row['doctor_id'] for row in execute_query(query, (department_id,), fetch=True)]
+
+
+def lock_doctor_queue(doctor_id):
+    """
+    Hold the doctor's row lock until the surrounding transaction ends
+
+    Serializes one doctor's queue changes across worker processes
+    (an InnoDB row lock; SQLite takes its database write lock).
+    """
+    query = "UPDATE doctors SET doctor_id = doctor_id WHERE doctor_id = %s"
+    execute_query(query, (doctor_id,))
+
+
+def set_doctor_status(doctor_id, status):
+    """Update a doctor's current_status ('Available', 'Busy', ...)"""
+    query = """
+        UPDATE doctors
+        SET current_status = %s
+        WHERE doctor_id = %s
+    """
+    execute_query(query, (status, doctor_id))
+    invalidate_doctor(doctor_id)
@@ -0,0 +1,356 @@
+from models.database import execute_query, execute_many, stream_query, current_unit_of_work
+from models.archive import partitions_for_time, partitions_after_id
+from config import Config
+from datetime import datetime
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+INSERT_EVENTS = """
+    INSERT INTO system_events (event_type, queue_id, doctor_id, event_data, timestamp)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+OVERFLOW_POLICIES = ('block', 'drop', 'spill')
+
+
+class EventSink:
+    """
+    Background writer for system_events
+
+    Requests enqueue events and return immediately. A worker thread drains
+    the bounded queue and writes multi-row INSERTs every batch_size events
+    or flush_interval_ms, whichever comes first.
+
+    When the queue is full the overflow policy decides what happens:
+    'block' waits for room, 'drop' discards the event and 'spill' appends
+    it to a local NDJSON file that is replayed on the next start.
+    """
+
+    def __init__(self, batch_size=100, flush_interval_ms=500, max_queue=10000,
+                 overflow_policy='spill', spill_path='event_spill.ndjson'):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}")
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._listeners = []
+        self._thread = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def start(self):
+        """Start the worker thread (idempotent), which first replays spilled events"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='event-sink', daemon=True)
+            self._thread.start()
+
+    def add_listener(self, callback):
+        """
+        Call callback(rows) after each successful write
+
+        rows are (event_type, queue_id, doctor_id, event_data_json, timestamp)
+        tuples. Runs on the writer thread; errors are printed, not raised.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def log(self, event_type, queue_id=None, doctor_id=None, event_data=None):
+        """Enqueue one event, applying the overflow policy if the queue is full"""
+        if self._thread is None:
+            self.start()
+
+        row = (
+            event_type,
+            queue_id,
+            doctor_id,
+            json.dumps(event_data, default=str) if event_data is not None else None,
+            datetime.now().replace(microsecond=0)
+        )
+
+        try:
+            if self.overflow_policy == 'block':
+                self._queue.put(row)
+            else:
+                self._queue.put_nowait(row)
+            self._count('enqueued')
+        except queue.Full:
+            if self.overflow_policy == 'spill':
+                self._spill([row])
+            else:
+                self._count('dropped')
+
+    def _collect(self):
+        """Wait for up to batch_size events or flush_interval, whichever is first"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        """Take whatever is queued right now, in batch_size chunks"""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """Write one batch with a multi-row INSERT, spilling it on failure"""
+        start = time.perf_counter()
+        try:
+            execute_many(INSERT_EVENTS, batch)
+        except Exception as err:
+            print(f"❌ Event sink flush failed ({len(batch)} events): {err}")
+            self._count('failed_flushes')
+            if self.spill_path:
+                self._spill(batch)
+            else:
+                self._count('dropped', len(batch))
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats['written'] += len(batch)
+            self._stats['flushes'] += 1
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+            self._stats['total_flush_ms'] += elapsed_ms
+
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception as err:
+                print(f"❌ Event listener {getattr(listener, '__name__', listener)} failed: {err}")
+
+    def _run(self):
+        try:
+            self.replay_spill()
+        except Exception as err:
+            print(f"❌ Event spill replay failed: {err}")
+
+        while not self._stopping.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        batch = self._drain()
+        while batch:
+            self._write(batch)
+            batch = self._drain()
+
+    def stop(self, timeout=5):
+        """Stop the worker and flush what is left (registered with atexit)"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _spill(self, rows):
+        with self._spill_lock:
+            with open(self.spill_path, 'a', encoding='utf-8') as spill_file:
+                for row in rows:
+                    spill_file.write(json.dumps(row, default=str) + '\n')
+        self._count('spilled', len(rows))
+
+    def replay_spill(self):
+        """
+        Write events spilled by a previous run, then remove the file
+
+        A replay file left by a run that died mid-replay is written first
+        (events it wrote before dying are written again).
+        """
+        if not self.spill_path:
+            return 0
+        replay_path = f"{self.spill_path}.replay"
+        if not os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+            return 0
+
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replay_path):
+                    with open(self.spill_path, encoding='utf-8') as spill_file, \
+                            open(replay_path, 'a', encoding='utf-8') as replay_file:
+                        replay_file.write(spill_file.read())
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, replay_path)
+
+        with open(replay_path, encoding='utf-8') as spill_file:
+            rows = [tuple(json.loads(line)) for line in spill_file if line.strip()]
+
+        for start in range(0, len(rows), self.batch_size):
+            self._write(rows[start:start + self.batch_size])
+        os.remove(replay_path)
+
+        print(f"✅ Replayed {len(rows)} spilled events")
+        return len(rows)
+
+    def metrics(self):
+        """Queue depth, throughput and flush latency counters"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        flushes = stats.pop('flushes')
+        total_flush_ms = stats.pop('total_flush_ms')
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'flushes': flushes,
+            'avg_flush_ms': round(total_flush_ms / flushes, 3) if flushes else 0.0,
+            'overflow_policy': self.overflow_policy,
+            'running': self._thread is not None and self._thread.is_alive()
+        })
+        return stats
+
+
+# Process-wide sink, configured from Config
+event_sink = EventSink(
+    batch_size=Config.EVENT_SINK_BATCH_SIZE,
+    flush_interval_ms=Config.EVENT_SINK_FLUSH_MS,
+    max_queue=Config.EVENT_SINK_MAX_QUEUE,
+    overflow_policy=Config.EVENT_SINK_OVERFLOW,
+    spill_path=Config.EVENT_SINK_SPILL_PATH
+)
+atexit.register(event_sink.stop)
+
+
+def get_events(event_type, start, end):
+    """
+    Logged events of one type in [start, end), oldest first
+
+    Archived months that overlap the range are read as well.
+
+    Returns:
+        list: system_events rows
+    """
+    rows = []
+    for table in partitions_for_time('system_events', start, end) + ['system_events']:
+        query = f"""
+            SELECT event_id, event_type, queue_id, doctor_id, event_data, timestamp
+            FROM {table}
+            WHERE event_type = %s AND timestamp >= %s AND timestamp < %s
+            ORDER BY timestamp ASC, event_id ASC
+        """
+        rows += execute_query(query, (event_type, start, end), fetch=True)
+    return sorted(rows, key=lambda row: (row['timestamp'], row['event_id']))
+
+
+def _event_listing(table, event_type=None, doctor_id=None, after=None, limit=None):
+    """Events of one table in event_id order, after a keyset cursor"""
+    conditions, params = [], []
+    if event_type is not None:
+        conditions.append("event_type = %s")
+        params.append(event_type)
+    if doctor_id is not None:
+        conditions.append("doctor_id = %s")
+        params.append(doctor_id)
+    # The first page starts at 0, so every page is a primary-key range
+    conditions.append("event_id > %s")
+    params.append(after or 0)
+    where = f"WHERE {' AND '.join(conditions)}"
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+
+    query = f"""
+        SELECT event_id, event_type, queue_id, doctor_id, event_data, timestamp
+        FROM {table}
+        {where}
+        ORDER BY event_id ASC
+        {limit_clause}
+    """
+    return query, tuple(params)
+
+
+def _event_tables(after):
+    """Archive partitions that can hold ids after the cursor, then the live table"""
+    return partitions_after_id('system_events', after) + ['system_events']
+
+
+def get_events_page(event_type=None, doctor_id=None, after=None, limit=100):
+    """
+    One page of system events, archived or live
+
+    Args:
+        event_type (str): Only this type (None for all)
+        doctor_id (int): Only this doctor's events (None for all)
+        after (int): event_id of the last row already seen
+        limit (int): Page size
+
+    Returns:
+        list: system_events rows, oldest first
+    """
+    rows = []
+    for table in _event_tables(after):
+        query, params = _event_listing(table, event_type, doctor_id, after, limit)
+        rows += execute_query(query, params, fetch=True)
+    return sorted(rows, key=lambda row: row['event_id'])[:limit]
+
+
+def stream_events(event_type=None, doctor_id=None, after=None, chunk_size=500):
+    """
+    Every matching event, read from a server-side cursor
+
+    Archive partitions are streamed one after another (oldest ids first),
+    then the live table, each holding one connection at a time.
+    """
+    for table in _event_tables(after):
+        query, params = _event_listing(table, event_type, doctor_id, after)
+        yield from stream_query(query, params, chunk_size)
+
+
+def log_event(event_type, queue_id=None, doctor_id=None, event_data=None):
+    """
+    Record a system event without blocking the request
+
+    Inside a transaction the event is enqueued only after commit, so
+    rolled-back work is never logged.
+    """
+    def enqueue():
+        event_sink.log(event_type, queue_id, doctor_id, event_data)
+
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.after_commit(enqueue)
+    else:
+        enqueue()
@@ -0,0 +1,155 @@
+from models.database import execute_query, stream_query
+from models.async_database import execute_query_async, stream_query_async
+
+
+def record_history(queue_id, doctor_id, notes='', diagnosis=''):
+    """
+    Save a finished consultation to consultation_history
+
+    The actual consultation time is computed from the entry's start and
+    end timestamps in the same statement.
+
+    Returns:
+        int: New history_id
+    """
+    query = """
+        INSERT INTO consultation_history
+        (queue_id, patient_id, doctor_id, actual_consultation_time,
+         consultation_notes, diagnosis)
+        SELECT queue_id, patient_id, %s,
+               TIMESTAMPDIFF(MINUTE, consultation_start_time, consultation_end_time),
+               %s, %s
+        FROM queue_entries WHERE queue_id = %s
+    """
+    return execute_query(query, (doctor_id, notes, diagnosis, queue_id))
+
+
+def get_outcome_and_next_patient(history_id, queue_id, next_queue_id):
+    """
+    Read back a consultation's duration together with the next patient's token
+
+    Also returns the finished entry's visit type and severity, which key
+    the duration sketches.
+
+    Args:
+        history_id (int): The consultation's history row
+        queue_id (int): The finished entry
+        next_queue_id (int): Head of the doctor's waiting queue (resident
+            DoctorQueue), or None if nobody is waiting
+
+    Returns:
+        dict: {'duration': int or None, 'visit_type', 'symptom_severity',
+               'next_patient': {'queue_id', 'token_number'} or None}
+    """
+    query = """
+        SELECT
+            (SELECT actual_consultation_time FROM consultation_history
+             WHERE history_id = %s) as duration,
+            e.visit_type, e.symptom_severity,
+            n.queue_id, n.token_number
+        FROM (SELECT 1) dummy
+        LEFT JOIN queue_entries e ON e.queue_id = %s
+        LEFT JOIN queue_entries n ON n.queue_id = %s
+    """
+    result = execute_query(query, (history_id, queue_id, next_queue_id), fetch=True)[0]
+    next_patient = None
+    if result['queue_id'] is not None:
+        next_patient = {
+            'queue_id': result['queue_id'],
+            'token_number': result['token_number']
+        }
+    return {
+        'duration': result['duration'],
+        'visit_type': result['visit_type'],
+        'symptom_severity': result['symptom_severity'],
+        'next_patient': next_patient
+    }
+
+
+def get_consultation_times(doctor_id):
+    """A doctor's recorded consultation times, oldest first"""
+    query = """
+        SELECT actual_consultation_time
+        FROM consultation_history
+        WHERE doctor_id = %s AND actual_consultation_time IS NOT NULL
+        ORDER BY history_id ASC
+    """
+    return [row['actual_consultation_time'] for row in execute_query(query, (doctor_id,), fetch=True)]
+
+
+def stream_consultation_kinds(chunk_size=500):
+    """
+    Every recorded consultation time with its entry's visit type and severity
+
+    Streamed in history_id order; visit_type is None once the entry was
+    archived.
+    """
+    query = """
+        SELECT h.history_id, h.doctor_id, h.queue_id, h.actual_consultation_time,
+               q.visit_type, q.symptom_severity
+        FROM consultation_history h
+        LEFT JOIN queue_entries q ON q.queue_id = h.queue_id
+        WHERE h.history_id > %s AND h.actual_consultation_time IS NOT NULL
+        ORDER BY h.history_id ASC
+    """
+    return stream_query(query, (0,), chunk_size=chunk_size)
+
+
+def _history_listing(doctor_id=None, after=None, limit=None):
+    """consultation_history in history_id order, after a keyset cursor"""
+    conditions, params = [], []
+    if doctor_id is not None:
+        conditions.append("doctor_id = %s")
+        params.append(doctor_id)
+    # The first page starts at 0, so every page is a primary-key range
+    conditions.append("history_id > %s")
+    params.append(after or 0)
+    where = f"WHERE {' AND '.join(conditions)}"
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+
+    query = f"""
+        SELECT history_id, queue_id, patient_id, doctor_id,
+               actual_consultation_time, consultation_notes, diagnosis, created_at
+        FROM consultation_history
+        {where}
+        ORDER BY history_id ASC
+        {limit_clause}
+    """
+    return query, tuple(params)
+
+
+def get_history_page(doctor_id=None, after=None, limit=100):
+    """
+    One page of consultation history
+
+    Args:
+        doctor_id (int): Only this doctor's consultations (None for all)
+        after (int): history_id of the last row already seen
+        limit (int): Page size
+
+    Returns:
+        list: consultation_history rows, oldest first
+    """
+    query, params = _history_listing(doctor_id, after, limit)
+    return execute_query(query, params, fetch=True)
+
+
+def stream_history(doctor_id=None, after=None, chunk_size=500):
+    """Every matching history row, read from a server-side cursor"""
+    query, params = _history_listing(doctor_id, after)
+    return stream_query(query, params, chunk_size)
+
+
+async def get_history_page_async(doctor_id=None, after=None, limit=100):
+    """get_history_page, awaited (ASGI server)"""
+    query, params = _history_listing(doctor_id, after, limit)
+    return await execute_query_async(query, params, fetch=True)
+
+
+def stream_history_async(doctor_id=None, after=None, chunk_size=500):
+    """stream_history as an async generator (ASGI server)"""
+    query, params = _history_listing(doctor_id, after)
+    return stream_query_async(query, params, chunk_size)
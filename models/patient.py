@@ -0,0 +1,93 @@
+from models.database import execute_query, current_unit_of_work
+from models.async_database import execute_query_async
+from models.cache import TTLCache
+from config import Config
+from datetime import date
+
+patient_cache = TTLCache('patients', maxsize=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL_SECONDS)
+
+
+PATIENT_QUERY = """
+    SELECT patient_id, first_name, last_name, date_of_birth, gender,
+           phone, chronic_conditions
+    FROM patients
+    WHERE patient_id = %s
+"""
+
+
+def _load_patient(patient_id):
+    result = execute_query(PATIENT_QUERY, (patient_id,), fetch=True)
+    return result[0] if result else None
+
+
+async def _load_patient_async(patient_id):
+    result = await execute_query_async(PATIENT_QUERY, (patient_id,), fetch=True)
+    return result[0] if result else None
+
+
+def get_patient(patient_id):
+    """
+    Get a patient's record through the read-through cache
+
+    Returns:
+        dict or None: patients row
+    """
+    return patient_cache.get(patient_id, _load_patient)
+
+
+async def get_patient_async(patient_id):
+    """get_patient, awaited on a cache miss (ASGI server)"""
+    return await patient_cache.get_async(patient_id, _load_patient_async)
+
+
+def get_patients(patient_ids):
+    """
+    Get many patients at once, fetching only cache misses with one IN query
+
+    Returns:
+        dict: patient_id -> patients row (missing ids are left out)
+    """
+    patients = {}
+    misses = []
+    for patient_id in set(patient_ids):
+        patient = patient_cache.peek(patient_id)
+        if patient is None:
+            misses.append(patient_id)
+        else:
+            patients[patient_id] = patient
+
+    if misses:
+        placeholders = ", ".join(["%s"] * len(misses))
+        query = f"""
+            SELECT patient_id, first_name, last_name, date_of_birth, gender,
+                   phone, chronic_conditions
+            FROM patients
+            WHERE patient_id IN ({placeholders})
+        """
+        for patient in execute_query(query, tuple(misses), fetch=True):
+            patient_cache.put(patient['patient_id'], patient)
+            patients[patient['patient_id']] = patient
+
+    return patients
+
+
+def invalidate_patient(patient_id):
+    """Drop a patient's cached record (after commit when in a transaction)"""
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.after_commit(lambda: patient_cache.invalidate(patient_id))
+    else:
+        patient_cache.invalidate(patient_id)
+
+
+def patient_age(patient, today=None):
+    """Age in whole years, same as TIMESTAMPDIFF(YEAR, date_of_birth, CURDATE())"""
+    today = today or date.today()
+    born = patient['date_of_birth']
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def has_chronic_condition(patient):
+    """True if the patient has any chronic condition recorded"""
+    chronic_conditions = patient.get('chronic_conditions')
+    return len(chronic_conditions) > 0 if chronic_conditions else False
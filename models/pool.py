@@ -0,0 +1,230 @@
+from collections import deque
+import sys
+import threading
+import time
+import traceback
+
+
+class PoolTimeoutError(Exception):
+    """No connection became available within the checkout timeout"""
+
+
+class PooledConnection:
+    """
+    Checked-out connection; close() hands it back to the pool
+
+    Everything else (cursor, commit, rollback, ...) goes to the real
+    connection.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self.raw = raw
+        self.created_at = created_at
+        self.checked_out_at = time.monotonic()
+        self.checkout_stack = None
+        self.leak_reported = False
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    """
+    Bounded connection pool that makes callers wait instead of failing
+
+    Keeps up to pool_size idle connections and opens up to max_overflow
+    extra ones under load (closed again when returned). When everything
+    is checked out, checkout() waits up to timeout seconds for a return
+    before raising PoolTimeoutError. Connections older than max_age are
+    recycled; with pre_ping an idle connection is checked before reuse.
+    Connections held longer than leak_seconds are reported with the
+    stack that checked them out.
+
+    Args:
+        connect (callable): Opens a new raw connection
+        ping (callable): ping(raw) -> bool, True if the connection is usable
+        disconnect (callable): Closes a raw connection
+        reset (callable): Run on return, e.g. roll back an open transaction
+    """
+
+    def __init__(self, connect, ping=None, disconnect=None, reset=None, pool_size=10,
+                 max_overflow=10, timeout=5.0, max_age=1800, pre_ping=True, leak_seconds=30):
+        self._connect = connect
+        self._ping = ping or (lambda raw: True)
+        self._disconnect = disconnect or (lambda raw: raw.close())
+        self._reset = reset or (lambda raw: None)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_age = max_age
+        self.pre_ping = pre_ping
+        self.leak_seconds = leak_seconds
+
+        self._idle = deque()                # (raw, created_at)
+        self._in_use = set()                # PooledConnection
+        self._opened = 0                    # idle + in use
+        self._condition = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'failed_pings': 0,
+            'leaks_reported': 0,
+            'peak_in_use': 0
+        }
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @property
+    def capacity(self):
+        return self.pool_size + self.max_overflow
+
+    def checkout(self, timeout=None):
+        """
+        Get a connection, waiting up to timeout seconds for one to free up
+
+        Raises:
+            PoolTimeoutError: Pool exhausted for the whole timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+
+        with self._condition:
+            while True:
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                    break
+                if self._opened < self.capacity:
+                    self._opened += 1
+                    raw, created_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._count('timeouts')
+                    self._report_leaks()
+                    raise PoolTimeoutError(
+                        f"No database connection free after {timeout}s "
+                        f"({len(self._in_use)} in use, capacity {self.capacity})"
+                    )
+                if not waited:
+                    waited = True
+                    self._count('waits')
+                self._condition.wait(remaining)
+
+        # Connect / ping outside the lock so slow network calls do not block others
+        try:
+            raw, created_at = self._validate(raw, created_at)
+        except Exception:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+
+        connection = PooledConnection(self, raw, created_at)
+        if self.leak_seconds:
+            # Source lines are looked up only if the leak is ever reported
+            connection.checkout_stack = traceback.StackSummary.extract(
+                traceback.walk_stack(sys._getframe().f_back), limit=12, lookup_lines=False)
+        with self._condition:
+            self._in_use.add(connection)
+            in_use = len(self._in_use)
+        with self._stats_lock:
+            self._stats['checkouts'] += 1
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], in_use)
+        return connection
+
+    def _validate(self, raw, created_at):
+        """Recycle stale or dead idle connections, open a new one if needed"""
+        if raw is not None and self.max_age and time.monotonic() - created_at > self.max_age:
+            self._discard(raw)
+            self._count('recycled')
+            raw = None
+        if raw is not None and self.pre_ping and not self._ping(raw):
+            self._discard(raw)
+            self._count('failed_pings')
+            raw = None
+        if raw is None:
+            raw = self._connect()
+            created_at = time.monotonic()
+            self._count('created')
+        return raw, created_at
+
+    def _discard(self, raw):
+        try:
+            self._disconnect(raw)
+        except Exception:
+            pass
+
+    def release(self, connection):
+        """Return a connection (called by PooledConnection.close)"""
+        try:
+            self._reset(connection.raw)
+            healthy = True
+        except Exception:
+            healthy = False
+
+        with self._condition:
+            self._in_use.discard(connection)
+            if healthy and len(self._idle) < self.pool_size:
+                self._idle.append((connection.raw, connection.created_at))
+            else:
+                self._opened -= 1
+                self._discard(connection.raw)
+            self._condition.notify()
+
+    def _report_leaks(self):
+        """Print connections held longer than leak_seconds (call with the lock held)"""
+        if not self.leak_seconds:
+            return []
+        now = time.monotonic()
+        leaks = [c for c in self._in_use if now - c.checked_out_at > self.leak_seconds]
+        for connection in leaks:
+            if not connection.leak_reported:
+                connection.leak_reported = True
+                self._count('leaks_reported')
+                stack = ''.join(reversed(connection.checkout_stack.format()))
+                print(f"⚠️ Connection held for {now - connection.checked_out_at:.0f}s, "
+                      f"checked out at:\n{stack}")
+        return leaks
+
+    def metrics(self):
+        """Utilisation, wait and timeout counters"""
+        with self._condition:
+            leaks = self._report_leaks()
+            in_use = len(self._in_use)
+            idle = len(self._idle)
+            opened = self._opened
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'pool_size': self.pool_size,
+            'max_overflow': self.max_overflow,
+            'capacity': self.capacity,
+            'in_use': in_use,
+            'idle': idle,
+            'opened': opened,
+            'utilisation': round(in_use / self.capacity, 4) if self.capacity else 0.0,
+            'suspected_leaks': len(leaks)
+        })
+        return stats
+
+    def dispose(self):
+        """Close every idle connection"""
+        with self._condition:
+            while self._idle:
+                raw, _ = self._idle.pop()
+                self._opened -= 1
+                self._discard(raw)
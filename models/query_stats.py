@@ -0,0 +1,215 @@
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from config import Config
+import re
+import threading
+import time
+
+# Latency histogram bucket upper bounds, in seconds (Prometheus "le")
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Current request's counters (one per thread)
+_local = threading.local()
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query):
+    """
+    Normalize a statement so every call site groups under one key
+
+    Literals become ?, IN lists and CASE WHEN batches collapse, and
+    whitespace is squeezed: the N+1 and batched shapes stay distinct
+    while the batch size does not split the stats.
+    """
+    text = re.sub(r'\s+', ' ', query).strip()
+    text = re.sub(r"'(?:[^'\\]|\\.)*'", '?', text)
+    text = re.sub(r'\b\d+(?:\.\d+)?\b', '?', text)
+    text = text.replace('%s', '?')
+    text = re.sub(r'\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)', 'IN (?, ...)', text, flags=re.I)
+    text = re.sub(r'(?:WHEN \? THEN \? )+', 'WHEN ? THEN ? ... ', text)
+    return text
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus layout)"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)    # last one is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        """[(le, count), ...] including '+Inf'"""
+        running = 0
+        result = []
+        for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], self.buckets):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+class QueryStats:
+    """
+    Process-wide data-access counters
+
+    Per statement fingerprint: calls, errors and a latency histogram.
+    Per endpoint: requests, queries and DB time. Plus pool checkout wait
+    and a ring buffer of slow statements.
+    """
+
+    def __init__(self, slow_query_ms=100, slow_log_size=100):
+        self.slow_query_ms = slow_query_ms
+        self.capture_samples = False    # keep one (query, params) per fingerprint, for EXPLAIN
+        self.samples = {}
+        self._lock = threading.Lock()
+        self.statements = {}        # fingerprint -> LatencyHistogram
+        self.errors = {}            # fingerprint -> count
+        self.endpoints = {}         # endpoint -> {'requests', 'queries', 'db_seconds'}
+        self.checkout_wait = LatencyHistogram()
+        self.slow_queries = deque(maxlen=slow_log_size)
+
+    def record_query(self, query, seconds, failed=False, params=None):
+        key = fingerprint(query)
+        if self.capture_samples and key not in self.samples:
+            self.samples[key] = (query, params)
+        with self._lock:
+            histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = LatencyHistogram()
+            histogram.observe(seconds)
+            if failed:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+        request = getattr(_local, 'request', None)
+        if request is not None:
+            request.add(key, seconds)
+
+        if seconds * 1000 >= self.slow_query_ms:
+            entry = {
+                'fingerprint': key,
+                'duration_ms': round(seconds * 1000, 3),
+                'endpoint': request.endpoint if request is not None else None,
+                'at': time.time()
+            }
+            with self._lock:
+                self.slow_queries.append(entry)
+            print(f"🐢 Slow query ({entry['duration_ms']} ms, {entry['endpoint']}): {key[:200]}")
+
+    def record_checkout(self, seconds):
+        with self._lock:
+            self.checkout_wait.observe(seconds)
+
+    def record_request(self, request):
+        with self._lock:
+            totals = self.endpoints.setdefault(
+                request.endpoint, {'requests': 0, 'queries': 0, 'db_seconds': 0.0}
+            )
+            totals['requests'] += 1
+            totals['queries'] += request.queries
+            totals['db_seconds'] += request.db_seconds
+
+    def snapshot(self):
+        """Copy of every counter, safe to render without holding the lock"""
+        with self._lock:
+            return {
+                'statements': {
+                    key: (histogram.count, histogram.total, histogram.max, histogram.cumulative())
+                    for key, histogram in self.statements.items()
+                },
+                'errors': dict(self.errors),
+                'endpoints': {key: dict(value) for key, value in self.endpoints.items()},
+                'checkout_wait': (
+                    self.checkout_wait.count, self.checkout_wait.total,
+                    self.checkout_wait.cumulative()
+                ),
+                'slow_queries': list(self.slow_queries)
+            }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.errors.clear()
+            self.endpoints.clear()
+            self.checkout_wait = LatencyHistogram()
+            self.slow_queries.clear()
+
+
+class RequestQueryStats:
+    """Query count, DB time and slowest statement for one request"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest = (0.0, None)
+
+    def add(self, key, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, key)
+
+    def server_timing(self):
+        """Server-Timing header value"""
+        slowest_seconds, _ = self.slowest
+        return (f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries", '
+                f'db-slowest;dur={slowest_seconds * 1000:.2f}')
+
+
+query_stats = QueryStats(slow_query_ms=Config.SLOW_QUERY_MS)
+
+
+def begin_request(endpoint):
+    """Start counting queries for the current request"""
+    _local.request = RequestQueryStats(endpoint)
+    return _local.request
+
+
+def end_request():
+    """Stop counting and fold the request into the per-endpoint totals"""
+    request = getattr(_local, 'request', None)
+    _local.request = None
+    if request is not None:
+        query_stats.record_request(request)
+    return request
+
+
+def current_request_stats():
+    return getattr(_local, 'request', None)
+
+
+@contextmanager
+def counting_for(request):
+    """
+    Count the statements run inside the block for request
+
+    For work done on another thread on a request's behalf (the queue
+    executors): request is that request's RequestQueryStats, or None to
+    count for nobody.
+    """
+    previous = getattr(_local, 'request', None)
+    _local.request = request
+    try:
+        yield
+    finally:
+        _local.request = previous
+
+
+def timed_checkout(get_connection):
+    """Call get_connection() and record how long the caller waited"""
+    start = time.perf_counter()
+    try:
+        return get_connection()
+    finally:
+        query_stats.record_checkout(time.perf_counter() - start)
@@ -0,0 +1,299 @@
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+import os
+import threading
+import time
+
+
+def queue_sort_key(entry):
+    """
+    Build the ordering key for a waiting patient
+
+    Mirrors the ORDER BY used by reorder_queue:
+    is_emergency DESC, priority_score DESC, check_in_time ASC.
+    queue_id breaks ties so every key is unique.
+
+    Args:
+        entry (dict): {
+            'queue_id': int,
+            'is_emergency': bool,
+            'priority_score': float,
+            'check_in_time': datetime
+        }
+
+    Returns:
+        tuple: sort key (smaller = served earlier)
+    """
+    return (
+        0 if entry.get('is_emergency') else 1,
+        -float(entry.get('priority_score') or 0),
+        entry.get('check_in_time') or datetime.min,
+        entry['queue_id']
+    )
+
+
+def _entry_kind(entry):
+    return (entry.get('visit_type'), entry.get('symptom_severity'))
+
+
+class DoctorQueue:
+    """
+    In-memory, indexed priority queue of waiting patients for one doctor
+
+    Keys are kept in a sorted list with a queue_id index. Finding a slot
+    or a position is an O(log n) bisect; insert and remove then shift the
+    list tail, an O(n) memmove that stays cheap at OPD queue lengths (a
+    few hundred entries). The last positions written to MySQL are
+    remembered so only moved entries need to be persisted.
+    """
+
+    def __init__(self, doctor_id):
+        self.doctor_id = doctor_id
+        self._keys = []          # sorted list of queue_sort_key tuples
+        self._index = {}         # queue_id -> sort key
+        self._persisted = {}     # queue_id -> queue_position stored in DB
+        self._kinds = {}         # queue_id -> (visit_type, symptom_severity)
+        self._dirty_from = 0     # first index whose position may have moved
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, queue_id):
+        return queue_id in self._index
+
+    def load(self, entries):
+        """Replace the queue contents with rows read from MySQL"""
+        self._index = {entry['queue_id']: queue_sort_key(entry) for entry in entries}
+        self._keys = sorted(self._index.values())
+        self._persisted = {
+            entry['queue_id']: entry.get('queue_position') for entry in entries
+        }
+        self._kinds = {entry['queue_id']: _entry_kind(entry) for entry in entries}
+        self._dirty_from = 0
+
+    def add(self, entry):
+        """Insert a waiting patient, returns its 1-based position"""
+        if entry['queue_id'] in self._index:
+            self.remove(entry['queue_id'])
+        key = queue_sort_key(entry)
+        self._index[entry['queue_id']] = key
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._dirty_from = min(self._dirty_from, index)
+        self._persisted.setdefault(entry['queue_id'], entry.get('queue_position'))
+        self._kinds[entry['queue_id']] = _entry_kind(entry)
+        return self.position(entry['queue_id'])
+
+    def remove(self, queue_id):
+        """Remove a patient (called in, cancelled), returns True if present"""
+        key = self._index.pop(queue_id, None)
+        if key is None:
+            return False
+        index = bisect_left(self._keys, key)
+        del self._keys[index]
+        self._dirty_from = min(self._dirty_from, index)
+        self._persisted.pop(queue_id, None)
+        self._kinds.pop(queue_id, None)
+        return True
+
+    def position(self, queue_id):
+        """1-based queue position, or None if not waiting"""
+        key = self._index.get(queue_id)
+        if key is None:
+            return None
+        return bisect_left(self._keys, key) + 1
+
+    def peek(self):
+        """queue_id at the head of the queue, or None if empty"""
+        return self._keys[0][-1] if self._keys else None
+
+    def queue_ids(self):
+        """Waiting queue_ids in service order"""
+        return [key[-1] for key in self._keys]
+
+    def kind(self, queue_id):
+        """(visit_type, symptom_severity) of a waiting patient, None where unknown"""
+        return self._kinds.get(queue_id, (None, None))
+
+    def changed_positions(self):
+        """
+        Positions that differ from what was last written to MySQL
+
+        Only entries at or behind the earliest insert/remove are checked.
+
+        Returns:
+            list: [(queue_id, new_position), ...]
+        """
+        start = self._dirty_from
+        return [
+            (key[-1], position)
+            for position, key in enumerate(self._keys[start:], start=start + 1)
+            if self._persisted.get(key[-1]) != position
+        ]
+
+    def mark_persisted(self, changes):
+        """Record positions that were successfully written"""
+        for queue_id, position in changes:
+            if queue_id in self._index:
+                self._persisted[queue_id] = position
+        self._dirty_from = len(self._keys)
+
+
+class QueueChangeLog:
+    """
+    Monotonic version and recent deltas for every doctor's queue
+
+    Each published delta bumps the doctor's version. The last few
+    deltas are kept so clients can ask for only what changed since
+    the version they already have. Department and hospital-wide
+    versions are bumped too, for the waiting-hall boards.
+
+    With several workers the doctor versions come from a shared counter
+    (use_shared_versions), so a version means the same queue state on
+    every worker, and deltas from other workers are slotted in by their
+    version, whatever order they arrive in.
+    """
+
+    def __init__(self, max_changes=256):
+        self.max_changes = max_changes
+        # Versions restart with the process, so ETags and ?since= carry its start time
+        self.epoch = int(time.time())
+        # Board versions are always counted per process
+        self.board_epoch = f"{self.epoch}.{os.getpid()}"
+        self._load_version = None
+        self._versions = {}      # doctor_id -> current version
+        self._floors = {}        # doctor_id -> newest version not retained
+        self._changes = {}       # doctor_id -> deque of (version, delta), by version
+        self._department_versions = {}   # department_id -> version
+        self._hospital_version = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def use_shared_versions(self, load_version, epoch=None):
+        """
+        Number deltas with a counter shared by all workers
+
+        Publishers then pass the shared version to record(). A doctor with
+        no delta seen yet starts at load_version(doctor_id). epoch must
+        be the same in every worker (the launcher sets it); without it
+        clients reload the full queue whenever they change worker.
+        """
+        self._load_version = load_version
+        if epoch:
+            self.epoch = int(epoch)
+
+    @property
+    def shared(self):
+        """True when versions come from the shared counter"""
+        return self._load_version is not None
+
+    def version(self, doctor_id):
+        """Current version of a doctor's queue (0 if never changed)"""
+        version = self._versions.get(doctor_id)
+        if version is not None:
+            return version
+        if self._load_version is None:
+            return 0
+        loaded = self._load_version(doctor_id)
+        with self._lock:
+            version = max(self._versions.get(doctor_id, 0), loaded)
+            self._versions[doctor_id] = version
+            self._floors[doctor_id] = max(self._floors.get(doctor_id, 0), loaded)
+            return version
+
+    def add_listener(self, callback):
+        """
+        Call callback(doctor_id, delta) after every recorded delta
+
+        Runs on the publishing thread, after commit; errors are printed,
+        not raised.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def record(self, doctor_id, delta, version=None):
+        """
+        Remember a delta, returns its version
+
+        Args:
+            version (int): The delta's shared version; None bumps the local one
+        """
+        version, recorded = self._record(doctor_id, delta, version)
+        if not recorded:
+            return version
+        for listener in self._listeners:
+            try:
+                listener(doctor_id, delta)
+            except Exception as err:
+                print(f"❌ Queue listener {getattr(listener, '__name__', listener)} failed: {err}")
+        return version
+
+    def _record(self, doctor_id, delta, version):
+        with self._lock:
+            current = self._versions.get(doctor_id, 0)
+            if version is None:
+                version = current + 1
+            elif version <= self._floors.get(doctor_id, 0):
+                return version, False            # older than anything retained
+            changes = self._changes.setdefault(doctor_id, deque())
+            index = len(changes)
+            while index and changes[index - 1][0] > version:
+                index -= 1
+            if index and changes[index - 1][0] == version:
+                return version, False            # already seen
+            changes.insert(index, (version, delta))
+            while len(changes) > self.max_changes:
+                self._floors[doctor_id] = changes.popleft()[0]
+            self._versions[doctor_id] = max(current, version)
+            department_id = delta.get('department_id')
+            if department_id is not None:
+                self._department_versions[department_id] = self._department_versions.get(department_id, 0) + 1
+            self._hospital_version += 1
+            return version, True
+
+    def board_version(self, department_id=None):
+        """Version of a department's board, or the whole hospital's when None"""
+        if department_id is None:
+            return self._hospital_version
+        return self._department_versions.get(department_id, 0)
+
+    def changes_since(self, doctor_id, since, epoch=None):
+        """
+        Deltas newer than a version
+
+        Args:
+            epoch (int): Epoch the client's version came from, if it sent one
+
+        Returns:
+            list or None: Deltas in order, or None if they are no longer
+            retained (or not all arrived yet, or the version is from
+            another epoch) and the client must reload the full queue
+        """
+        if epoch is not None and epoch != self.epoch:
+            return None
+        current = self.version(doctor_id)
+        with self._lock:
+            if since > current:
+                return None
+            if since == current:
+                return []
+            if since < self._floors.get(doctor_id, 0):
+                return None
+            newer = [(version, delta) for version, delta in self._changes.get(doctor_id, ()) if version > since]
+            if [version for version, _ in newer] != list(range(since + 1, current + 1)):
+                return None
+            return [delta for _, delta in newer]
+
+    def etag(self, doctor_id):
+        """Entity tag for the doctor's queue endpoints"""
+        return f"{doctor_id}-{self.epoch}-{self.version(doctor_id)}"
+
+    def board_etag(self, department_id=None):
+        """Entity tag for a department (or hospital) board"""
+        scope = 'all' if department_id is None else department_id
+        return f"board-{scope}-{self.board_epoch}-{self.board_version(department_id)}"
+
+
+# Process-wide change log shared by publishers and the GET endpoints
+queue_changes = QueueChangeLog()
@@ -0,0 +1,329 @@
+from models.database import execute_query, execute_many, bulk_update
+from models.async_database import execute_query_async
+from models.archive import find_archived_entry, find_archived_entry_async
+
+INSERT_ENTRY = """
+    INSERT INTO queue_entries
+    (patient_id, doctor_id, department_id, token_number, visit_type,
+     age, symptom_severity, has_chronic_condition, is_emergency,
+     priority_score, status, check_in_time, notes)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Waiting', %s, %s)
+"""
+
+
+def _insert_params(entry):
+    return (
+        entry['patient_id'], entry['doctor_id'], entry['department_id'],
+        entry['token_number'], entry['visit_type'], entry['age'],
+        entry['symptom_severity'], entry['has_chronic_condition'],
+        entry['is_emergency'], entry['priority_score'],
+        entry['check_in_time'], entry['notes']
+    )
+
+
+def insert_entry(entry):
+    """
+    Add a waiting patient to queue_entries
+
+    Args:
+        entry (dict): patient_id, doctor_id, department_id, token_number,
+            visit_type, age, symptom_severity, has_chronic_condition,
+            is_emergency, priority_score, check_in_time, notes
+
+    Returns:
+        int: New queue_id
+    """
+    return execute_query(INSERT_ENTRY, _insert_params(entry))
+
+
+def insert_entries(entries):
+    """
+    Add many waiting patients with one executemany (a multi-row INSERT)
+
+    All entries must share one check_in_time; tokens are unique per day,
+    so (check_in_time, token_number) identifies the new rows. Sets
+    entry['queue_id'] on each entry.
+
+    Returns:
+        list: New queue_ids, in input order
+    """
+    if not entries:
+        return []
+
+    execute_many(INSERT_ENTRY, [_insert_params(entry) for entry in entries])
+
+    tokens = [entry['token_number'] for entry in entries]
+    placeholders = ", ".join(["%s"] * len(tokens))
+    query = f"""
+        SELECT queue_id, token_number
+        FROM queue_entries
+        WHERE check_in_time = %s AND token_number IN ({placeholders})
+    """
+    rows = execute_query(query, (entries[0]['check_in_time'], *tokens), fetch=True)
+    queue_ids = {row['token_number']: row['queue_id'] for row in rows}
+    for entry in entries:
+        entry['queue_id'] = queue_ids[entry['token_number']]
+    return [entry['queue_id'] for entry in entries]
+
+
+ENTRY_STATUS_COLUMNS = """
+    token_number, queue_position, estimated_wait_time,
+    status, priority_score, patient_id, doctor_id
+"""
+
+
+ENTRY_STATUS_QUERY = f"""
+    SELECT {ENTRY_STATUS_COLUMNS}, estimated_wait_p90
+    FROM queue_entries
+    WHERE queue_id = %s
+"""
+
+
+def get_entry_status(queue_id):
+    """
+    Token, position, wait range and status of one entry (or None)
+
+    Entries moved out by the nightly archival are read from the archive
+    (which keeps no estimated_wait_p90).
+    """
+    result = execute_query(ENTRY_STATUS_QUERY, (queue_id,), fetch=True)
+    if result:
+        return result[0]
+    return find_archived_entry(queue_id, ENTRY_STATUS_COLUMNS)
+
+
+async def get_entry_status_async(queue_id):
+    """get_entry_status, awaited (ASGI server)"""
+    result = await execute_query_async(ENTRY_STATUS_QUERY, (queue_id,), fetch=True)
+    if result:
+        return result[0]
+    return await find_archived_entry_async(queue_id, ENTRY_STATUS_COLUMNS)
+
+
+def get_queue_position(queue_id):
+    """Stored queue position of an entry (or None)"""
+    query = "SELECT queue_position FROM queue_entries WHERE queue_id = %s"
+    result = execute_query(query, (queue_id,), fetch=True)
+    return result[0]['queue_position'] if result else None
+
+
+def get_position_and_doctor(queue_id):
+    """queue_position and doctor_id of an entry (or None)"""
+    query = """
+        SELECT queue_position, doctor_id
+        FROM queue_entries
+        WHERE queue_id = %s
+    """
+    result = execute_query(query, (queue_id,), fetch=True)
+    return result[0] if result else None
+
+
+def get_waiting_sort_keys(doctor_id):
+    """The columns DoctorQueue orders by (and the ETA model keys on), for a doctor's waiting rows"""
+    query = """
+        SELECT queue_id, priority_score, check_in_time, is_emergency, queue_position,
+               visit_type, symptom_severity
+        FROM queue_entries
+        WHERE doctor_id = %s AND status = 'Waiting'
+    """
+    return execute_query(query, (doctor_id,), fetch=True)
+
+
+def _waiting_queue_listing(doctor_id, after=None, limit=None):
+    """
+    A doctor's Waiting rows in service order, after a keyset cursor
+
+    The cursor is the last row's queue_id; the page continues from that
+    row's sort key (is_emergency, priority_score, check_in_time, queue_id),
+    which never changes, so check-ins and call-ins between pages do not
+    shift rows across the page boundary the way queue_position does.
+    """
+    params = []
+    cursor_join = after_clause = limit_clause = ""
+    if after is not None:
+        cursor_join = "JOIN queue_entries c ON c.queue_id = %s"
+        params.append(after)
+        after_clause = """
+            AND (q.is_emergency < c.is_emergency
+                 OR (q.is_emergency = c.is_emergency
+                     AND (q.priority_score < c.priority_score
+                          OR (q.priority_score = c.priority_score
+                              AND (q.check_in_time > c.check_in_time
+                                   OR (q.check_in_time = c.check_in_time
+                                       AND q.queue_id > c.queue_id))))))
+        """
+    params.append(doctor_id)
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+
+    query = f"""
+        SELECT
+            q.queue_id, q.token_number, q.queue_position,
+            q.priority_score, q.estimated_wait_time, q.estimated_wait_p90,
+            q.symptom_severity, q.is_emergency, q.notes,
+            p.first_name, p.last_name, q.age, p.chronic_conditions
+        FROM queue_entries q
+        JOIN patients p ON q.patient_id = p.patient_id
+        {cursor_join}
+        WHERE q.doctor_id = %s AND q.status = 'Waiting' {after_clause}
+        ORDER BY q.is_emergency DESC, q.priority_score DESC, q.check_in_time ASC, q.queue_id ASC
+        {limit_clause}
+    """
+    return query, tuple(params)
+
+
+def get_waiting_queue(doctor_id, after=None, limit=None):
+    """
+    A doctor's waiting patients with names, in queue order
+
+    Args:
+        doctor_id (int): Doctor
+        after (int): Keyset cursor, the queue_id of the previous page's last row
+        limit (int): Page size (None for the whole queue)
+    """
+    query, params = _waiting_queue_listing(doctor_id, after, limit)
+    return execute_query(query, params, fetch=True)
+
+
+async def get_waiting_queue_async(doctor_id, after=None, limit=None):
+    """get_waiting_queue, awaited (ASGI server)"""
+    query, params = _waiting_queue_listing(doctor_id, after, limit)
+    return await execute_query_async(query, params, fetch=True)
+
+
+CURRENT_ENTRY_QUERY = """
+    SELECT
+        q.*,
+        p.first_name, p.last_name, p.phone, p.chronic_conditions,
+        TIMESTAMPDIFF(MINUTE, q.consultation_start_time, NOW()) as elapsed_time
+    FROM queue_entries q
+    JOIN patients p ON q.patient_id = p.patient_id
+    WHERE q.doctor_id = %s AND q.status = 'In_Progress'
+    LIMIT 1
+"""
+
+
+def get_current_entry(doctor_id):
+    """The patient in consultation with a doctor, with elapsed minutes (or None)"""
+    result = execute_query(CURRENT_ENTRY_QUERY, (doctor_id,), fetch=True)
+    return result[0] if result else None
+
+
+async def get_current_entry_async(doctor_id):
+    """get_current_entry, awaited (ASGI server)"""
+    result = await execute_query_async(CURRENT_ENTRY_QUERY, (doctor_id,), fetch=True)
+    return result[0] if result else None
+
+
+def get_in_progress_timing(doctor_id):
+    """
+    Start, visit type and severity of a doctor's in-progress consultation
+
+    Returns:
+        dict or None: None if the doctor is free
+    """
+    query = """
+        SELECT consultation_start_time, visit_type, symptom_severity
+        FROM queue_entries
+        WHERE doctor_id = %s AND status = 'In_Progress'
+        ORDER BY consultation_start_time DESC
+        LIMIT 1
+    """
+    result = execute_query(query, (doctor_id,), fetch=True)
+    return result[0] if result else None
+
+
+def get_entry_state(queue_id):
+    """doctor_id and status of an entry still in queue_entries (or None)"""
+    query = "SELECT doctor_id, status FROM queue_entries WHERE queue_id = %s"
+    result = execute_query(query, (queue_id,), fetch=True)
+    return result[0] if result else None
+
+
+def mark_in_progress(queue_id, doctor_id):
+    """Move an entry to In_Progress and stamp consultation_start_time"""
+    query = """
+        UPDATE queue_entries
+        SET status = 'In_Progress',
+            consultation_start_time = NOW()
+        WHERE queue_id = %s AND doctor_id = %s
+    """
+    execute_query(query, (queue_id, doctor_id))
+
+
+def mark_completed(queue_id):
+    """Move an entry to Completed and stamp consultation_end_time"""
+    query = """
+        UPDATE queue_entries
+        SET status = 'Completed',
+            consultation_end_time = NOW()
+        WHERE queue_id = %s
+    """
+    execute_query(query, (queue_id,))
+
+
+def update_positions(changes):
+    """Write [(queue_id, position), ...] with one UPDATE"""
+    return bulk_update('queue_entries', 'queue_id', 'queue_position', changes,
+                       touch_updated_at=True)
+
+
+def update_wait_times(changes):
+    """Write [(queue_id, minutes), ...] with one UPDATE"""
+    return bulk_update('queue_entries', 'queue_id', 'estimated_wait_time', changes)
+
+
+def update_wait_ranges(changes):
+    """Write [(queue_id, p50_minutes, p90_minutes), ...] with one UPDATE"""
+    return bulk_update('queue_entries', 'queue_id',
+                       ('estimated_wait_time', 'estimated_wait_p90'), changes)
+
+
+def next_queue_version(doctor_id):
+    """
+    Hand out the doctor's next shared queue version (WORKERS > 1)
+
+    Same LAST_INSERT_ID(expr) counter idiom as the token sequences; inside
+    a queue command the doctor's row lock already orders the versions.
+    """
+    query = """
+        INSERT INTO queue_versions (doctor_id, version)
+        VALUES (%s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)
+    """
+    return execute_query(query, (doctor_id,))
+
+
+def get_queue_version(doctor_id):
+    """Last shared queue version handed out for a doctor (0 if none)"""
+    query = "SELECT version FROM queue_versions WHERE doctor_id = %s"
+    result = execute_query(query, (doctor_id,), fetch=True)
+    return result[0]['version'] if result else 0
+
+
+def get_board_rows(department_id=None):
+    """
+    Every doctor with their in-progress and waiting tokens, in one query
+
+    Doctors with nobody waiting come back once with NULL queue columns.
+
+    Args:
+        department_id (int): Limit to one department, None for the whole hospital
+
+    Returns:
+        list: Rows ordered by doctor, then queue position
+    """
+    query = """
+        SELECT
+            d.doctor_id, d.doctor_name, d.specialization, d.department_id,
+            d.current_status,
+            q.queue_id, q.token_number, q.status, q.queue_position,
+            q.estimated_wait_time, q.is_emergency, q.consultation_start_time
+        FROM doctors d
+        LEFT JOIN queue_entries q
+            ON q.doctor_id = d.doctor_id AND q.status IN ('Waiting', 'In_Progress')
+        WHERE %s IS NULL OR d.department_id = %s
+        ORDER BY d.doctor_id, q.queue_position
+    """
+    return execute_query(query, (department_id, department_id), fetch=True)
@@ -0,0 +1,129 @@
+from flask_socketio import SocketIO, join_room, leave_room
+from models.database import current_unit_of_work
+from models.doctor import get_doctor
+from models.queue import queue_changes
+from models.queue_entries import next_queue_version, get_queue_version
+from algorithms.queue_manager import drop_doctor_queue
+from bus import bus
+from config import Config
+
+# Shared SocketIO instance, bound to the app in app.py
+socketio = SocketIO()
+
+
+def doctor_room(doctor_id):
+    return f"doctor:{doctor_id}"
+
+
+def department_room(department_id):
+    return f"department:{department_id}"
+
+
+def doctor_department(doctor_id):
+    """Department a doctor belongs to, from the reference cache"""
+    doctor = get_doctor(doctor_id)
+    return doctor['department_id'] if doctor else None
+
+
+def _rooms_for(data):
+    """Rooms a client asked to follow: {'doctor_id': 1} and/or {'department_id': 2}"""
+    rooms = []
+    if data.get('doctor_id') is not None:
+        rooms.append(doctor_room(int(data['doctor_id'])))
+    if data.get('department_id') is not None:
+        rooms.append(department_room(int(data['department_id'])))
+    return rooms
+
+
+@socketio.on('join')
+def on_join(data):
+    """Subscribe the client to queue deltas for a doctor and/or department"""
+    rooms = _rooms_for(data or {})
+    for room in rooms:
+        join_room(room)
+    return {'joined': rooms}
+
+
+@socketio.on('leave')
+def on_leave(data):
+    """Stop receiving deltas for a doctor and/or department"""
+    for room in _rooms_for(data or {}):
+        leave_room(room)
+
+
+def publish_queue_event(event_type, doctor_id, payload, department_id=None):
+    """
+    Push a queue delta to every client following the doctor or department
+
+    Delta types:
+        entry_added      - a patient joined the waiting queue ('entry')
+        entries_moved    - new positions / wait times ('entries')
+        entry_called     - a waiting patient was called in ('queue_id')
+        entry_completed  - the consultation ended ('queue_id', 'next_patient')
+
+    Every delta bumps the doctor's queue version (models.queue.queue_changes),
+    which drives the ETag / ?since= support on the GET endpoints. With
+    several workers the version is taken from the shared counter here,
+    in the transaction of the change, and travels with the delta.
+
+    Inside a transaction the event is sent only after commit, so clients
+    never see changes that were rolled back. Other workers get the delta
+    over the invalidation bus (see _apply_remote_delta).
+    """
+    if department_id is None:
+        department_id = doctor_department(doctor_id)
+
+    message = dict(payload, type=event_type, doctor_id=doctor_id)
+    rooms = [doctor_room(doctor_id)]
+    if department_id is not None:
+        message['department_id'] = department_id
+        rooms.append(department_room(department_id))
+
+    shared_version = next_queue_version(doctor_id) if queue_changes.shared else None
+
+    def emit():
+        message['version'] = queue_changes.record(doctor_id, message, shared_version)
+        if socketio.server is not None:    # not bound when run from a CLI
+            socketio.emit('queue_delta', message, to=rooms)
+        bus.publish('queue_delta', doctor_id=doctor_id, delta=message)
+
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.after_commit(emit)
+    else:
+        emit()
+
+
+def _apply_remote_delta(message):
+    """
+    Another worker changed a doctor's queue: reload the resident queue on
+    next use and record the delta under its shared version (which also
+    bumps the board versions and updates the assignment heaps). Clients
+    already got the emit through the Socket.IO message queue.
+    """
+    drop_doctor_queue(message['doctor_id'])
+    delta = message['delta']
+    queue_changes.record(message['doctor_id'], delta, delta.get('version'))
+
+
+bus.on('queue_delta', _apply_remote_delta)
+
+# Several workers: one version sequence per doctor for all of them
+if Config.WORKERS > 1:
+    queue_changes.use_shared_versions(get_queue_version, Config.QUEUE_EPOCH)
+
+
+def moved_entries(estimates):
+    """
+    Build the entries_moved payload from recalculate_wait_times output
+
+    Args:
+        estimates (dict): queue_id -> wait time, in queue order
+
+    Returns:
+        list: [{'queue_id', 'queue_position', 'estimated_wait_time'}, ...]
+    """
+    return [
+        {'queue_id': queue_id, 'queue_position': position, 'estimated_wait_time': wait_time}
+        for position, (queue_id, wait_time) in enumerate(estimates.items(), start=1)
+    ]
@@ -0,0 +1,145 @@
+from flask import Blueprint, request, jsonify
+from models.cache import cache_stats
+from models.event_sink import event_sink, get_events_page, stream_events
+from models.history import get_history_page, stream_history
+from models.query_stats import query_stats
+from models.database import pool_metrics
+from routes.listing import page_args, page_body, wants_ndjson, ndjson_response
+from config import Config
+from bus import bus
+from algorithms.queue_executor import executor_stats
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss counters for the reference data caches"""
+    try:
+        return jsonify({
+            'success': True,
+            'caches': cache_stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/bus', methods=['GET'])
+def get_bus_stats():
+    """Messages this worker exchanged with the other workers (WORKERS > 1)"""
+    try:
+        return jsonify({
+            'success': True,
+            'started': bus.started,
+            'worker_id': bus.worker_id,
+            'stats': bus.stats
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/queue-executors', methods=['GET'])
+def get_queue_executor_stats():
+    """Commands and batches per doctor command executor"""
+    try:
+        return jsonify({
+            'success': True,
+            'executors': executor_stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/event-sink', methods=['GET'])
+def get_event_sink_metrics():
+    """Queue depth and flush latency of the system_events writer"""
+    try:
+        return jsonify({
+            'success': True,
+            'event_sink': event_sink.metrics()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """Most recent statements slower than SLOW_QUERY_MS"""
+    try:
+        return jsonify({
+            'success': True,
+            'threshold_ms': query_stats.slow_query_ms,
+            'slow_queries': query_stats.snapshot()['slow_queries']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/pool', methods=['GET'])
+def get_pool_metrics():
+    """Connection pool utilisation, waits, timeouts and suspected leaks"""
+    try:
+        return jsonify({
+            'success': True,
+            'pool': pool_metrics()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/history', methods=['GET'])
+def list_history():
+    """
+    Consultation history export
+    
+    ?doctor_id= filters, ?after=<history_id>&limit= pages, and
+    ?format=ndjson streams every matching row from a server-side cursor.
+    """
+    try:
+        doctor_id = request.args.get('doctor_id', type=int)
+        after, limit = page_args()
+        if wants_ndjson():
+            return ndjson_response(stream_history(doctor_id, after, Config.STREAM_CHUNK_SIZE))
+        
+        page = page_body(get_history_page(doctor_id, after, limit + 1), limit, 'history_id')
+        return jsonify({
+            'success': True,
+            'history': page.pop('items'),
+            **page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/events', methods=['GET'])
+def list_events():
+    """
+    System event export
+    
+    ?event_type= and ?doctor_id= filter, ?after=<event_id>&limit= pages,
+    and ?format=ndjson streams every matching row from a server-side cursor.
+    """
+    try:
+        event_type = request.args.get('event_type')
+        doctor_id = request.args.get('doctor_id', type=int)
+        after, limit = page_args()
+        if wants_ndjson():
+            return ndjson_response(
+                stream_events(event_type, doctor_id, after, Config.STREAM_CHUNK_SIZE)
+            )
+        
+        page = page_body(get_events_page(event_type, doctor_id, after, limit + 1), limit, 'event_id')
+        return jsonify({
+            'success': True,
+            'events': page.pop('items'),
+            **page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,54 @@
+from flask import Blueprint, request, jsonify
+from algorithms.rollups import query_rollups
+from datetime import datetime, timedelta
+
+bp = Blueprint('analytics', __name__)
+
+GROUP_BY = ('hour', 'doctor', 'department', 'total')
+
+
+def _parse_moment(value, default):
+    """YYYY-MM-DD or YYYY-MM-DDTHH:MM query parameter"""
+    return datetime.fromisoformat(value) if value else default
+
+
+@bp.route('/operations', methods=['GET'])
+def get_operations():
+    """
+    Check-ins, consultations, no-shows, wait and consultation-time
+    mean / p50 / p90 from the hourly rollups
+    
+    Query parameters:
+        start, end    - range (default: today)
+        doctor_id     - one doctor
+        department_id - one department
+        group_by      - hour (default), doctor, department or total
+    """
+    try:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = _parse_moment(request.args.get('start'), today)
+        end = _parse_moment(request.args.get('end'), start + timedelta(days=1))
+        group_by = request.args.get('group_by', 'hour')
+        
+        if group_by not in GROUP_BY:
+            return jsonify({'error': f'group_by must be one of {GROUP_BY}'}), 400
+        
+        rows = query_rollups(
+            start, end,
+            doctor_id=request.args.get('doctor_id', type=int),
+            department_id=request.args.get('department_id', type=int),
+            group_by=group_by
+        )
+        
+        return jsonify({
+            'success': True,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'group_by': group_by,
+            'rows': rows
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,238 @@
+"""
+Doctor API for the ASGI server (asgi.py)
+
+Same endpoints and responses as routes/doctor.py. Reads await the async
+pool, and independent reads in one response run concurrently; the
+consultation commands go to the doctor's executor and are awaited
+without holding a thread.
+"""
+from quart import Blueprint, Response, current_app, request, jsonify, make_response
+from models.queue import queue_changes
+from models.queue_entries import get_waiting_queue_async, get_current_entry_async
+from models.history import get_history_page_async, stream_history_async
+from algorithms.queue_executor import run_queue_command_async, QueueCommandTimeout
+from algorithms.queue_commands import (
+    start_consultation_command, end_consultation_command, QueueEntryNotFound, QueueEntryStateError
+)
+from algorithms.consultation_stats import get_consultation_stats_async
+from routes.listing import NDJSON_MIMETYPE, page_args, page_body, wants_ndjson
+from config import Config
+import asyncio
+
+bp = Blueprint('async_doctor', __name__)
+
+async def _conditional_queue_response(doctor_id, build_response):
+    """
+    routes.doctor._conditional_queue_response with an async build_response()
+
+    304s and ?since= deltas come from the in-memory change log without
+    awaiting anything.
+    """
+    etag = queue_changes.etag(doctor_id)
+    version = queue_changes.version(doctor_id)
+
+    if request.if_none_match.contains(etag):
+        response = await make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    since = request.args.get('since', type=int)
+    if since is not None:
+        changes = queue_changes.changes_since(doctor_id, since, request.args.get('epoch', type=int))
+        if changes is not None:
+            response = jsonify({
+                'success': True,
+                'version': version,
+                'epoch': queue_changes.epoch,
+                'changes': changes
+            })
+            response.set_etag(etag)
+            return response
+
+    body = await build_response()
+    body['version'] = version
+    body['epoch'] = queue_changes.epoch
+    response = jsonify(body)
+    response.set_etag(etag)
+    return response
+
+
+def ndjson_response(rows):
+    """Stream an async generator of rows as NDJSON"""
+    dumps = current_app.json.dumps
+
+    async def generate():
+        try:
+            async for row in rows:
+                yield dumps(row) + '\n'
+        finally:
+            # Releases the cursor's connection if the client disconnects
+            await rows.aclose()
+
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+
+@bp.route('/<int:doctor_id>/queue', methods=['GET'])
+async def get_doctor_queue(doctor_id):
+    """Get all waiting patients for a doctor (see routes/doctor.py)"""
+    async def build_response():
+        if 'limit' not in request.args and 'after' not in request.args:
+            queue = await get_waiting_queue_async(doctor_id)
+
+            return {
+                'success': True,
+                'total_waiting': len(queue),
+                'queue': queue
+            }
+
+        after, limit = page_args(request)
+        page = page_body(await get_waiting_queue_async(doctor_id, after, limit + 1), limit, 'queue_id')
+        return {
+            'success': True,
+            'queue': page.pop('items'),
+            **page
+        }
+
+    try:
+        return await _conditional_queue_response(doctor_id, build_response)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/current', methods=['GET'])
+async def get_current_patient(doctor_id):
+    """Get patient currently being consulted (see routes/doctor.py)"""
+    async def build_response():
+        current = await get_current_entry_async(doctor_id)
+
+        if not current:
+            return {'message': 'No patient in consultation'}
+
+        return current
+
+    try:
+        return await _conditional_queue_response(doctor_id, build_response)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/overview', methods=['GET'])
+async def get_doctor_overview(doctor_id):
+    """Current patient, waiting queue and stats, read concurrently"""
+    async def build_response():
+        current, queue, stats = await asyncio.gather(
+            get_current_entry_async(doctor_id),
+            get_waiting_queue_async(doctor_id),
+            get_consultation_stats_async(doctor_id)
+        )
+
+        return {
+            'success': True,
+            'current': current,
+            'queue': queue,
+            'total_waiting': len(queue),
+            'stats': stats.to_dict()
+        }
+
+    try:
+        return await _conditional_queue_response(doctor_id, build_response)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/history', methods=['GET'])
+async def get_doctor_history(doctor_id):
+    """A doctor's past consultations, oldest first (see routes/doctor.py)"""
+    try:
+        after, limit = page_args(request)
+        if wants_ndjson(request):
+            return ndjson_response(stream_history_async(doctor_id, after, Config.STREAM_CHUNK_SIZE))
+
+        page = page_body(await get_history_page_async(doctor_id, after, limit + 1), limit, 'history_id')
+        return jsonify({
+            'success': True,
+            'doctor_id': doctor_id,
+            'history': page.pop('items'),
+            **page
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/stats', methods=['GET'])
+async def get_doctor_stats(doctor_id):
+    """Running consultation-time stats (count, mean, EWMA, p50/p90)"""
+    try:
+        stats = await get_consultation_stats_async(doctor_id)
+        return jsonify(dict(stats.to_dict(), success=True, doctor_id=doctor_id)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/start-consultation', methods=['POST'])
+async def start_consultation(doctor_id):
+    """Start consultation with next patient (see routes/doctor.py)"""
+    try:
+        data = await request.get_json()
+        queue_id = data.get('queue_id')
+
+        if not queue_id:
+            return jsonify({'error': 'queue_id required'}), 400
+
+        # Serialized with the doctor's other queue changes
+        await run_queue_command_async(doctor_id, start_consultation_command(doctor_id, queue_id))
+
+        return jsonify({
+            'success': True,
+            'message': 'Consultation started'
+        }), 200
+
+    except QueueEntryNotFound as e:
+        return jsonify({'error': str(e)}), 404
+
+    except QueueEntryStateError as e:
+        return jsonify({'error': str(e)}), 409
+
+    except QueueCommandTimeout as e:
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/end-consultation', methods=['POST'])
+async def end_consultation(doctor_id):
+    """End current consultation (see routes/doctor.py)"""
+    try:
+        data = await request.get_json()
+        queue_id = data.get('queue_id')
+
+        if not queue_id:
+            return jsonify({'error': 'queue_id required'}), 400
+
+        actual_time, next_patient = await run_queue_command_async(doctor_id, end_consultation_command(
+            doctor_id, queue_id, data.get('notes', ''), data.get('diagnosis', '')
+        ))
+
+        return jsonify({
+            'success': True,
+            'consultation_time': actual_time,
+            'next_patient': next_patient
+        }), 200
+
+    except QueueEntryNotFound as e:
+        return jsonify({'error': str(e)}), 404
+
+    except QueueEntryStateError as e:
+        return jsonify({'error': str(e)}), 409
+
+    except QueueCommandTimeout as e:
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,109 @@
+"""
+Patient API for the ASGI server (asgi.py)
+
+Same endpoints and responses as routes/patient.py. Check-ins are awaited
+on the doctor's command executor; doctor assignment and bulk imports,
+which use the synchronous pool, run in a worker thread.
+"""
+from quart import Blueprint, request, jsonify
+from models.patient import get_patient_async
+from models.doctor import get_doctor_async
+from models.queue_entries import get_entry_status_async
+from algorithms.queue_executor import run_queue_command_async, QueueCommandTimeout
+from algorithms.queue_commands import CHECK_IN_REQUIRED_FIELDS, check_in_command
+from algorithms.assignment import assign_doctor, release_assignment
+from algorithms.bulk_checkin import parse_check_ins, bulk_check_in
+import asyncio
+
+bp = Blueprint('async_patient', __name__)
+
+@bp.route('/checkin', methods=['POST'])
+async def check_in_patient():
+    """Patient check-in endpoint (see routes/patient.py)"""
+    try:
+        data = await request.get_json()
+
+        # Validate required fields
+        for field in CHECK_IN_REQUIRED_FIELDS:
+            if field not in data:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+
+        # Get patient age and chronic conditions (reference cache)
+        patient = await get_patient_async(data['patient_id'])
+
+        if not patient:
+            return jsonify({'error': 'Patient not found'}), 404
+
+        # No doctor chosen: least projected wait in the department
+        assigned = data.get('doctor_id') is None
+        if assigned:
+            try:
+                assignment = await asyncio.to_thread(assign_doctor, data['department_id'])
+                data['doctor_id'] = assignment['doctor_id']
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 409
+
+        # Serialized with the doctor's other queue changes (one transaction per batch)
+        try:
+            body = await run_queue_command_async(data['doctor_id'], check_in_command(data, patient))
+        except Exception:
+            if assigned:
+                release_assignment(data['doctor_id'], data['department_id'])
+            raise
+
+        return jsonify(dict(body, assigned=assigned)), 201
+
+    except QueueCommandTimeout as e:
+        # Cancelled before it ran: nothing was written, the client may retry
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        print(f"❌ Check-in error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/bulk-checkin', methods=['POST'])
+async def bulk_check_in_patients():
+    """Bulk check-in / appointment import (see routes/patient.py)"""
+    try:
+        try:
+            rows = parse_check_ins(await request.get_data(as_text=True), request.content_type)
+        except ValueError as e:
+            return jsonify({'error': f'Could not parse upload: {e}'}), 400
+
+        summary = await asyncio.to_thread(bulk_check_in, rows)
+
+        return jsonify(dict(summary, success=True)), 200
+
+    except Exception as e:
+        print(f"❌ Bulk check-in error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/queue-status/<int:queue_id>', methods=['GET'])
+async def get_queue_status(queue_id):
+    """Get current status of a patient in queue"""
+    try:
+        entry = await get_entry_status_async(queue_id)
+
+        if not entry:
+            return jsonify({'error': 'Queue entry not found'}), 404
+
+        # Names come from the reference caches, both looked up at once
+        patient, doctor = await asyncio.gather(
+            get_patient_async(entry.pop('patient_id')),
+            get_doctor_async(entry.pop('doctor_id'))
+        )
+        patient, doctor = patient or {}, doctor or {}
+        entry['first_name'] = patient.get('first_name')
+        entry['last_name'] = patient.get('last_name')
+        entry['doctor_name'] = doctor.get('doctor_name')
+        entry['wait_range'] = {
+            'p50': entry['estimated_wait_time'],
+            'p90': entry.pop('estimated_wait_p90', None)
+        }
+
+        return jsonify(entry), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
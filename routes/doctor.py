@@ -1,57 +1,172 @@
-from flask import Blueprint, request, jsonify
-from models.database import execute_query
-from algorithms.wait_time import recalculate_wait_times
-from datetime import datetime
+from flask import Blueprint, request, jsonify, make_response
+from models.queue import queue_changes
+from models.queue_entries import get_waiting_queue, get_current_entry
+from models.history import get_history_page, stream_history
+from algorithms.queue_executor import run_queue_command, QueueCommandTimeout
+from algorithms.queue_commands import (
+    start_consultation_command, end_consultation_command, QueueEntryNotFound, QueueEntryStateError
+)
+from algorithms.consultation_stats import get_consultation_stats
+from routes.listing import page_args, page_body, wants_ndjson, ndjson_response
+from config import Config
 
 bp = Blueprint('doctor', __name__)
 
+def _conditional_queue_response(doctor_id, build_response):
+    """
+    Serve a doctor queue endpoint with ETag / If-None-Match and ?since= support
+    
+    Answers 304 or a list of deltas straight from the in-memory change log;
+    build_response() (the database query) only runs for a full reload.
+    Responses carry the version and its epoch; a ?since= sent with another
+    ?epoch= (a restart since) gets the full reload.
+    """
+    etag = queue_changes.etag(doctor_id)
+    version = queue_changes.version(doctor_id)
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    
+    since = request.args.get('since', type=int)
+    if since is not None:
+        changes = queue_changes.changes_since(doctor_id, since, request.args.get('epoch', type=int))
+        if changes is not None:
+            response = jsonify({
+                'success': True,
+                'version': version,
+                'epoch': queue_changes.epoch,
+                'changes': changes
+            })
+            response.set_etag(etag)
+            return response
+    
+    body = build_response()
+    body['version'] = version
+    body['epoch'] = queue_changes.epoch
+    response = jsonify(body)
+    response.set_etag(etag)
+    return response
+
+
 @bp.route('/<int:doctor_id>/queue', methods=['GET'])
 def get_doctor_queue(doctor_id):
-    """Get all waiting patients for a doctor"""
+    """
+    Get all waiting patients for a doctor
+    
+    Supports If-None-Match (304 when unchanged) and ?since=<version>&epoch=<epoch>
+    (only the deltas published after that version). With ?limit= the
+    queue is paged in service order: pass the returned next_after (the
+    last row's queue_id) as ?after=.
+    """
+    def build_response():
+        if 'limit' not in request.args and 'after' not in request.args:
+            queue = get_waiting_queue(doctor_id)
+            
+            return {
+                'success': True,
+                'total_waiting': len(queue),
+                'queue': queue
+            }
+        
+        after, limit = page_args()
+        page = page_body(get_waiting_queue(doctor_id, after, limit + 1), limit, 'queue_id')
+        return {
+            'success': True,
+            'queue': page.pop('items'),
+            **page
+        }
+    
+    try:
+        return _conditional_queue_response(doctor_id, build_response)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/current', methods=['GET'])
+def get_current_patient(doctor_id):
+    """
+    Get patient currently being consulted
+    
+    Shares the queue version, so If-None-Match / ?since= work as for /queue.
+    elapsed_time is as of the version's first fetch; clients that need a
+    live timer should count from consultation_start_time.
+    """
+    def build_response():
+        current = get_current_entry(doctor_id)
+        
+        if not current:
+            return {'message': 'No patient in consultation'}
+        
+        return current
+    
     try:
-        query = """
-            SELECT 
-                q.queue_id, q.token_number, q.queue_position,
-                q.priority_score, q.estimated_wait_time, q.symptom_severity,
-                q.is_emergency, q.notes,
-                p.first_name, p.last_name, p.age, p.chronic_conditions
-            FROM queue_entries q
-            JOIN patients p ON q.patient_id = p.patient_id
-            WHERE q.doctor_id = %s AND q.status = 'Waiting'
-            ORDER BY q.queue_position ASC
-        """
-        queue = execute_query(query, (doctor_id,), fetch=True)
+        return _conditional_queue_response(doctor_id, build_response)
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/history', methods=['GET'])
+def get_doctor_history(doctor_id):
+    """
+    A doctor's past consultations, oldest first
+    
+    Paged with ?after=<history_id>&limit=, or streamed whole as NDJSON
+    with ?format=ndjson (Accept: application/x-ndjson).
+    """
+    try:
+        after, limit = page_args()
+        if wants_ndjson():
+            return ndjson_response(stream_history(doctor_id, after, Config.STREAM_CHUNK_SIZE))
+        
+        page = page_body(get_history_page(doctor_id, after, limit + 1), limit, 'history_id')
         return jsonify({
             'success': True,
-            'total_waiting': len(queue),
-            'queue': queue
+            'doctor_id': doctor_id,
+            'history': page.pop('items'),
+            **page
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@bp.route('/<int:doctor_id>/current', methods=['GET'])
-def get_current_patient(doctor_id):
-    """Get patient currently being consulted"""
+@bp.route('/<int:doctor_id>/stats', methods=['GET'])
+def get_doctor_stats(doctor_id):
+    """Running consultation-time stats (count, mean, EWMA, p50/p90)"""
     try:
-        query = """
-            SELECT 
-                q.*, 
-                p.first_name, p.last_name, p.phone, p.chronic_conditions,
-                TIMESTAMPDIFF(MINUTE, q.consultation_start_time, NOW()) as elapsed_time
-            FROM queue_entries q
-            JOIN patients p ON q.patient_id = p.patient_id
-            WHERE q.doctor_id = %s AND q.status = 'In_Progress'
-            LIMIT 1
-        """
-        result = execute_query(query, (doctor_id,), fetch=True)
-        
-        if not result:
-            return jsonify({'message': 'No patient in consultation'}), 200
-        
-        return jsonify(result[0]), 200
+        stats = get_consultation_stats(doctor_id)
+        return jsonify(dict(stats.to_dict(), success=True, doctor_id=doctor_id)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:doctor_id>/overview', methods=['GET'])
+def get_doctor_overview(doctor_id):
+    """
+    Current patient, waiting queue and stats in one response
+    
+    Shares the queue version, so If-None-Match / ?since= work as for /queue.
+    """
+    def build_response():
+        current = get_current_entry(doctor_id)
+        queue = get_waiting_queue(doctor_id)
+        stats = get_consultation_stats(doctor_id)
+        
+        return {
+            'success': True,
+            'current': current,
+            'queue': queue,
+            'total_waiting': len(queue),
+            'stats': stats.to_dict()
+        }
+    
+    try:
+        return _conditional_queue_response(doctor_id, build_response)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -74,38 +189,23 @@ def start_consultation(doctor_id):
         if not queue_id:
             return jsonify({'error': 'queue_id required'}), 400
         
-        # Update queue entry
-        update_queue = """
-            UPDATE queue_entries
-            SET status = 'In_Progress', 
-                consultation_start_time = NOW()
-            WHERE queue_id = %s AND doctor_id = %s
-        """
-        execute_query(update_queue, (queue_id, doctor_id))
-        
-        # Update doctor status
-        update_doctor = """
-            UPDATE doctors
-            SET current_status = 'Busy'
-            WHERE doctor_id = %s
-        """
-        execute_query(update_doctor, (doctor_id,))
-        
-        # Recalculate wait times
-        recalculate_wait_times(doctor_id)
-        
-        # Log event
-        log_query = """
-            INSERT INTO system_events (event_type, queue_id, doctor_id)
-            VALUES ('Consultation_Start', %s, %s)
-        """
-        execute_query(log_query, (queue_id, doctor_id))
+        # Serialized with the doctor's other queue changes
+        run_queue_command(doctor_id, start_consultation_command(doctor_id, queue_id))
         
         return jsonify({
             'success': True,
             'message': 'Consultation started'
         }), 200
         
+    except QueueEntryNotFound as e:
+        return jsonify({'error': str(e)}), 404
+        
+    except QueueEntryStateError as e:
+        return jsonify({'error': str(e)}), 409
+        
+    except QueueCommandTimeout as e:
+        return jsonify({'error': str(e)}), 503
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -126,80 +226,29 @@ def end_consultation(doctor_id):
         data = request.json
         queue_id = data.get('queue_id')
         
-        # Mark consultation complete
-        update_query = """
-            UPDATE queue_entries
-            SET status = 'Completed',
-                consultation_end_time = NOW()
-            WHERE queue_id = %s
-        """
-        execute_query(update_query, (queue_id,))
-        
-        # Calculate actual consultation time
-        time_query = """
-            SELECT 
-                patient_id,
-                TIMESTAMPDIFF(MINUTE, consultation_start_time, consultation_end_time) as duration
-            FROM queue_entries WHERE queue_id = %s
-        """
-        time_result = execute_query(time_query, (queue_id,), fetch=True)
-        actual_time = time_result[0]['duration']
-        patient_id = time_result[0]['patient_id']
-        
-        # Save to history
-        history_query = """
-            INSERT INTO consultation_history 
-            (queue_id, patient_id, doctor_id, actual_consultation_time, 
-             consultation_notes, diagnosis)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        execute_query(history_query, (
-            queue_id, patient_id, doctor_id, actual_time,
-            data.get('notes', ''), data.get('diagnosis', '')
-        ))
+        if not queue_id:
+            return jsonify({'error': 'queue_id required'}), 400
         
-        # Update doctor's average consultation time
-        avg_query = """
-            UPDATE doctors
-            SET average_consultation_time = (
-                SELECT AVG(actual_consultation_time)
-                FROM consultation_history
-                WHERE doctor_id = %s
-            )
-            WHERE doctor_id = %s
-        """
-        execute_query(avg_query, (doctor_id, doctor_id))
-        
-        # Set doctor as available
-        status_query = """
-            UPDATE doctors
-            SET current_status = 'Available'
-            WHERE doctor_id = %s
-        """
-        execute_query(status_query, (doctor_id,))
-        
-        # Get next patient
-        next_query = """
-            SELECT queue_id, token_number
-            FROM queue_entries
-            WHERE doctor_id = %s AND status = 'Waiting'
-            ORDER BY queue_position ASC
-            LIMIT 1
-        """
-        next_patient = execute_query(next_query, (doctor_id,), fetch=True)
-        
-        # Log event
-        log_query = """
-            INSERT INTO system_events (event_type, queue_id, doctor_id)
-            VALUES ('Consultation_End', %s, %s)
-        """
-        execute_query(log_query, (queue_id, doctor_id))
+        # Everything below commits once, or not at all, serialized with the
+        # doctor's other queue changes
+        actual_time, next_patient = run_queue_command(doctor_id, end_consultation_command(
+            doctor_id, queue_id, data.get('notes', ''), data.get('diagnosis', '')
+        ))
         
         return jsonify({
             'success': True,
             'consultation_time': actual_time,
-            'next_patient': next_patient[0] if next_patient else None
+            'next_patient': next_patient
         }), 200
         
+    except QueueEntryNotFound as e:
+        return jsonify({'error': str(e)}), 404
+        
+    except QueueEntryStateError as e:
+        return jsonify({'error': str(e)}), 409
+        
+    except QueueCommandTimeout as e:
+        return jsonify({'error': str(e)}), 503
+        
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,63 @@
+from flask import request, current_app, Response
+from config import Config
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def page_args(current_request=None):
+    """
+    Keyset pagination arguments from the query string
+
+    Args:
+        current_request: Request to read (default: Flask's request; the
+            ASGI routes pass Quart's)
+
+    Returns:
+        tuple: (after, limit); after is None for the first page
+    """
+    args = (current_request or request).args
+    after = args.get('after', type=int)
+    limit = args.get('limit', default=Config.PAGE_DEFAULT_LIMIT, type=int)
+    return after, max(1, min(limit, Config.PAGE_MAX_LIMIT))
+
+
+def wants_ndjson(current_request=None):
+    """?format=ndjson or Accept: application/x-ndjson"""
+    current_request = current_request or request
+    if current_request.args.get('format') == 'ndjson':
+        return True
+    return current_request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def page_body(rows, limit, key):
+    """
+    Page of rows fetched with limit + 1, plus the cursor for the next page
+
+    Returns:
+        dict: {'items', 'count', 'has_more', 'next_after'}
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'items': rows,
+        'count': len(rows),
+        'has_more': has_more,
+        'next_after': rows[-1][key] if has_more else None
+    }
+
+
+def ndjson_response(rows):
+    """Stream rows as one JSON document per line, without building a list"""
+    dumps = current_app.json.dumps
+
+    def generate():
+        try:
+            for row in rows:
+                yield dumps(row) + '\n'
+        finally:
+            # Releases the cursor's connection if the client disconnects
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
+
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
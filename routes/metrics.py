@@ -0,0 +1,136 @@
+from flask import Blueprint, Response, request
+from config import Config
+from models.cache import cache_stats
+from models.event_sink import event_sink
+from models.database import pool_metrics
+from models.query_stats import (
+    query_stats, begin_request, end_request, current_request_stats
+)
+
+bp = Blueprint('metrics', __name__)
+
+
+def init_request_metrics(app):
+    """Count queries per request; optionally report them in response headers"""
+
+    @app.before_request
+    def start_query_count():
+        begin_request(request.endpoint or request.path)
+
+    @app.after_request
+    def add_query_headers(response):
+        stats = current_request_stats()
+        if Config.DB_TIMING_HEADERS and stats is not None:
+            response.headers['X-DB-Queries'] = str(stats.queries)
+            response.headers['Server-Timing'] = stats.server_timing()
+            if stats.slowest[1] is not None:
+                response.headers['X-DB-Slowest-Query'] = stats.slowest[1][:200]
+        return response
+
+    @app.teardown_request
+    def finish_query_count(error=None):
+        end_request()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram(lines, name, labels, count, total, cumulative):
+    prefix = f'{labels},' if labels else ''
+    for bound, running in cumulative:
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {running}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {total:.6f}')
+    lines.append(f'{name}_count{suffix} {count}')
+
+
+def render_metrics():
+    """All counters in the Prometheus text exposition format"""
+    snapshot = query_stats.snapshot()
+    lines = []
+
+    lines.append('# HELP opd_db_query_duration_seconds Statement latency by normalized fingerprint')
+    lines.append('# TYPE opd_db_query_duration_seconds histogram')
+    for key, (count, total, _, cumulative) in snapshot['statements'].items():
+        _histogram(lines, 'opd_db_query_duration_seconds', f'statement="{_label(key)}"',
+                   count, total, cumulative)
+
+    lines.append('# HELP opd_db_query_max_seconds Slowest execution seen per fingerprint')
+    lines.append('# TYPE opd_db_query_max_seconds gauge')
+    for key, (_, _, slowest, _) in snapshot['statements'].items():
+        lines.append(f'opd_db_query_max_seconds{{statement="{_label(key)}"}} {slowest:.6f}')
+
+    lines.append('# HELP opd_db_query_errors_total Failed statements per fingerprint')
+    lines.append('# TYPE opd_db_query_errors_total counter')
+    for key, errors in snapshot['errors'].items():
+        lines.append(f'opd_db_query_errors_total{{statement="{_label(key)}"}} {errors}')
+
+    lines.append('# HELP opd_db_pool_checkout_wait_seconds Time spent waiting for a connection')
+    lines.append('# TYPE opd_db_pool_checkout_wait_seconds histogram')
+    count, total, cumulative = snapshot['checkout_wait']
+    _histogram(lines, 'opd_db_pool_checkout_wait_seconds', '', count, total, cumulative)
+
+    lines.append('# HELP opd_db_slow_queries Statements over SLOW_QUERY_MS kept in the slow log')
+    lines.append('# TYPE opd_db_slow_queries gauge')
+    lines.append(f'opd_db_slow_queries {len(snapshot["slow_queries"])}')
+
+    for metric, key, help_text in (
+        ('opd_endpoint_requests_total', 'requests', 'Requests per endpoint'),
+        ('opd_endpoint_db_queries_total', 'queries', 'Statements run per endpoint'),
+        ('opd_endpoint_db_seconds_total', 'db_seconds', 'DB time per endpoint')
+    ):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for endpoint, totals in snapshot['endpoints'].items():
+            value = totals[key]
+            if isinstance(value, float):
+                value = f'{value:.6f}'
+            lines.append(f'{metric}{{endpoint="{_label(endpoint)}"}} {value}')
+
+    caches = cache_stats()
+    for metric, key, kind in (
+        ('opd_cache_hits_total', 'hits', 'counter'),
+        ('opd_cache_misses_total', 'misses', 'counter'),
+        ('opd_cache_evictions_total', 'evictions', 'counter'),
+        ('opd_cache_size', 'size', 'gauge')
+    ):
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, stats in caches.items():
+            lines.append(f'{metric}{{cache="{_label(name)}"}} {stats[key]}')
+
+    sink = event_sink.metrics()
+    for metric, key, kind in (
+        ('opd_event_sink_queue_depth', 'queue_depth', 'gauge'),
+        ('opd_event_sink_written_total', 'written', 'counter'),
+        ('opd_event_sink_dropped_total', 'dropped', 'counter'),
+        ('opd_event_sink_spilled_total', 'spilled', 'counter'),
+        ('opd_event_sink_failed_flushes_total', 'failed_flushes', 'counter')
+    ):
+        lines.append(f'# TYPE {metric} {kind}')
+        lines.append(f'{metric} {sink[key]}')
+
+    pool = pool_metrics()
+    for metric, key, kind in (
+        ('opd_db_pool_capacity', 'capacity', 'gauge'),
+        ('opd_db_pool_in_use', 'in_use', 'gauge'),
+        ('opd_db_pool_idle', 'idle', 'gauge'),
+        ('opd_db_pool_utilisation', 'utilisation', 'gauge'),
+        ('opd_db_pool_checkouts_total', 'checkouts', 'counter'),
+        ('opd_db_pool_waits_total', 'waits', 'counter'),
+        ('opd_db_pool_timeouts_total', 'timeouts', 'counter'),
+        ('opd_db_pool_recycled_total', 'recycled', 'counter'),
+        ('opd_db_pool_failed_pings_total', 'failed_pings', 'counter'),
+        ('opd_db_pool_suspected_leaks', 'suspected_leaks', 'gauge')
+    ):
+        if key in pool:
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.append(f'{metric} {pool[key]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
-from models.database import execute_query
-from algorithms.priority import calculate_priority_score
-from algorithms.queue_manager import reorder_queue, generate_token
-from algorithms.wait_time import estimate_wait_time
-from datetime import datetime
+from models.patient import get_patient
+from models.doctor import get_doctor
+from models.queue_entries import get_entry_status
+from algorithms.queue_executor import run_queue_command, QueueCommandTimeout
+from algorithms.queue_commands import CHECK_IN_REQUIRED_FIELDS, check_in_command
+from algorithms.assignment import assign_doctor, release_assignment
+from algorithms.bulk_checkin import parse_check_ins, bulk_check_in
 
 bp = Blueprint('patient', __name__)
 
@@ -22,99 +24,73 @@ def check_in_patient():
         "is_emergency": false,
         "notes": "Chest pain"
     }
+    
+    doctor_id may be omitted: the patient is then assigned to the doctor
+    in the department who is projected to be free first. The queue changes
+    run on the doctor's command executor, batched with concurrent ones.
     """
     try:
         data = request.json
         
         # Validate required fields
-        required = ['patient_id', 'doctor_id', 'department_id', 'visit_type']
-        for field in required:
+        for field in CHECK_IN_REQUIRED_FIELDS:
             if field not in data:
                 return jsonify({'error': f'Missing field: {field}'}), 400
         
-        # Get patient age and chronic conditions
-        patient_query = """
-            SELECT 
-                TIMESTAMPDIFF(YEAR, date_of_birth, CURDATE()) as age,
-                chronic_conditions
-            FROM patients
-            WHERE patient_id = %s
-        """
-        patient_info = execute_query(patient_query, (data['patient_id'],), fetch=True)
+        # Get patient age and chronic conditions (reference cache)
+        patient = get_patient(data['patient_id'])
         
-        if not patient_info:
+        if not patient:
             return jsonify({'error': 'Patient not found'}), 404
         
-        age = patient_info[0]['age']
-        chronic_conditions = patient_info[0]['chronic_conditions']
-        has_chronic = len(chronic_conditions) > 0 if chronic_conditions else False
-        
-        # Calculate priority score
-        priority_data = {
-            'is_emergency': data.get('is_emergency', False),
-            'symptom_severity': data.get('symptom_severity', 'Moderate'),
-            'age': age,
-            'has_chronic_condition': has_chronic,
-            'visit_type': data['visit_type']
-        }
-        priority_score = calculate_priority_score(priority_data)
-        
-        # Generate token
-        token = generate_token(data['department_id'])
-        
-        # Insert into queue
-        insert_query = """
-            INSERT INTO queue_entries 
-            (patient_id, doctor_id, department_id, token_number, visit_type,
-             age, symptom_severity, has_chronic_condition, is_emergency,
-             priority_score, status, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Waiting', %s)
-        """
+        # No doctor chosen: least projected wait in the department
+        assigned = data.get('doctor_id') is None
+        if assigned:
+            try:
+                data['doctor_id'] = assign_doctor(data['department_id'])['doctor_id']
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 409
         
-        queue_id = execute_query(insert_query, (
-            data['patient_id'],
-            data['doctor_id'],
-            data['department_id'],
-            token,
-            data['visit_type'],
-            age,
-            data.get('symptom_severity', 'Moderate'),
-            has_chronic,
-            data.get('is_emergency', False),
-            priority_score,
-            data.get('notes', '')
-        ))
+        # Serialized with the doctor's other queue changes (one transaction per batch)
+        try:
+            body = run_queue_command(data['doctor_id'], check_in_command(data, patient))
+        except Exception:
+            if assigned:
+                release_assignment(data['doctor_id'], data['department_id'])
+            raise
         
-        # Reorder queue
-        reorder_queue(data['doctor_id'])
+        return jsonify(dict(body, assigned=assigned)), 201
         
-        # Estimate wait time
-        wait_time = estimate_wait_time(queue_id)
+    except QueueCommandTimeout as e:
+        # Cancelled before it ran: nothing was written, the client may retry
+        return jsonify({'error': str(e)}), 503
         
-        # Get queue position
-        position_query = "SELECT queue_position FROM queue_entries WHERE queue_id = %s"
-        position_result = execute_query(position_query, (queue_id,), fetch=True)
-        queue_position = position_result[0]['queue_position']
+    except Exception as e:
+        print(f"❌ Check-in error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/bulk-checkin', methods=['POST'])
+def bulk_check_in_patients():
+    """
+    Bulk check-in / appointment import
+    
+    Body: JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) of
+    check-ins with the same fields as /checkin. Returns per-row results
+    plus throughput.
+    """
+    try:
+        try:
+            rows = parse_check_ins(request.get_data(as_text=True), request.content_type)
+        except ValueError as e:
+            return jsonify({'error': f'Could not parse upload: {e}'}), 400
         
-        # Log event
-        log_query = """
-            INSERT INTO system_events (event_type, queue_id, doctor_id)
-            VALUES ('Check-in', %s, %s)
-        """
-        execute_query(log_query, (queue_id, data['doctor_id']))
+        summary = bulk_check_in(rows)
         
-        return jsonify({
-            'success': True,
-            'queue_id': queue_id,
-            'token_number': token,
-            'priority_score': float(priority_score),
-            'queue_position': queue_position,
-            'estimated_wait_time': wait_time,
-            'message': f'Checked in successfully. Token: {token}'
-        }), 201
+        return jsonify(dict(summary, success=True)), 200
         
     except Exception as e:
-        print(f"❌ Check-in error: {e}")
+        print(f"❌ Bulk check-in error: {e}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -122,23 +98,23 @@ def check_in_patient():
 def get_queue_status(queue_id):
     """Get current status of a patient in queue"""
     try:
-        query = """
-            SELECT 
-                q.token_number, q.queue_position, q.estimated_wait_time,
-                q.status, q.priority_score,
-                p.first_name, p.last_name,
-                d.doctor_name
-            FROM queue_entries q
-            JOIN patients p ON q.patient_id = p.patient_id
-            JOIN doctors d ON q.doctor_id = d.doctor_id
-            WHERE q.queue_id = %s
-        """
-        result = execute_query(query, (queue_id,), fetch=True)
+        entry = get_entry_status(queue_id)
         
-        if not result:
+        if not entry:
             return jsonify({'error': 'Queue entry not found'}), 404
         
-        return jsonify(result[0]), 200
+        # Names come from the reference caches instead of a JOIN
+        patient = get_patient(entry.pop('patient_id')) or {}
+        doctor = get_doctor(entry.pop('doctor_id')) or {}
+        entry['first_name'] = patient.get('first_name')
+        entry['last_name'] = patient.get('last_name')
+        entry['doctor_name'] = doctor.get('doctor_name')
+        entry['wait_range'] = {
+            'p50': entry['estimated_wait_time'],
+            'p90': entry.pop('estimated_wait_p90', None)
+        }
+        
+        return jsonify(entry), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
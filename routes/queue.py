@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify, make_response
+from models.queue import queue_changes
+from models.board import get_board, board_view
+from config import Config
+
+bp = Blueprint('queue', __name__)
+
+@bp.route('/board', methods=['GET'])
+def get_queue_board():
+    """
+    Now-serving and next tokens for every doctor, for waiting-hall screens
+
+    Query parameters:
+        department_id - one department (omit for the whole hospital)
+        next          - waiting tokens per doctor (default 5, max BOARD_MAX_NEXT)
+
+    Served from one shared snapshot per department; If-None-Match gets a
+    304 without touching the snapshot or the database.
+    """
+    try:
+        department_id = request.args.get('department_id', type=int)
+        next_count = request.args.get('next', default=5, type=int)
+        next_count = max(0, min(next_count, Config.BOARD_MAX_NEXT))
+
+        etag = queue_changes.board_etag(department_id)
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        board = board_view(get_board(department_id), next_count)
+        response = jsonify(dict(board, success=True))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
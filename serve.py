@@ -0,0 +1,148 @@
+"""
+Multi-process server without extra dependencies
+
+A pre-fork launcher for development and load testing: the parent binds
+one listening socket, runs pending migrations, starts the local message
+broker (for local:// queues) and forks Config.WORKERS children. Each
+child imports the app after the fork and serves the shared socket with
+the threaded Werkzeug server; the kernel spreads connections across
+them. Dead workers are restarted. In production use gunicorn.conf.py.
+
+Usage:
+    DB_BACKEND=sqlite SQLITE_PATH=opd.db WORKERS=4 \\
+        SOCKETIO_MESSAGE_QUEUE=local://127.0.0.1:6380 python serve.py [--port 5000]
+"""
+from config import Config
+import argparse
+import glob
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+
+def worker_spill_path(worker_number):
+    """Event spill file of one worker (workers must not share a spill file)"""
+    base, ext = os.path.splitext(Config.EVENT_SINK_SPILL_PATH)
+    return f"{base}.{worker_number}{ext}"
+
+
+def adopt_orphaned_spills(workers):
+    """
+    Hand spill files of worker slots that no longer exist to worker 1
+
+    Worker N always reuses worker_spill_path(N), so a restarted worker
+    replays what its predecessor spilled; only slots above the new worker
+    count would be left behind. Runs in the launcher, before any fork.
+    """
+    base, ext = os.path.splitext(Config.EVENT_SINK_SPILL_PATH)
+    target = worker_spill_path(1)
+    for path in sorted(glob.glob(f"{glob.escape(base)}.*{ext}")):
+        slot = path[len(base) + 1:len(path) - len(ext)]
+        if not slot.isdigit() or 1 <= int(slot) <= workers:
+            continue
+        with open(path, encoding='utf-8') as orphan, open(target, 'a', encoding='utf-8') as spill_file:
+            spill_file.writelines(line if line.endswith('\n') else line + '\n' for line in orphan)
+        os.remove(path)
+        print(f"⚠️ Spill file {path} belongs to no worker, handed to worker 1")
+
+
+def run_worker(listen_socket, worker_number):
+    """Serve the shared socket in a forked child (does not return)"""
+    Config.EVENT_SINK_SPILL_PATH = worker_spill_path(worker_number)
+    from werkzeug.serving import make_server
+    from app import app
+
+    host, port = listen_socket.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=listen_socket.fileno())
+    print(f"✅ Worker {worker_number} (pid {os.getpid()}) serving")
+    try:
+        server.serve_forever()
+    finally:
+        from models.event_sink import event_sink
+        event_sink.flush()
+        os._exit(0)
+
+
+def serve(host='0.0.0.0', port=5000, workers=None):
+    """
+    Run `workers` server processes on one port until interrupted
+
+    Args:
+        host (str): Address to bind
+        port (int): Port to bind
+        workers (int): Worker processes (default: Config.WORKERS)
+    """
+    workers = workers or Config.WORKERS
+    os.environ['WORKERS'] = str(workers)
+    Config.WORKERS = workers
+    # One queue-version epoch for every worker, restarted ones included
+    Config.QUEUE_EPOCH = os.environ['QUEUE_EPOCH'] = Config.QUEUE_EPOCH or str(int(time.time()))
+
+    # Migrations once, in a separate process, so no worker races another
+    subprocess.run([sys.executable, '-m', 'migrations.runner'], check=True)
+    adopt_orphaned_spills(workers)
+
+    if workers > 1 and Config.SOCKETIO_MESSAGE_QUEUE.startswith('local://'):
+        from bus import run_broker
+        threading.Thread(target=run_broker, args=(Config.SOCKETIO_MESSAGE_QUEUE,), daemon=True).start()
+        time.sleep(0.2)
+
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_socket.bind((host, port))
+    listen_socket.listen(1024)
+    listen_socket.set_inheritable(True)
+
+    children = {}            # pid -> worker number
+    stopping = False
+
+    def spawn(worker_number):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            run_worker(listen_socket, worker_number)
+        children[pid] = worker_number
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"🚀 Starting {workers} workers on http://{host}:{port}")
+    for worker_number in range(1, workers + 1):
+        spawn(worker_number)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker_number = children.pop(pid, None)
+        if worker_number is not None and not stopping:
+            print(f"⚠️ Worker {worker_number} (pid {pid}) exited with {status}, restarting")
+            time.sleep(1)
+            spawn(worker_number)
+    print("✅ All workers stopped")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the OPD app with several worker processes')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None, help='Default: WORKERS')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
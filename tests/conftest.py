@@ -0,0 +1,99 @@
+"""
+Shared fixtures: the Flask app on an in-memory SQLite database
+
+Config is read at import, so the backend is chosen before the app is
+loaded. All tests share one database; each takes its own doctor and
+patients (new_doctor, new_patients) so queues never overlap.
+"""
+import itertools
+import json
+import os
+
+import pytest
+
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = ':memory:'
+os.environ['WORKERS'] = '1'
+
+from app import app as flask_app                              # noqa: E402  (reads DB_BACKEND)
+from models.database import execute_query, execute_many, transaction   # noqa: E402
+
+_registration_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def department_id():
+    """One department for every test"""
+    with transaction():
+        return execute_query(
+            "INSERT INTO departments (department_name, department_code) VALUES (%s, %s)",
+            ('General Medicine', 'GEN')
+        )
+
+
+@pytest.fixture
+def make_doctor(department_id):
+    """make_doctor() inserts a doctor with an empty queue, returns doctor_id"""
+    def create():
+        with transaction():
+            return execute_query(
+                """
+                INSERT INTO doctors (doctor_name, specialization, department_id, average_consultation_time)
+                VALUES (%s, %s, %s, %s)
+                """,
+                ('Dr. Test', 'General', department_id, 10)
+            )
+
+    return create
+
+
+@pytest.fixture
+def new_doctor(make_doctor):
+    """A doctor with an empty queue, returns doctor_id"""
+    return make_doctor()
+
+
+@pytest.fixture
+def new_patients():
+    """new_patients(count) inserts patients nobody has checked in, returns their ids"""
+    def create(count):
+        numbers = [next(_registration_numbers) for _ in range(count)]
+        with transaction():
+            execute_many(
+                """
+                INSERT INTO patients
+                (registration_number, first_name, last_name, date_of_birth, gender, phone, chronic_conditions)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                [(f"T{number:06d}", f"Patient{number}", 'Test', '1980-01-01', 'F',
+                  f"80000{number:05d}", json.dumps([])) for number in numbers]
+            )
+        rows = execute_query(
+            f"SELECT patient_id FROM patients WHERE registration_number IN ({', '.join(['%s'] * count)})",
+            [f"T{number:06d}" for number in numbers], fetch=True
+        )
+        return sorted(row['patient_id'] for row in rows)
+
+    return create
+
+
+@pytest.fixture
+def check_in(client, department_id):
+    """check_in(patient_id, doctor_id, **fields) posts a check-in, returns the response"""
+    def post(patient_id, doctor_id, **fields):
+        return client.post('/api/patient/checkin', json=dict({
+            'patient_id': patient_id, 'doctor_id': doctor_id, 'department_id': department_id,
+            'visit_type': 'Walk-in', 'symptom_severity': 'Moderate'
+        }, **fields))
+
+    return post
@@ -0,0 +1,39 @@
+"""Least-projected-wait assignment (algorithms/assignment.py)"""
+from algorithms import queue_manager
+from algorithms.assignment import DepartmentScheduler
+from algorithms.queue_manager import drop_doctor_queue, get_doctor_queue
+from models.doctor import get_department_doctor_ids
+from models.queue import DoctorQueue
+
+
+def test_late_load_does_not_replace_the_resident_queue(new_doctor, monkeypatch):
+    drop_doctor_queue(new_doctor)
+    resident = DoctorQueue(new_doctor)
+    load = queue_manager._load_doctor_queue
+
+    def load_while_executor_stores(doctor_id):
+        loaded = load(doctor_id)
+        queue_manager._doctor_queues[doctor_id] = resident     # the executor got there first
+        return loaded
+
+    monkeypatch.setattr(queue_manager, '_load_doctor_queue', load_while_executor_stores)
+
+    assert get_doctor_queue(new_doctor) is resident
+    assert queue_manager._doctor_queues[new_doctor] is resident
+
+
+def test_assign_reads_doctors_outside_the_lock(new_doctor, department_id, monkeypatch):
+    scheduler = DepartmentScheduler()
+    reads = []
+
+    def is_available(doctor_id):
+        reads.append(scheduler._lock.locked())
+        return True
+
+    monkeypatch.setattr(scheduler, '_is_available', is_available)
+
+    assigned = scheduler.assign(department_id)
+    scheduler.refresh_doctor(new_doctor, department_id)
+
+    assert assigned['doctor_id'] in get_department_doctor_ids(department_id)
+    assert reads and not any(reads)
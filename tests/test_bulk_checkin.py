@@ -0,0 +1,39 @@
+"""Bulk check-in (algorithms/bulk_checkin.py) alongside single check-ins"""
+import threading
+
+import pytest
+
+from config import Config
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_bulk_import_and_check_ins_share_the_doctor_queue(
+        monkeypatch, client, check_in, new_doctor, new_patients, department_id, workers):
+    # With WORKERS > 1 every batch also takes the doctor's row lock and reloads the queue
+    monkeypatch.setattr(Config, 'WORKERS', workers)
+    bulk_ids, single_ids = new_patients(40), new_patients(20)
+    rows = [{'patient_id': patient_id, 'doctor_id': new_doctor, 'department_id': department_id,
+             'visit_type': 'Appointment'} for patient_id in bulk_ids]
+    rows.append({'patient_id': bulk_ids[0], 'doctor_id': new_doctor, 'department_id': department_id,
+                 'visit_type': 'Unknown'})
+    summary = {}
+
+    def bulk():
+        summary.update(client.post('/api/patient/bulk-checkin', json=rows).get_json())
+
+    threads = [threading.Thread(target=bulk)] + [
+        threading.Thread(target=check_in, args=(patient_id, new_doctor)) for patient_id in single_ids
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert summary['accepted'] == len(bulk_ids)
+    assert summary['rejected'] == 1
+    assert not summary['results'][-1]['success']
+
+    queue = client.get(f'/api/doctor/{new_doctor}/queue').get_json()['queue']
+    assert len(queue) == len(bulk_ids) + len(single_ids)
+    assert [entry['queue_position'] for entry in queue] == list(range(1, len(queue) + 1))
+    assert len({entry['token_number'] for entry in queue}) == len(queue)
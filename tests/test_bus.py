@@ -0,0 +1,32 @@
+"""Cross-worker invalidation bus (bus.py); two buses on one transport stand in for two workers"""
+import time
+
+from bus import InvalidationBus, _apply_cache_invalidation
+from models.cache import TTLCache
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_cache_invalidation_reaches_only_the_other_worker():
+    worker_a, worker_b = InvalidationBus('test-invalidation'), InvalidationBus('test-invalidation')
+    applied_by_a, applied_by_b = [], []
+    worker_a.on('cache', applied_by_a.append)
+    worker_b.on('cache', lambda message: (applied_by_b.append(message), _apply_cache_invalidation(message)))
+    worker_a.start('memory://')
+    worker_b.start('memory://')
+    time.sleep(0.1)
+
+    cache = TTLCache('bus_test', maxsize=8, ttl=60)
+    cache.put(1, 'stale')
+    worker_a.publish('cache', cache='bus_test', key=1)
+
+    assert wait_for(lambda: applied_by_b)
+    time.sleep(0.1)
+    assert applied_by_a == []
+    assert len(applied_by_b) == 1
+    assert cache.peek(1) is None
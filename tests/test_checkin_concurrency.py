@@ -0,0 +1,20 @@
+"""Hundreds of simultaneous check-ins through POST /api/patient/checkin"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_concurrent_check_ins_get_unique_tokens_and_contiguous_positions(
+        client, check_in, new_doctor, new_patients):
+    patient_ids = new_patients(300)
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        responses = list(pool.map(lambda patient_id: check_in(patient_id, new_doctor), patient_ids))
+
+    assert [response.status_code for response in responses] == [201] * len(patient_ids)
+    bodies = [response.get_json() for response in responses]
+    tokens = [body['token_number'] for body in bodies]
+    assert len(set(tokens)) == len(tokens)
+
+    queue = client.get(f'/api/doctor/{new_doctor}/queue').get_json()['queue']
+    assert len(queue) == len(patient_ids)
+    assert [entry['queue_position'] for entry in queue] == list(range(1, len(patient_ids) + 1))
+    assert {entry['queue_id'] for entry in queue} == {body['queue_id'] for body in bodies}
@@ -0,0 +1,67 @@
+"""Start / end consultation must fail, without side effects, on the wrong entry"""
+from models.database import execute_query
+from models.doctor import get_doctor
+
+
+def history_rows(queue_id):
+    return execute_query("SELECT history_id FROM consultation_history WHERE queue_id = %s",
+                         (queue_id,), fetch=True)
+
+
+def test_consultation_round_trip(client, check_in, new_doctor, new_patients):
+    queue_id = check_in(new_patients(1)[0], new_doctor).get_json()['queue_id']
+
+    started = client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': queue_id})
+    ended = client.post(f'/api/doctor/{new_doctor}/end-consultation', json={'queue_id': queue_id})
+
+    assert started.status_code == 200
+    assert ended.status_code == 200
+    assert ended.get_json()['consultation_time'] is not None
+    assert len(history_rows(queue_id)) == 1
+
+
+def test_end_unknown_entry_is_404(client, new_doctor):
+    response = client.post(f'/api/doctor/{new_doctor}/end-consultation', json={'queue_id': 999999})
+
+    assert response.status_code == 404
+    assert history_rows(999999) == []
+
+
+def test_end_other_doctors_entry_is_404(client, check_in, new_doctor, make_doctor, new_patients):
+    queue_id = check_in(new_patients(1)[0], new_doctor).get_json()['queue_id']
+    client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': queue_id})
+    other_doctor = make_doctor()
+
+    response = client.post(f'/api/doctor/{other_doctor}/end-consultation', json={'queue_id': queue_id})
+
+    assert response.status_code == 404
+    assert history_rows(queue_id) == []
+
+
+def test_end_waiting_entry_is_409_and_changes_nothing(client, check_in, new_doctor, new_patients):
+    current_id = check_in(new_patients(1)[0], new_doctor, symptom_severity='High').get_json()['queue_id']
+    waiting_id = check_in(new_patients(1)[0], new_doctor).get_json()['queue_id']
+    client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': current_id})
+
+    response = client.post(f'/api/doctor/{new_doctor}/end-consultation', json={'queue_id': waiting_id})
+
+    assert response.status_code == 409
+    assert history_rows(waiting_id) == []
+    assert get_doctor(new_doctor)['current_status'] == 'Busy'
+    queue = client.get(f'/api/doctor/{new_doctor}/queue').get_json()['queue']
+    assert [entry['queue_id'] for entry in queue] == [waiting_id]
+
+
+def test_start_twice_is_409(client, check_in, new_doctor, new_patients):
+    queue_id = check_in(new_patients(1)[0], new_doctor).get_json()['queue_id']
+    client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': queue_id})
+
+    response = client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': queue_id})
+
+    assert response.status_code == 409
+
+
+def test_end_without_queue_id_is_400(client, new_doctor):
+    response = client.post(f'/api/doctor/{new_doctor}/end-consultation', json={})
+
+    assert response.status_code == 400
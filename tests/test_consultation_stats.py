@@ -0,0 +1,31 @@
+"""Running consultation-time stats (algorithms/consultation_stats.py)"""
+from algorithms.consultation_stats import (
+    get_consultation_stats, rebuild_consultation_stats, record_consultation
+)
+from models.database import execute_query, transaction
+
+
+def average_consultation_time(doctor_id):
+    return execute_query("SELECT average_consultation_time FROM doctors WHERE doctor_id = %s",
+                         (doctor_id,), fetch=True)[0]['average_consultation_time']
+
+
+def test_ewma_starts_after_rebuild_of_doctor_without_history(new_doctor):
+    rebuild_consultation_stats(new_doctor)
+    assert get_consultation_stats(new_doctor).ewma is None
+
+    with transaction():
+        record_consultation(new_doctor, 10)
+        record_consultation(new_doctor, 20)
+
+    stats = get_consultation_stats(new_doctor)
+    assert stats.count == 2
+    assert stats.ewma is not None and 10 < stats.ewma <= 20
+
+
+def test_average_is_rounded_not_truncated(new_doctor):
+    with transaction():
+        record_consultation(new_doctor, 7)
+        record_consultation(new_doctor, 8)
+
+    assert average_consultation_time(new_doctor) == 8
@@ -0,0 +1,43 @@
+"""Wait-range sketches (algorithms/duration_model.py) on top of doctor_stats"""
+from algorithms.consultation_stats import get_consultation_stats, record_consultation
+from algorithms.duration_model import get_duration_model, record_duration
+from config import Config
+from models.database import execute_query, transaction
+
+
+def finish_consultations(doctor_id, kinds):
+    with transaction():
+        for visit_type, severity, minutes in kinds:
+            record_consultation(doctor_id, minutes)
+            record_duration(doctor_id, visit_type, severity, minutes)
+
+
+def test_doctor_wide_sketch_comes_from_doctor_stats(new_doctor):
+    samples = Config.ETA_MIN_SAMPLES
+    finish_consultations(new_doctor, [('Walk-in', 'Moderate', 12)] * samples +
+                         [('Follow-up', 'Low', 6)] * (samples // 2))
+
+    rows = execute_query(
+        "SELECT visit_type, symptom_severity, sample_count FROM duration_sketches WHERE doctor_id = %s",
+        (new_doctor,), fetch=True
+    )
+    assert {(row['visit_type'], row['symptom_severity']) for row in rows} == {
+        ('Walk-in', 'Moderate'), ('Walk-in', '*'), ('Follow-up', 'Low'), ('Follow-up', '*')
+    }
+
+    model = get_duration_model(new_doctor)
+    overall = model.duration()
+    stats = get_consultation_stats(new_doctor)
+    assert (overall.count, overall.total, overall.histogram) == (stats.count, stats.total, stats.histogram)
+
+    # Too few Follow-up samples: falls back to the doctor-wide sketch
+    assert model.duration('Follow-up', 'Low') is overall
+    assert model.duration('Walk-in', 'Moderate').count == samples
+
+
+def test_new_consultation_refreshes_the_cached_model(new_doctor):
+    finish_consultations(new_doctor, [('Walk-in', 'Moderate', 10)])
+    assert get_duration_model(new_doctor).overall.count == 1
+
+    finish_consultations(new_doctor, [(None, None, 14)])
+    assert get_duration_model(new_doctor).overall.count == 2
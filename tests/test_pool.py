@@ -0,0 +1,52 @@
+"""Bounded connection pool (models/pool.py)"""
+import threading
+import time
+
+import pytest
+
+from models.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+def make_pool(pool_size=2, max_overflow=1, timeout=2):
+    return ConnectionPool(FakeConnection, pool_size=pool_size, max_overflow=max_overflow,
+                          timeout=timeout, leak_seconds=0)
+
+
+def test_callers_wait_instead_of_failing():
+    pool = make_pool()
+    errors = []
+
+    def worker():
+        try:
+            connection = pool.checkout()
+            time.sleep(0.02)
+            connection.close()
+        except PoolTimeoutError as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.metrics()
+    assert errors == []
+    assert stats['waits'] > 0
+    assert stats['peak_in_use'] <= pool.capacity
+
+
+def test_exhausted_pool_times_out():
+    pool = make_pool()
+    held = [pool.checkout() for _ in range(pool.capacity)]
+    try:
+        with pytest.raises(PoolTimeoutError):
+            pool.checkout(timeout=0.05)
+    finally:
+        for connection in held:
+            connection.close()
@@ -0,0 +1,19 @@
+"""Per-request query counting (models/query_stats.py, routes/metrics.py)"""
+from config import Config
+from models.patient import get_patient
+from models.query_stats import query_stats
+
+
+def test_check_in_counts_the_statements_run_on_the_executor(check_in, new_doctor, new_patients, monkeypatch):
+    monkeypatch.setattr(Config, 'DB_TIMING_HEADERS', True)
+    patient_id = new_patients(1)[0]
+    get_patient(patient_id)
+    before = query_stats.snapshot()['endpoints'].get('patient.check_in_patient', {}).get('queries', 0)
+
+    response = check_in(patient_id, new_doctor)
+
+    assert response.status_code == 201
+    # token, insert, positions, wait ranges and the in-progress read at least
+    queries = int(response.headers['X-DB-Queries'])
+    assert queries >= 5
+    assert query_stats.snapshot()['endpoints']['patient.check_in_patient']['queries'] - before == queries
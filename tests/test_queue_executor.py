@@ -0,0 +1,114 @@
+"""Per-doctor queue command executor (algorithms/queue_executor.py)"""
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from algorithms.queue_commands import check_in_command, end_consultation_command
+from algorithms.queue_executor import (
+    DoctorCommandExecutor, QueueCommandTimeout, executor_stats, submit_queue_command, wait_for_command
+)
+from config import Config
+from models.database import execute_query
+from models.patient import get_patient
+
+
+def blocking_command(started, release, result='done'):
+    """A command that holds its batch until release is set"""
+    def command(batch):
+        started.set()
+        release.wait(5)
+        return lambda batch: result
+
+    return command
+
+
+def test_burst_of_check_ins_is_coalesced(client, check_in, new_doctor, new_patients):
+    patient_ids = new_patients(20)
+    barrier = threading.Barrier(len(patient_ids))
+    responses = {}
+
+    def post(patient_id):
+        barrier.wait()
+        responses[patient_id] = check_in(patient_id, new_doctor)
+
+    threads = [threading.Thread(target=post, args=(patient_id,)) for patient_id in patient_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(response.status_code == 201 for response in responses.values())
+    stats = executor_stats()[new_doctor]
+    assert stats['commands'] == len(patient_ids)
+    assert stats['batches'] < len(patient_ids)
+    assert stats['largest_batch'] > 1
+
+    queue = client.get(f'/api/doctor/{new_doctor}/queue').get_json()['queue']
+    assert [entry['queue_position'] for entry in queue] == list(range(1, len(patient_ids) + 1))
+    assert sorted(response.get_json()['queue_position'] for response in responses.values()) == \
+        list(range(1, len(patient_ids) + 1))
+
+
+def test_end_consultation_next_patient_ignores_unplaced_check_ins(
+        client, check_in, new_doctor, new_patients, department_id):
+    first, second, late = new_patients(3)
+    first_id = check_in(first, new_doctor, symptom_severity='High').get_json()['queue_id']
+    second_id = check_in(second, new_doctor).get_json()['queue_id']
+    client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': first_id})
+
+    # A check-in and the end of the consultation in the same batch: the new
+    # row has no queue position until the batch settles
+    patient = get_patient(late)
+    commands = [
+        (check_in_command({'patient_id': late, 'doctor_id': new_doctor, 'department_id': department_id,
+                           'visit_type': 'Walk-in', 'symptom_severity': 'Low'}, patient), Future()),
+        (end_consultation_command(new_doctor, first_id), Future())
+    ]
+    DoctorCommandExecutor(new_doctor)._execute(commands)
+
+    _, next_patient = commands[1][1].result()
+    assert next_patient['queue_id'] == second_id
+
+
+def test_command_not_started_in_time_is_cancelled(new_doctor):
+    started, release = threading.Event(), threading.Event()
+    running = submit_queue_command(new_doctor, blocking_command(started, release))
+    started.wait(5)
+    ran = []
+    queued = submit_queue_command(new_doctor, lambda batch: ran.append(True) or (lambda batch: None))
+
+    with pytest.raises(QueueCommandTimeout):
+        wait_for_command(queued, timeout=0.05)
+
+    release.set()
+    assert running.result(5) == 'done'
+    submit_queue_command(new_doctor, lambda batch: lambda batch: None).result(5)
+    assert ran == [] and queued.cancelled()
+
+
+def test_running_command_is_waited_for_past_the_timeout(new_doctor):
+    started, release = threading.Event(), threading.Event()
+    running = submit_queue_command(new_doctor, blocking_command(started, release))
+    started.wait(5)
+    threading.Timer(0.2, release.set).start()
+
+    assert wait_for_command(running, timeout=0.05) == 'done'
+
+
+def test_check_in_that_never_started_is_503_and_not_written(
+        client, check_in, new_doctor, new_patients, monkeypatch):
+    patient_id = new_patients(1)[0]
+    get_patient(patient_id)      # cached, so the request only waits on the executor
+    started, release = threading.Event(), threading.Event()
+    submit_queue_command(new_doctor, blocking_command(started, release))
+    started.wait(5)
+    monkeypatch.setattr(Config, 'QUEUE_COMMAND_TIMEOUT', 0.05)
+
+    response = check_in(patient_id, new_doctor)
+    release.set()
+
+    assert response.status_code == 503
+    assert response.get_json()['error']
+    assert execute_query("SELECT queue_id FROM queue_entries WHERE patient_id = %s",
+                         (patient_id,), fetch=True) == []
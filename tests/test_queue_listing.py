@@ -0,0 +1,44 @@
+"""Keyset pages of a doctor's queue stay consistent while the queue changes"""
+
+
+def queue_page(client, doctor_id, after=None, limit=3):
+    query = f'limit={limit}' + (f'&after={after}' if after is not None else '')
+    return client.get(f'/api/doctor/{doctor_id}/queue?{query}').get_json()
+
+
+def test_pages_do_not_skip_or_repeat_when_positions_shift(client, check_in, new_doctor, new_patients):
+    patients = new_patients(9)
+    waiting = [check_in(patient_id, new_doctor).get_json()['queue_id'] for patient_id in patients[:6]]
+
+    first = queue_page(client, new_doctor)
+    assert [row['queue_id'] for row in first['queue']] == waiting[:3]
+    assert first['next_after'] == waiting[2]
+
+    # Between pages: the head is called in and two emergencies jump the
+    # queue, so every remaining position moves up by one
+    client.post(f'/api/doctor/{new_doctor}/start-consultation', json={'queue_id': waiting[0]})
+    emergencies = [check_in(patient_id, new_doctor, is_emergency=True).get_json()['queue_id']
+                   for patient_id in patients[6:8]]
+    later = check_in(patients[8], new_doctor).get_json()['queue_id']
+
+    second = queue_page(client, new_doctor, first['next_after'], limit=10)
+    assert [row['queue_id'] for row in second['queue']] == waiting[3:] + [later]
+    assert not set(emergencies) & {row['queue_id'] for row in second['queue']}
+    assert second['has_more'] is False
+
+
+def test_paged_order_matches_queue_positions(client, check_in, new_doctor, new_patients):
+    patients = new_patients(5)
+    for index, patient_id in enumerate(patients):
+        severity = ('Low', 'High', 'Moderate', 'Critical', 'Low')[index]
+        check_in(patient_id, new_doctor, symptom_severity=severity)
+
+    rows, after = [], None
+    while True:
+        page = queue_page(client, new_doctor, after, limit=2)
+        rows += page['queue']
+        if not page['has_more']:
+            break
+        after = page['next_after']
+
+    assert [row['queue_position'] for row in rows] == [1, 2, 3, 4, 5]
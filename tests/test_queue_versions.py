@@ -0,0 +1,101 @@
+"""Queue versions and ?since= deltas (models/queue.py QueueChangeLog)"""
+from models.queue import QueueChangeLog
+from models.queue_entries import get_queue_version, next_queue_version
+
+
+class SharedCounter:
+    """Stands in for the queue_versions table"""
+
+    def __init__(self):
+        self.versions = {}
+
+    def next(self, doctor_id):
+        self.versions[doctor_id] = self.versions.get(doctor_id, 0) + 1
+        return self.versions[doctor_id]
+
+    def load(self, doctor_id):
+        return self.versions.get(doctor_id, 0)
+
+
+def workers(counter, count=2, epoch=1700000000):
+    logs = [QueueChangeLog() for _ in range(count)]
+    for log in logs:
+        log.use_shared_versions(counter.load, epoch)
+    return logs
+
+
+def publish(counter, origin, others, doctor_id, delta):
+    version = counter.next(doctor_id)
+    origin.record(doctor_id, dict(delta, version=version), version)
+    return version, [(log, dict(delta, version=version)) for log in others]
+
+
+def test_local_versions_count_deltas():
+    log = QueueChangeLog()
+    assert log.record(1, {'type': 'entry_added'}) == 1
+    assert log.record(1, {'type': 'entries_moved'}) == 2
+    assert [delta['type'] for delta in log.changes_since(1, 0)] == ['entry_added', 'entries_moved']
+    assert log.changes_since(1, 2) == []
+    assert log.changes_since(1, 3) is None
+
+
+def test_since_from_another_epoch_gets_a_full_reload():
+    log = QueueChangeLog()
+    log.record(1, {'type': 'entry_added'})
+    assert log.changes_since(1, 0, log.epoch) is not None
+    assert log.changes_since(1, 0, log.epoch - 1) is None
+
+
+def test_workers_agree_on_versions_whatever_the_delivery_order():
+    counter = SharedCounter()
+    worker_a, worker_b = workers(counter)
+
+    _, to_b_1 = publish(counter, worker_a, [worker_b], 7, {'type': 'entry_added', 'queue_id': 1})
+    _, to_a = publish(counter, worker_b, [worker_a], 7, {'type': 'entry_added', 'queue_id': 2})
+    _, to_b_2 = publish(counter, worker_a, [worker_b], 7, {'type': 'entry_called', 'queue_id': 1})
+
+    # worker_b hears about version 3 before version 1
+    for log, delta in to_b_2 + to_a + to_b_1:
+        log.record(7, delta, delta['version'])
+    for log, delta in to_a:
+        log.record(7, delta, delta['version'])       # duplicates are ignored
+
+    assert worker_a.version(7) == worker_b.version(7) == 3
+    assert worker_a.etag(7) == worker_b.etag(7)
+    assert worker_a.changes_since(7, 1) == worker_b.changes_since(7, 1)
+    assert [delta['version'] for delta in worker_b.changes_since(7, 0)] == [1, 2, 3]
+
+
+def test_missing_delta_forces_a_reload_until_it_arrives():
+    counter = SharedCounter()
+    worker_a, worker_b = workers(counter)
+    _, late = publish(counter, worker_a, [worker_b], 7, {'type': 'entry_added'})
+    _, early = publish(counter, worker_a, [worker_b], 7, {'type': 'entries_moved'})
+
+    for log, delta in early:
+        log.record(7, delta, delta['version'])
+    assert worker_b.changes_since(7, 1) == [early[0][1]]
+    assert worker_b.changes_since(7, 0) is None
+
+    for log, delta in late:
+        log.record(7, delta, delta['version'])
+    assert [delta['version'] for delta in worker_b.changes_since(7, 0)] == [1, 2]
+
+
+def test_new_worker_starts_at_the_shared_version():
+    counter = SharedCounter()
+    (worker_a,) = workers(counter, count=1)
+    for _ in range(5):
+        publish(counter, worker_a, [], 7, {'type': 'entries_moved'})
+
+    (restarted,) = workers(counter, count=1)
+    assert restarted.version(7) == 5
+    assert restarted.etag(7) == worker_a.etag(7)
+    assert restarted.changes_since(7, 5) == []
+    assert restarted.changes_since(7, 3) is None
+
+
+def test_shared_counter_in_the_database(new_doctor):
+    assert get_queue_version(new_doctor) == 0
+    assert [next_queue_version(new_doctor) for _ in range(3)] == [1, 2, 3]
+    assert get_queue_version(new_doctor) == 3
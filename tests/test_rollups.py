@@ -0,0 +1,65 @@
+"""Hourly operations rollups (algorithms/rollups.py)"""
+import json
+from datetime import date, datetime
+
+from algorithms.archival import run_archival
+from algorithms.rollups import apply_events, backfill_rollups, query_rollups
+from models.database import execute_query, transaction
+from models.queue_entries import insert_entry
+
+
+def totals(doctor_id, start, end):
+    rows = query_rollups(start, end, doctor_id=doctor_id, group_by='total')
+    return rows[0] if rows else None
+
+
+def add_entry(patient_id, doctor_id, department_id, check_in_time, status):
+    with transaction():
+        queue_id = insert_entry({
+            'patient_id': patient_id, 'doctor_id': doctor_id, 'department_id': department_id,
+            'token_number': f"R{patient_id:06d}", 'visit_type': 'Walk-in', 'age': 40,
+            'symptom_severity': 'Moderate', 'has_chronic_condition': False,
+            'is_emergency': False, 'priority_score': 50, 'check_in_time': check_in_time,
+            'notes': ''
+        })
+        execute_query("UPDATE queue_entries SET status = %s WHERE queue_id = %s", (status, queue_id))
+        execute_query("""
+            INSERT INTO system_events (event_type, queue_id, doctor_id, event_data, timestamp)
+            VALUES ('Check-in', %s, %s, %s, %s)
+        """, (queue_id, doctor_id, json.dumps({'department_id': department_id}), check_in_time))
+    return queue_id
+
+
+def test_events_fold_into_the_hour(new_doctor, department_id):
+    check_in = datetime(2021, 3, 10, 9, 5)
+    apply_events([
+        ('Check-in', 9001, new_doctor, json.dumps({'department_id': department_id}), check_in),
+        ('Consultation_Start', 9001, new_doctor, '{}', datetime(2021, 3, 10, 9, 25)),
+        ('Consultation_End', 9001, new_doctor, json.dumps({'consultation_time': 12}),
+         datetime(2021, 3, 10, 9, 37)),
+    ])
+
+    summary = totals(new_doctor, datetime(2021, 3, 10), datetime(2021, 3, 11))
+    assert summary['check_ins'] == 1
+    assert summary['consultations'] == 1
+    assert summary['mean_wait_minutes'] == 20
+    assert summary['p50_duration_minutes'] == 12
+
+
+def test_backfill_keeps_no_shows_of_archived_days(new_doctor, department_id, new_patients):
+    day = datetime(2021, 4, 6)
+    first, second = new_patients(2)
+    add_entry(first, new_doctor, department_id, datetime(2021, 4, 6, 10, 15), 'Cancelled')
+    add_entry(second, new_doctor, department_id, datetime(2021, 4, 6, 10, 40), 'Completed')
+
+    backfill_rollups()
+    assert totals(new_doctor, day, datetime(2021, 4, 7))['no_shows'] == 1
+
+    run_archival(today=date(2021, 4, 8))
+    assert execute_query("SELECT queue_id FROM queue_entries WHERE doctor_id = %s",
+                         (new_doctor,), fetch=True) == []
+
+    backfill_rollups()
+    summary = totals(new_doctor, day, datetime(2021, 4, 7))
+    assert summary['no_shows'] == 1
+    assert summary['check_ins'] == 2
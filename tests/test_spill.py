@@ -0,0 +1,76 @@
+"""Event spill files survive worker restarts (serve.py, gunicorn.conf.py, models/event_sink.py)"""
+import importlib.util
+import json
+import os
+
+from config import Config
+from models.event_sink import EventSink
+from serve import adopt_orphaned_spills, worker_spill_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_gunicorn_conf():
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(ROOT, 'gunicorn.conf.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeWorker:
+    pass
+
+
+class FakeArbiter:
+    def __init__(self):
+        self.WORKERS = {}        # pid -> worker, as gunicorn's Arbiter keeps them
+
+    def fork(self, conf, pid):
+        worker = FakeWorker()
+        conf.pre_fork(self, worker)
+        self.WORKERS[pid] = worker
+        return worker
+
+
+def test_restarted_worker_reuses_its_slot():
+    conf = load_gunicorn_conf()
+    arbiter = FakeArbiter()
+    for pid in (101, 102, 103):
+        arbiter.fork(conf, pid)
+    assert sorted(worker.slot for worker in arbiter.WORKERS.values()) == [1, 2, 3]
+
+    dead = arbiter.WORKERS.pop(102)
+    replacement = arbiter.fork(conf, 104)
+    assert replacement.slot == dead.slot == 2
+
+
+def test_orphaned_spill_files_go_to_worker_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'EVENT_SINK_SPILL_PATH', str(tmp_path / 'spill.ndjson'))
+    for slot in (1, 2, 7):
+        with open(worker_spill_path(slot), 'w', encoding='utf-8') as spill_file:
+            spill_file.write(json.dumps(['Check-in', slot, 1, '{}', '2026-01-01 09:00:00']) + '\n')
+
+    adopt_orphaned_spills(2)
+
+    assert not os.path.exists(worker_spill_path(7))
+    with open(worker_spill_path(1), encoding='utf-8') as spill_file:
+        assert [json.loads(line)[1] for line in spill_file] == [1, 7]
+    with open(worker_spill_path(2), encoding='utf-8') as spill_file:
+        assert [json.loads(line)[1] for line in spill_file] == [2]
+
+
+def test_replay_resumes_an_interrupted_replay(tmp_path):
+    spill_path = str(tmp_path / 'spill.1.ndjson')
+    with open(f"{spill_path}.replay", 'w', encoding='utf-8') as replay_file:
+        replay_file.write(json.dumps(['Check-in', 1, 1, '{}', '2026-01-01 09:00:00']) + '\n')
+    with open(spill_path, 'w', encoding='utf-8') as spill_file:
+        spill_file.write(json.dumps(['Check-in', 2, 1, '{}', '2026-01-01 09:01:00']) + '\n')
+
+    sink = EventSink(spill_path=spill_path)
+    written = []
+    sink._write = written.extend
+
+    assert sink.replay_spill() == 2
+    assert [row[1] for row in written] == [1, 2]
+    assert not os.path.exists(spill_path)
+    assert not os.path.exists(f"{spill_path}.replay")